@@ -1,18 +1,34 @@
 """FastAPI service for Pharmyrus v4.0"""
+import asyncio
+import json
 import logging
 import time
-from fastapi import FastAPI, HTTPException, Path
+from fastapi import FastAPI, HTTPException, Path, Query
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
 from contextlib import asynccontextmanager
+from typing import Dict, Any, List, Set, Tuple
 
 from .models import (
     WODetailsResponse,
     PatentDetailsResponse,
     SearchRequest,
     SearchResponse,
+    SearchJobResponse,
+    SearchBatchRequest,
     WorldwideApplication
 )
-from .crawlers import crawler_pool, google_patents_client, google_patents_pool, inpi_client
+from .crawlers import crawler_pool, google_patents_pool, inpi_client, PoolBusyError
+from .discovery import pubchem_client
+from .jobs import search_job_manager, JobQueueFullError, JobActiveError
+from .checkpoints import checkpoint_store
+from .rate_limiter import rate_limiter
+from .http_client import http_client
+from . import singleflight
+from .serpapi import serpapi_cache, serpapi_keys
+from .patent_cache import patent_cache
+from .wo_cache import wo_cache
+from .negative_cache import negative_cache
 from . import utils, config
 
 # Setup logging
@@ -22,6 +38,9 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Fire-and-forget tasks (referenced so they are not garbage collected)
+_background_tasks: Set[asyncio.Task] = set()
+
 # ============================================================================
 # Lifespan management
 # ============================================================================
@@ -36,18 +55,19 @@ async def lifespan(app: FastAPI):
     logger.info("  Initializing Google Patents crawlers...")
     await google_patents_pool.initialize()
     logger.info("  Initializing API clients...")
-    await google_patents_client.initialize()
-    await inpi_client.initialize()
+    await http_client.start()
+    logger.info(f"  Starting {config.SEARCH_JOB_WORKERS} search job workers...")
+    await search_job_manager.start()
     logger.info("✅ Pharmyrus v4.0 ready!")
     
     yield
     
     # Shutdown
     logger.info("🛑 Shutting down Pharmyrus v4.0...")
+    await search_job_manager.stop()
     await crawler_pool.close()
     await google_patents_pool.close()
-    await google_patents_client.close()
-    await inpi_client.close()
+    await http_client.close()
     logger.info("✅ Shutdown complete")
 
 # ============================================================================
@@ -106,14 +126,11 @@ async def get_wo_details(
         raise HTTPException(status_code=400, detail=f"Invalid WO number format: {wo_number}")
     
     try:
-        # Get crawler from pool
-        crawler = crawler_pool.get_crawler()
-        
         # Fetch WO details via WIPO Patentscope
         logger.info(f"  🔍 Fetching WIPO data for {clean_wo}...")
-        wo_data = await crawler.get_wo_details(clean_wo)
+        wo_data = await crawler_pool.get_wo_details(clean_wo)
         
-        if not wo_data:
+        if not wo_data or wo_data.get("not_found"):
             raise HTTPException(status_code=404, detail=f"WO not found: {wo_number}")
         
         # Parse worldwide applications
@@ -163,6 +180,9 @@ async def get_wo_details(
     
     except HTTPException:
         raise
+    except PoolBusyError as e:
+        logger.warning(f"  ⚠️  {str(e)}")
+        raise HTTPException(status_code=503, detail=f"WIPO crawlers busy, retry later: {str(e)}")
     except Exception as e:
         logger.error(f"  ❌ Error processing {wo_number}: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Internal error: {str(e)}")
@@ -189,7 +209,8 @@ async def get_patent_details(
     Strategy:
     1. Try Google Patents Playwright (direct scraping, no rate limits)
     2. Fallback to SerpAPI if Playwright fails
-    3. Enrich with INPI data if Brazilian patent
+    3. Enrich with INPI data if Brazilian patent (fetched concurrently
+       with steps 1-2)
     """
     start_time = time.time()
     
@@ -202,47 +223,39 @@ async def get_patent_details(
     logger.info(f"  🌍 Country: {country_code} ({utils.get_country_name(country_code)})")
     
     try:
-        # Strategy 1: Try Google Patents Playwright (direct, no rate limits)
-        logger.info(f"  🔍 Fetching Google Patents data (Playwright)...")
-        gp_playwright_data = await google_patents_pool.fetch_patent(clean_patent)
+        # INPI does not depend on Google Patents: run both lookups together
+        lookups = [_fetch_google_patents(clean_patent)]
+        if country_code == "BR":
+            logger.info(f"  🇧🇷 Fetching INPI data...")
+            lookups.append(inpi_client.get_patent_details(clean_patent))
         
-        # Check if Playwright got meaningful data
-        playwright_success = (
-            gp_playwright_data.get('title') or 
-            gp_playwright_data.get('abstract') or 
-            gp_playwright_data.get('patent_family', {}).get('total_members', 0) > 0
-        )
+        results = await asyncio.gather(*lookups, return_exceptions=True)
         
-        if playwright_success:
-            logger.info(f"  ✅ Playwright: Got data for {clean_patent}")
-            gp_data = gp_playwright_data
-            data_source = "playwright"
-        else:
-            # Strategy 2: Fallback to SerpAPI
-            logger.warning(f"  ⚠️  Playwright failed, trying SerpAPI fallback...")
-            gp_data = await google_patents_client.get_patent_details(clean_patent)
-            data_source = "serpapi"
+        if isinstance(results[0], BaseException):
+            raise results[0]
+        gp_data, data_source = results[0]
         
         # Initialize sources dict
         sources = {
             "google_patents": {
                 "url": gp_data.get("url", f"https://patents.google.com/patent/{clean_patent}"),
                 "pdf_url": gp_data.get("pdf_url", ""),
-                "cpc_classifications": gp_data.get("classifications", {}).get("cpc", []) or gp_data.get("cpc_classifications", []),
-                "ipc_classifications": gp_data.get("classifications", {}).get("ipc", []) or gp_data.get("ipc_classifications", []),
+                "cpc_classifications": gp_data.get("cpc_classifications", []),
+                "ipc_classifications": gp_data.get("ipc_classifications", []),
                 "family_id": gp_data.get("family_id", ""),
-                "family_size": gp_data.get("patent_family", {}).get("total_members", 0) or gp_data.get("family_size", 0),
+                "family_size": gp_data.get("family_size", 0),
                 "data_source": data_source,
-                "family_countries": gp_data.get("patent_family", {}).get("countries", [])
+                "family_countries": gp_data.get("family_countries", [])
             }
         }
         
         # If BR patent, enrich with INPI data
         if country_code == "BR":
-            logger.info(f"  🇧🇷 Fetching INPI data...")
-            inpi_data = await inpi_client.get_patent_details(clean_patent)
+            inpi_data = results[1]
             
-            if inpi_data.get("found"):
+            if isinstance(inpi_data, BaseException):
+                logger.warning(f"  ⚠️  INPI error: {str(inpi_data)}")
+            elif inpi_data.get("found"):
                 sources["inpi"] = {
                     "status": inpi_data.get("status", ""),
                     "process_number": inpi_data.get("process_number", ""),
@@ -281,6 +294,34 @@ async def get_patent_details(
         logger.error(f"  ❌ Error processing {patent_number}: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Internal error: {str(e)}")
 
+async def _fetch_google_patents(clean_patent: str) -> Tuple[Dict[str, Any], str]:
+    """
+    Google Patents data for one patent
+    
+    Returns:
+        (data, data_source) where data_source is "cache", "playwright" or "serpapi"
+    """
+    gp_data, from_cache = await patent_cache.fetch(clean_patent, lambda: _scrape_google_patents(clean_patent))
+    
+    if from_cache:
+        logger.info(f"  💾 Patent cache: Got data for {clean_patent}")
+        return gp_data, "cache"
+    
+    return gp_data, "playwright" if gp_data.get("source") == "google_patents_playwright" else "serpapi"
+
+async def _scrape_google_patents(clean_patent: str) -> Dict[str, Any]:
+    """Fresh Google Patents data: Playwright first, SerpAPI as fallback"""
+    # Strategy 1: Try Google Patents Playwright (direct, no rate limits)
+    logger.info(f"  🔍 Fetching Google Patents data (Playwright)...")
+    # Strategy 2: SerpAPI for pages it could not scrape or fields it missed
+    gp_data = await google_patents_pool.get_complete_details(clean_patent)
+    
+    if gp_data.get("source") == "google_patents_playwright":
+        logger.info(f"  ✅ Playwright: Got data for {clean_patent}")
+    else:
+        logger.warning(f"  ⚠️  Playwright failed, used SerpAPI fallback")
+    return gp_data
+
 # ============================================================================
 # ENDPOINT 3: Search (complete pipeline)
 # ============================================================================
@@ -320,6 +361,170 @@ async def search_molecule(request: SearchRequest):
         logger.error(f"  ❌ Error in search pipeline: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Internal error: {str(e)}")
 
+# ============================================================================
+# ENDPOINT 3a: Search (streaming)
+# ============================================================================
+
+@app.post("/api/v1/search/stream")
+async def search_molecule_stream(
+    request: SearchRequest,
+    format: str = Query("ndjson", pattern="^(ndjson|sse)$", description="ndjson or sse (Server-Sent Events)")
+):
+    """
+    Streaming variant of POST /api/v1/search
+    
+    Emits each patent as soon as it is enriched, followed by the
+    executive summary and the search metadata:
+    
+    - ndjson: one `{"type": ..., "data": ...}` object per line
+    - sse: `event: <type>` / `data: <json>` messages
+    
+    Event types: `patent`, `executive_summary`, `search_metadata`, and
+    `error` if the pipeline fails after streaming has started.
+    """
+    logger.info(f"📋 REQUEST: POST /api/v1/search/stream ({format})")
+    logger.info(f"  Molecule: {request.molecule_name}")
+    logger.info(f"  Max WOs: {request.max_wos}")
+    
+    from .orchestrator import search_orchestrator
+    
+    def encode(event_type: str, data: dict) -> str:
+        if format == "sse":
+            return f"event: {event_type}\ndata: {json.dumps(data)}\n\n"
+        return json.dumps({"type": event_type, "data": data}) + "\n"
+    
+    async def events():
+        patents_streamed = 0
+        
+        try:
+            async for event_type, item in search_orchestrator.stream_search(request):
+                if event_type == "patent":
+                    patents_streamed += 1
+                yield encode(event_type, item.model_dump(mode="json"))
+            
+            logger.info(f"  ✅ Stream complete: {patents_streamed} patents")
+        
+        except Exception as e:
+            # Headers are already sent, report the failure in-band
+            logger.error(f"  ❌ Error in search stream: {str(e)}")
+            yield encode("error", {"detail": f"Internal error: {str(e)}"})
+    
+    media_type = "text/event-stream" if format == "sse" else "application/x-ndjson"
+    
+    return StreamingResponse(
+        events(),
+        media_type=media_type,
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+# ============================================================================
+# ENDPOINT 3b: Search jobs (async mode)
+# ============================================================================
+
+@app.post("/api/v1/search/jobs", response_model=SearchJobResponse, status_code=202)
+async def submit_search_job(request: SearchRequest):
+    """
+    Submit a search as a background job
+    
+    Returns immediately with a job_id. Poll GET /api/v1/search/{job_id}
+    for status and partial results, DELETE it to cancel.
+    
+    Use this instead of POST /api/v1/search for large molecules, where
+    the full pipeline outlasts proxy / Railway request timeouts.
+    """
+    logger.info(f"📋 REQUEST: POST /api/v1/search/jobs")
+    logger.info(f"  Molecule: {request.molecule_name}")
+    
+    try:
+        job = search_job_manager.submit(request)
+    except JobQueueFullError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    
+    return job.to_response()
+
+@app.post("/api/v1/search/jobs/batch", response_model=List[SearchJobResponse], status_code=202)
+async def submit_search_batch(batch: SearchBatchRequest):
+    """
+    Submit a portfolio of searches as background jobs (one per molecule)
+    
+    PubChem data for the whole portfolio is resolved up front with batch
+    requests, so each job's Phase 1 is served from cache.
+    """
+    logger.info(f"📋 REQUEST: POST /api/v1/search/jobs/batch")
+    logger.info(f"  Molecules: {len(batch.searches)}")
+    
+    molecule_names = [request.molecule_name for request in batch.searches]
+    
+    try:
+        jobs = search_job_manager.submit_many(batch.searches)
+    except JobQueueFullError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    
+    # Warm the PubChem cache while the first jobs start
+    task = asyncio.create_task(pubchem_client.get_molecules_data(molecule_names))
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+    
+    return [job.to_response() for job in jobs]
+
+@app.get("/api/v1/search/{job_id}", response_model=SearchJobResponse)
+async def get_search_job(
+    job_id: str = Path(..., description="Job ID returned by POST /api/v1/search/jobs")
+):
+    """
+    Get status of a search job
+    
+    - queued / running: `partial_patents` holds the patents enriched so far
+    - completed: `result` holds the full search response
+    - failed: `error` holds the reason
+    """
+    job = search_job_manager.get(job_id)
+    
+    if not job:
+        raise HTTPException(status_code=404, detail=f"Job not found: {job_id}")
+    
+    return job.to_response()
+
+@app.delete("/api/v1/search/{job_id}", response_model=SearchJobResponse)
+async def cancel_search_job(
+    job_id: str = Path(..., description="Job ID returned by POST /api/v1/search/jobs")
+):
+    """Cancel a queued or running search job"""
+    logger.info(f"📋 REQUEST: DELETE /api/v1/search/{job_id}")
+    
+    job = search_job_manager.cancel(job_id)
+    
+    if not job:
+        raise HTTPException(status_code=404, detail=f"Job not found: {job_id}")
+    
+    return job.to_response()
+
+@app.post("/api/v1/search/{search_id}/resume", response_model=SearchJobResponse, status_code=202)
+async def resume_search(
+    search_id: str = Path(..., description="search_metadata.search_id or job_id of an earlier search")
+):
+    """
+    Resume a checkpointed search as a background job
+    
+    PubChem data, WO discovery, crawled WOs and enriched patents saved by
+    the earlier run are reused; only the missing items are fetched. Poll
+    GET /api/v1/search/{search_id} for the result.
+    """
+    logger.info(f"📋 REQUEST: POST /api/v1/search/{search_id}/resume")
+    
+    stored = await checkpoint_store.get_search(search_id)
+    if not stored:
+        raise HTTPException(status_code=404, detail=f"No checkpoint for search: {search_id}")
+    
+    try:
+        job = search_job_manager.submit(SearchRequest(**stored["request"]), job_id=search_id, resume=True)
+    except JobActiveError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except JobQueueFullError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    
+    return job.to_response()
+
 # ============================================================================
 # Health check
 # ============================================================================
@@ -327,12 +532,27 @@ async def search_molecule(request: SearchRequest):
 @app.get("/health")
 async def health_check():
     """Health check endpoint"""
+    serpapi_key_stats = serpapi_keys.get_stats()
+    
     return {
         "status": "healthy",
         "version": "4.0.0",
         "crawlers_ready": len(crawler_pool.crawlers),
         "crawler_pool_size": config.CRAWLER_POOL_SIZE,
-        "serpapi_keys_available": len(config.SERPAPI_KEYS)
+        "search_jobs_active": sum(1 for job in search_job_manager.jobs.values() if not job.finished),
+        "serpapi_keys_available": serpapi_key_stats["keys_usable"],
+        "serpapi_quota_remaining": serpapi_key_stats["quota_remaining"],
+        "serpapi_keys": serpapi_key_stats,
+        "serpapi_cache": serpapi_cache.get_stats(),
+        "patent_cache": patent_cache.get_stats(),
+        "wo_cache": wo_cache.get_stats(),
+        "negative_cache": negative_cache.get_stats(),
+        "crawler_leases": {
+            "wipo": crawler_pool.get_stats(),
+            "google_patents": google_patents_pool.get_stats()
+        },
+        "rate_limits": rate_limiter.get_stats(),
+        "coalesced_lookups": singleflight.get_stats()
     }
 
 @app.get("/")
@@ -345,6 +565,11 @@ async def root():
             "wo_details": "/api/v1/wo/{wo_number}",
             "patent_details": "/api/v1/patent/{patent_number}",
             "search": "/api/v1/search",
+            "search_stream": "/api/v1/search/stream",
+            "search_jobs": "/api/v1/search/jobs",
+            "search_jobs_batch": "/api/v1/search/jobs/batch",
+            "search_job_status": "/api/v1/search/{job_id}",
+            "search_resume": "/api/v1/search/{search_id}/resume",
             "health": "/health",
             "docs": "/docs"
         }
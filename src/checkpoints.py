@@ -0,0 +1,198 @@
+"""Checkpoint store - per-stage search progress persisted in SQLite"""
+import logging
+import asyncio
+import json
+import os
+import sqlite3
+import time
+from contextlib import contextmanager
+from typing import Dict, Any, Optional, Iterator
+
+from . import config
+
+logger = logging.getLogger(__name__)
+
+# Stage names
+STAGE_PUBCHEM = "pubchem"        # key: "data"        → PubChemData
+STAGE_DISCOVERY = "discovery"    # key: "result"      → WODiscoveryResult
+STAGE_WO = "wo"                  # key: WO number     → list of worldwide applications
+STAGE_PATENT = "patent"          # key: application   → enriched Patent
+
+# Search status values
+STATUS_RUNNING = "running"
+STATUS_COMPLETED = "completed"
+STATUS_PARTIAL = "partial"
+STATUS_FAILED = "failed"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS searches (
+    search_id TEXT PRIMARY KEY,
+    request TEXT NOT NULL,
+    status TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS checkpoints (
+    search_id TEXT NOT NULL,
+    stage TEXT NOT NULL,
+    item_key TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    PRIMARY KEY (search_id, stage, item_key)
+);
+"""
+
+class CheckpointStore:
+    """
+    Local SQLite store of search progress
+    
+    Every completed unit of work (PubChem data, discovered WOs, each
+    crawled WO, each enriched patent) is written as soon as it finishes,
+    so a restarted or crashed search can be resumed and only pays for the
+    missing items. Blocking sqlite3 calls run in a worker thread.
+    """
+    
+    def __init__(self, db_path: str, retention_hours: float = 72, enabled: bool = True):
+        self.db_path = db_path
+        self.retention_hours = retention_hours
+        self.enabled = enabled
+        self._initialized = False
+    
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        """Open a connection, commit on success and always close it"""
+        if not self._initialized:
+            os.makedirs(os.path.dirname(self.db_path) or ".", exist_ok=True)
+        
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        try:
+            if not self._initialized:
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.executescript(_SCHEMA)
+                self._initialized = True
+            
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+    
+    async def _run(self, fn, *args):
+        """Run a blocking store operation in a thread"""
+        return await asyncio.to_thread(fn, *args)
+    
+    # ========================================
+    # Searches
+    # ========================================
+    
+    async def start_search(self, search_id: str, request: Dict[str, Any]):
+        """Register a search (or mark a resumed one as running again)"""
+        if not self.enabled:
+            return
+        await self._run(self._start_search, search_id, json.dumps(request))
+    
+    def _start_search(self, search_id: str, request_json: str):
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                """
+                INSERT INTO searches (search_id, request, status, created_at, updated_at)
+                VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT(search_id) DO UPDATE SET status = excluded.status, updated_at = excluded.updated_at
+                """,
+                (search_id, request_json, STATUS_RUNNING, now, now)
+            )
+            self._prune(conn, now)
+    
+    async def set_status(self, search_id: str, status: str):
+        if not self.enabled:
+            return
+        await self._run(self._set_status, search_id, status)
+    
+    def _set_status(self, search_id: str, status: str):
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE searches SET status = ?, updated_at = ? WHERE search_id = ?",
+                (status, time.time(), search_id)
+            )
+    
+    async def get_search(self, search_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Returns:
+            {"request": {...}, "status": str} or None if unknown
+        """
+        if not self.enabled:
+            return None
+        return await self._run(self._get_search, search_id)
+    
+    def _get_search(self, search_id: str) -> Optional[Dict[str, Any]]:
+        if not os.path.exists(self.db_path):
+            return None
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT request, status FROM searches WHERE search_id = ?",
+                (search_id,)
+            ).fetchone()
+        if not row:
+            return None
+        return {"request": json.loads(row[0]), "status": row[1]}
+    
+    # ========================================
+    # Checkpoints
+    # ========================================
+    
+    async def save(self, search_id: str, stage: str, item_key: str, payload: Any):
+        """Persist one completed item (overwrites an earlier one with the same key)"""
+        if not self.enabled:
+            return
+        await self._run(self._save, search_id, stage, item_key, json.dumps(payload))
+    
+    def _save(self, search_id: str, stage: str, item_key: str, payload_json: str):
+        with self._connect() as conn:
+            conn.execute(
+                """
+                INSERT OR REPLACE INTO checkpoints (search_id, stage, item_key, payload, created_at)
+                VALUES (?, ?, ?, ?, ?)
+                """,
+                (search_id, stage, item_key, payload_json, time.time())
+            )
+    
+    async def load(self, search_id: str) -> Dict[str, Dict[str, Any]]:
+        """
+        Returns:
+            {stage: {item_key: payload}} for every item saved so far
+        """
+        if not self.enabled:
+            return {}
+        return await self._run(self._load, search_id)
+    
+    def _load(self, search_id: str) -> Dict[str, Dict[str, Any]]:
+        if not os.path.exists(self.db_path):
+            return {}
+        result: Dict[str, Dict[str, Any]] = {}
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT stage, item_key, payload FROM checkpoints WHERE search_id = ?",
+                (search_id,)
+            ).fetchall()
+        for stage, item_key, payload in rows:
+            result.setdefault(stage, {})[item_key] = json.loads(payload)
+        return result
+    
+    def _prune(self, conn: sqlite3.Connection, now: float):
+        """Drop searches not touched for retention_hours"""
+        cutoff = now - self.retention_hours * 3600
+        expired = [row[0] for row in conn.execute(
+            "SELECT search_id FROM searches WHERE updated_at < ?", (cutoff,)
+        )]
+        for search_id in expired:
+            conn.execute("DELETE FROM checkpoints WHERE search_id = ?", (search_id,))
+            conn.execute("DELETE FROM searches WHERE search_id = ?", (search_id,))
+        if expired:
+            logger.info(f"🧹 Pruned {len(expired)} old search checkpoints")
+
+# Global instance
+checkpoint_store = CheckpointStore(
+    config.CHECKPOINT_DB_PATH,
+    retention_hours=config.CHECKPOINT_RETENTION_HOURS,
+    enabled=config.CHECKPOINTS_ENABLED
+)
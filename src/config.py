@@ -1,6 +1,6 @@
 """Configuration for Pharmyrus v4.0"""
 import os
-from typing import List
+from typing import List, Dict, Tuple
 
 # SerpAPI - Rotation of 9 keys (250 queries each = 2,250 total/month)
 SERPAPI_KEYS: List[str] = [
@@ -16,28 +16,58 @@ SERPAPI_KEYS: List[str] = [
     "key9"
 ]
 
-# Current key index (rotates automatically)
-_current_serpapi_key_index = 0
+# Override with SERPAPI_KEYS="key1,key2,..." (placeholders and malformed keys are skipped)
+if os.getenv("SERPAPI_KEYS"):
+    SERPAPI_KEYS = [key.strip() for key in os.getenv("SERPAPI_KEYS", "").split(",") if key.strip()]
 
-def get_next_serpapi_key() -> str:
-    """Get next SerpAPI key in rotation"""
-    global _current_serpapi_key_index
-    key = SERPAPI_KEYS[_current_serpapi_key_index]
-    _current_serpapi_key_index = (_current_serpapi_key_index + 1) % len(SERPAPI_KEYS)
-    return key
+SERPAPI_QUOTA_PER_KEY = int(os.getenv("SERPAPI_QUOTA_PER_KEY", "250"))  # Searches per key per month
+SERPAPI_KEY_COOLDOWN_SECONDS = int(os.getenv("SERPAPI_KEY_COOLDOWN_SECONDS", "3600"))  # Key benched after a 429
+SERPAPI_KEYS_DB_PATH = os.getenv("SERPAPI_KEYS_DB_PATH", "/tmp/pharmyrus/serpapi_keys.db")  # Persisted usage counts
+
+# Patent details cache (in-memory LRU + SQLite)
+PATENT_CACHE_ENABLED = os.getenv("PATENT_CACHE_ENABLED", "true").lower() == "true"
+PATENT_CACHE_DB_PATH = os.getenv("PATENT_CACHE_DB_PATH", "/tmp/pharmyrus/patent_cache.db")
+PATENT_CACHE_MEMORY_SIZE = int(os.getenv("PATENT_CACHE_MEMORY_SIZE", "2000"))  # Records kept in memory
+PATENT_CACHE_TTL_HOURS_BIBLIOGRAPHIC = float(os.getenv("PATENT_CACHE_TTL_HOURS_BIBLIOGRAPHIC", "720"))  # Title, abstract, claims, parties, dates...
+PATENT_CACHE_TTL_HOURS_LEGAL = float(os.getenv("PATENT_CACHE_TTL_HOURS_LEGAL", "24"))  # Legal status, grant date
+
+# Negative cache (failed lookups are answered from memory for a while)
+NEGATIVE_CACHE_ENABLED = os.getenv("NEGATIVE_CACHE_ENABLED", "true").lower() == "true"
+NEGATIVE_CACHE_NOT_FOUND_TTL_SECONDS = float(os.getenv("NEGATIVE_CACHE_NOT_FOUND_TTL_SECONDS", "3600"))  # Identifier does not exist
+NEGATIVE_CACHE_TRANSIENT_TTL_SECONDS = float(os.getenv("NEGATIVE_CACHE_TRANSIENT_TTL_SECONDS", "120"))  # Timeouts, 5xx, empty pages
+NEGATIVE_CACHE_MAX_ENTRIES = int(os.getenv("NEGATIVE_CACHE_MAX_ENTRIES", "10000"))
 
 # WIPO Patentscope
 WIPO_BASE_URL = "https://patentscope.wipo.int"
 WIPO_SEARCH_URL = f"{WIPO_BASE_URL}/search/en/detail.jsf"
 
+# WO details cache (stale-while-revalidate)
+WO_CACHE_ENABLED = os.getenv("WO_CACHE_ENABLED", "true").lower() == "true"
+WO_CACHE_DB_PATH = os.getenv("WO_CACHE_DB_PATH", "/tmp/pharmyrus/wo_cache.db")
+WO_CACHE_MEMORY_SIZE = int(os.getenv("WO_CACHE_MEMORY_SIZE", "500"))  # Records kept in memory
+WO_CACHE_SOFT_TTL_HOURS = float(os.getenv("WO_CACHE_SOFT_TTL_HOURS", "24"))  # Older records are refreshed in background
+WO_CACHE_HARD_TTL_HOURS = float(os.getenv("WO_CACHE_HARD_TTL_HOURS", "720"))  # Older records are not served
+
 # Google Patents via SerpAPI
 SERPAPI_BASE_URL = "https://serpapi.com/search.json"
 
+# SerpAPI response cache (SQLite, keyed on query params minus api_key)
+SERPAPI_CACHE_ENABLED = os.getenv("SERPAPI_CACHE_ENABLED", "true").lower() == "true"
+SERPAPI_CACHE_DB_PATH = os.getenv("SERPAPI_CACHE_DB_PATH", "/tmp/pharmyrus/serpapi_cache.db")
+SERPAPI_CACHE_MAX_MB = float(os.getenv("SERPAPI_CACHE_MAX_MB", "200"))  # Least recently used entries evicted above this
+SERPAPI_CACHE_TTL_HOURS: Dict[str, float] = {
+    "google_patents": float(os.getenv("SERPAPI_CACHE_TTL_HOURS_GOOGLE_PATENTS", "24")),
+    "google": float(os.getenv("SERPAPI_CACHE_TTL_HOURS_GOOGLE", "24")),
+    "google_patents_details": float(os.getenv("SERPAPI_CACHE_TTL_HOURS_GOOGLE_PATENTS_DETAILS", "168")),
+}
+
 # INPI Brasil API
 INPI_API_URL = os.getenv("INPI_API_URL", "https://crawler3-production.up.railway.app/api/data/inpi/patents")
 
 # PubChem
 PUBCHEM_BASE_URL = "https://pubchem.ncbi.nlm.nih.gov/rest/pug"
+PUBCHEM_CACHE_SIZE = int(os.getenv("PUBCHEM_CACHE_SIZE", "1000"))  # Molecules kept in memory
+PUBCHEM_CACHE_TTL_HOURS = float(os.getenv("PUBCHEM_CACHE_TTL_HOURS", "24"))
 
 # EPO OPS API (optional)
 EPO_CONSUMER_KEY = os.getenv("EPO_CONSUMER_KEY", "")
@@ -48,13 +78,80 @@ EPO_BASE_URL = "https://ops.epo.org/3.2"
 CRAWLER_POOL_SIZE = int(os.getenv("CRAWLER_POOL_SIZE", "2"))
 CRAWLER_TIMEOUT = int(os.getenv("CRAWLER_TIMEOUT", "60000"))  # 60 seconds
 CRAWLER_MAX_RETRIES = int(os.getenv("CRAWLER_MAX_RETRIES", "3"))
+CRAWLER_PAGES_PER_BROWSER = int(os.getenv("CRAWLER_PAGES_PER_BROWSER", "3"))  # Concurrent pages per Chromium process
+CRAWLER_PAGE_MAX_USES = int(os.getenv("CRAWLER_PAGE_MAX_USES", "50"))  # Lookups served by one page before it is recycled
+WIPO_READY_TIMEOUT_MS = int(os.getenv("WIPO_READY_TIMEOUT_MS", "15000"))  # Max wait for the document content
+WIPO_TAB_TIMEOUT_MS = int(os.getenv("WIPO_TAB_TIMEOUT_MS", "5000"))  # Max wait for the National Phase tab to load
+GOOGLE_PATENTS_READY_TIMEOUT_MS = int(os.getenv("GOOGLE_PATENTS_READY_TIMEOUT_MS", "10000"))  # Max wait for content + family table
+GOOGLE_PATENTS_TAB_TIMEOUT_MS = int(os.getenv("GOOGLE_PATENTS_TAB_TIMEOUT_MS", "3000"))  # Max wait after clicking the Family tab
+CRAWLER_LEASE_MAX_WAITERS = int(os.getenv("CRAWLER_LEASE_MAX_WAITERS", "50"))  # Requests queued for a busy pool before rejecting
+CRAWLER_LEASE_WAIT_TIMEOUT = float(os.getenv("CRAWLER_LEASE_WAIT_TIMEOUT", "120"))  # Seconds to wait for a free crawler
+CRAWLER_LEASE_TIMEOUT = float(os.getenv("CRAWLER_LEASE_TIMEOUT", "300"))  # A crawler held longer is taken back
+
+# Shared HTTP connection pool (aiohttp clients)
+HTTP_POOL_LIMIT = int(os.getenv("HTTP_POOL_LIMIT", "100"))  # Open connections in total
+HTTP_POOL_LIMIT_PER_HOST = int(os.getenv("HTTP_POOL_LIMIT_PER_HOST", "10"))  # Open connections per upstream host
+HTTP_DNS_CACHE_SECONDS = int(os.getenv("HTTP_DNS_CACHE_SECONDS", "300"))
+HTTP_KEEPALIVE_SECONDS = float(os.getenv("HTTP_KEEPALIVE_SECONDS", "30"))  # Idle connections kept open
+HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "10"))  # seconds to connect (incl. TLS)
+HTTP_READ_TIMEOUT = float(os.getenv("HTTP_READ_TIMEOUT", "30"))  # seconds between reads
+
+# Concurrency
+MAX_CONCURRENT_WOS = int(os.getenv("MAX_CONCURRENT_WOS", str(CRAWLER_POOL_SIZE * CRAWLER_PAGES_PER_BROWSER)))  # WOs crawled in parallel
+MAX_CONCURRENT_ENRICHMENTS = int(os.getenv("MAX_CONCURRENT_ENRICHMENTS", "2"))  # Patents enriched in parallel (Google Patents + INPI)
+PIPELINE_QUEUE_SIZE = int(os.getenv("PIPELINE_QUEUE_SIZE", "100"))  # Max items buffered between pipeline stages (and per streamed search)
+
+# Search Jobs (async mode of /api/v1/search)
+SEARCH_JOB_WORKERS = int(os.getenv("SEARCH_JOB_WORKERS", "2"))  # Searches executed in parallel
+SEARCH_JOB_MAX_QUEUED = int(os.getenv("SEARCH_JOB_MAX_QUEUED", "50"))  # Pending jobs before submit is rejected
+SEARCH_JOB_RETENTION_SECONDS = int(os.getenv("SEARCH_JOB_RETENTION_SECONDS", "3600"))  # Keep finished jobs for polling
+
+# Checkpoints (resumable searches)
+CHECKPOINTS_ENABLED = os.getenv("CHECKPOINTS_ENABLED", "true").lower() == "true"
+CHECKPOINT_DB_PATH = os.getenv("CHECKPOINT_DB_PATH", "/tmp/pharmyrus/checkpoints.db")
+CHECKPOINT_RETENTION_HOURS = float(os.getenv("CHECKPOINT_RETENTION_HOURS", "72"))
+
+# Rate Limiting - token bucket per upstream host
+# Override with RATE_LIMIT_<SOURCE>="<requests per second>,<burst>,<max concurrent>"
+def _rate_limit(source: str, default: str) -> Tuple[float, int, int]:
+    rate, burst, concurrency = os.getenv(f"RATE_LIMIT_{source.upper()}", default).split(",")
+    return float(rate), int(burst), int(concurrency)
+
+# Crawler sources limit page navigations only: by default every page of the
+# pool may navigate at once, and the token bucket sets the pace
+_CRAWLER_PAGES = CRAWLER_POOL_SIZE * CRAWLER_PAGES_PER_BROWSER
+
+RATE_LIMITS: Dict[str, Tuple[float, int, int]] = {
+    "wipo": _rate_limit("wipo", f"0.5,2,{_CRAWLER_PAGES}"),                      # patentscope.wipo.int
+    "google_patents": _rate_limit("google_patents", f"1.0,3,{_CRAWLER_PAGES}"),  # patents.google.com (Playwright)
+    "serpapi": _rate_limit("serpapi", "2.0,5,5"),                # serpapi.com
+    "inpi": _rate_limit("inpi", "2.0,4,4"),                      # INPI crawler API
+    "pubchem": _rate_limit("pubchem", "5.0,5,5"),                # PubChem policy: max 5 req/s
+}
+
+# Crawler request blocking - resources the extractors never read are aborted
+# Override with BLOCK_RESOURCE_TYPES_<CRAWLER>="image,font" and BLOCK_DOMAINS_<CRAWLER>="a.com,b.net"
+BLOCK_RESOURCES_ENABLED = os.getenv("BLOCK_RESOURCES_ENABLED", "true").lower() == "true"
+
+_TRACKER_DOMAINS = "google-analytics.com,googletagmanager.com,doubleclick.net,googlesyndication.com,googleadservices.com,hotjar.com,facebook.net,fonts.googleapis.com,fonts.gstatic.com"
+
+def _csv_env(name: str, default: str) -> List[str]:
+    return [item.strip().lower() for item in os.getenv(name, default).split(",") if item.strip()]
 
-# Rate Limiting
-DELAY_BETWEEN_WOS = float(os.getenv("DELAY_BETWEEN_WOS", "2.0"))  # seconds
-DELAY_BETWEEN_QUERIES = float(os.getenv("DELAY_BETWEEN_QUERIES", "1.0"))  # seconds
+BLOCK_RESOURCE_TYPES: Dict[str, List[str]] = {
+    "wipo": _csv_env("BLOCK_RESOURCE_TYPES_WIPO", "image,media,font"),  # Stylesheets kept: the National Phase tab is clicked
+    "google_patents": _csv_env("BLOCK_RESOURCE_TYPES_GOOGLE_PATENTS", "image,media,font,stylesheet"),
+}
+BLOCK_DOMAINS: Dict[str, List[str]] = {
+    "wipo": _csv_env("BLOCK_DOMAINS_WIPO", _TRACKER_DOMAINS),
+    "google_patents": _csv_env("BLOCK_DOMAINS_GOOGLE_PATENTS", _TRACKER_DOMAINS + ",patentimages.storage.googleapis.com"),  # Drawings
+}
 
 # Search Settings
+SEARCH_TIME_BUDGET_DEFAULT = float(os.getenv("SEARCH_TIME_BUDGET_DEFAULT", "240"))  # seconds per search
+SERPAPI_BUDGET_DEFAULT = int(os.getenv("SERPAPI_BUDGET_DEFAULT", "50"))  # SerpAPI queries per search
 MAX_WOS_DEFAULT = int(os.getenv("MAX_WOS_DEFAULT", "10"))
+WO_DISCOVERY_MIN_CONFIDENCE = float(os.getenv("WO_DISCOVERY_MIN_CONFIDENCE", "0.95"))  # Stop discovery once max_wos corroborated WOs reach this
 MAX_PATENTS_PER_WO = int(os.getenv("MAX_PATENTS_PER_WO", "100"))
 
 # Logging
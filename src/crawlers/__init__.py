@@ -4,6 +4,7 @@ from .wipo_crawler import WIPOCrawler
 from .google_patents import google_patents_client, GooglePatentsClient
 from .google_patents_pool import google_patents_pool, GooglePatentsCrawlerPool
 from .inpi_client import inpi_client, INPIClient
+from .lease_pool import LeasePool, PoolBusyError
 
 __all__ = [
     "crawler_pool",
@@ -15,4 +16,6 @@ __all__ = [
     "GooglePatentsCrawlerPool",
     "inpi_client",
     "INPIClient",
+    "LeasePool",
+    "PoolBusyError",
 ]
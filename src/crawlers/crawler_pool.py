@@ -1,33 +1,79 @@
 """Crawler Pool v3.1 HOTFIX"""
 import logging
-from typing import List
+from typing import Any, Dict, List
 from .wipo_crawler import WIPOCrawler
+from .lease_pool import LeasePool
+from .page_pool import combine_stats
+from .route_policy import route_policies
+from .stage_timings import stage_timings
+from ..singleflight import SingleFlight
+from ..wo_cache import wo_cache
+from ..negative_cache import negative_cache, NOT_FOUND, TRANSIENT
+from .. import config, utils
 
 logger = logging.getLogger(__name__)
 
 class CrawlerPool:
     def __init__(self, size: int = 3):
         self.size = size
-        self.crawlers: List[WIPOCrawler] = []
-        self.current = 0
+        self.leases: LeasePool[WIPOCrawler] = LeasePool(
+            "wipo",
+            capacity=config.CRAWLER_PAGES_PER_BROWSER,
+            max_waiters=config.CRAWLER_LEASE_MAX_WAITERS,
+            acquire_timeout=config.CRAWLER_LEASE_WAIT_TIMEOUT,
+            lease_timeout=config.CRAWLER_LEASE_TIMEOUT
+        )
+        self.flights = SingleFlight("wipo")
+    
+    @property
+    def crawlers(self) -> List[WIPOCrawler]:
+        return self.leases.resources
     
     async def initialize(self):
         logger.info(f"🔧 Initializing {self.size} crawlers...")
         for i in range(self.size):
             crawler = WIPOCrawler(max_retries=3, timeout=60000, headless=True)
             await crawler.initialize()
-            self.crawlers.append(crawler)
+            self.leases.add(crawler)
             logger.info(f"  ✅ Crawler {i+1}/{self.size} ready")
         logger.info("✅ Crawler pool initialized")
     
     async def close(self):
-        for crawler in self.crawlers:
+        await wo_cache.close()
+        crawlers = list(self.crawlers)
+        self.leases.clear()
+        for crawler in crawlers:
             await crawler.close()
-        self.crawlers = []
     
-    def get_crawler(self) -> WIPOCrawler:
-        crawler = self.crawlers[self.current]
-        self.current = (self.current + 1) % len(self.crawlers)
-        return crawler
+    async def get_wo_details(self, wo_number: str) -> Dict[str, Any]:
+        """
+        WO details, from the WO cache when possible
+        
+        Otherwise the next crawler fetches it; concurrent requests for one WO
+        (including background refreshes) share a crawl. WOs that recently
+        failed are answered from the negative cache with an error result.
+        """
+        wo = utils.normalize_wo_number(wo_number)
+        
+        outcome = negative_cache.get("wipo", wo)
+        if outcome:
+            return WIPOCrawler.error_result(wo, f"Recent lookup failed ({outcome})", not_found=outcome == NOT_FOUND)
+        
+        return await wo_cache.fetch(wo, lambda: self.flights.do(wo, lambda: self._crawl(wo)))
+    
+    async def _crawl(self, wo: str) -> Dict[str, Any]:
+        async with self.leases.lease() as crawler:
+            result = await crawler.get_wo_details(wo)
+        if result.get("erro"):
+            negative_cache.record("wipo", wo, NOT_FOUND if result.get("not_found") else TRANSIENT)
+        return result
+    
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self.leases.get_stats(),
+            "pages": combine_stats([crawler.pages for crawler in self.crawlers if crawler.pages]),
+            "network": route_policies["wipo"].get_stats(),
+            "stage_timings": stage_timings["wipo"].get_stats()
+        }
 
-crawler_pool = CrawlerPool(size=2)
+crawler_pool = CrawlerPool(size=config.CRAWLER_POOL_SIZE)
@@ -2,7 +2,9 @@
 import logging
 import aiohttp
 from typing import Optional, Dict, Any
-from .. import config
+from ..http_client import http_client
+from ..negative_cache import negative_cache, NOT_FOUND, TRANSIENT
+from .. import config, serpapi
 
 logger = logging.getLogger(__name__)
 
@@ -14,71 +16,78 @@ class GooglePatentsClient:
         self.session: Optional[aiohttp.ClientSession] = None
     
     async def initialize(self):
-        """Initialize aiohttp session"""
-        if not self.session:
-            self.session = aiohttp.ClientSession()
-            logger.info("✅ Google Patents client initialized")
+        """Attach to the shared HTTP session"""
+        self.session = await http_client.get_session()
     
     async def close(self):
-        """Close aiohttp session"""
-        if self.session:
-            await self.session.close()
-            self.session = None
+        """Detach (the shared session is closed by the app lifespan)"""
+        self.session = None
     
-    async def get_patent_details(self, patent_id: str) -> Dict[str, Any]:
+    async def get_patent_details(
+        self,
+        patent_id: str,
+        budget: Optional[serpapi.SerpAPIBudget] = None
+    ) -> Dict[str, Any]:
         """
         Get full patent details from Google Patents
         
         Args:
             patent_id: Patent number (e.g., "BR112012008823B8", "US9376391B2")
+            budget: Per-search SerpAPI allowance to debit
         
         Returns:
-            Dictionary with patent details
+            Dictionary with patent details (empty fields if the patent is
+            unknown or failed recently, without spending a query)
         """
         await self.initialize()
         
+        if negative_cache.get("google_patents", patent_id):
+            return self._empty_result(patent_id)
+        
         try:
             # Use SerpAPI engine=google_patents_details
             params = {
                 "engine": "google_patents_details",
-                "patent_id": patent_id,
-                "api_key": config.get_next_serpapi_key()
+                "patent_id": patent_id
             }
             
             logger.info(f"🔍 Fetching Google Patents details for {patent_id}")
             
-            async with self.session.get(self.base_url, params=params, timeout=30) as response:
-                if response.status == 200:
-                    data = await response.json()
-                    
-                    # Parse response
-                    result = {
-                        "publication_number": patent_id,
-                        "title": data.get("title", ""),
-                        "abstract": data.get("abstract", ""),
-                        "claims": self._extract_claims(data),
-                        "assignee": data.get("assignee", ""),
-                        "inventors": data.get("inventors", []),
-                        "priority_date": data.get("priority_date", ""),
-                        "filing_date": data.get("filing_date", ""),
-                        "publication_date": data.get("publication_date", ""),
-                        "grant_date": data.get("grant_date", ""),
-                        "legal_status": data.get("legal_status", ""),
-                        "family_id": data.get("family_id", ""),
-                        "family_size": data.get("family_size", 0),
-                        "cpc_classifications": data.get("cpc_classifications", []),
-                        "ipc_classifications": data.get("ipc_classifications", []),
-                        "url": data.get("url", f"https://patents.google.com/patent/{patent_id}"),
-                        "pdf_url": data.get("pdf_url", ""),
-                        "source": "google_patents"
-                    }
-                    
-                    logger.info(f"  ✅ Got details for {patent_id}")
-                    return result
-                
-                else:
-                    logger.warning(f"  ⚠️  Google Patents returned {response.status} for {patent_id}")
-                    return self._empty_result(patent_id)
+            data = await serpapi.search(self.session, params, budget=budget)
+            if data is None:
+                return self._empty_result(patent_id)
+            
+            if data.get("error"):
+                error = str(data["error"])
+                logger.warning(f"  ⚠️  SerpAPI error for {patent_id}: {error}")
+                not_found = "hasn't returned any results" in error
+                negative_cache.record("google_patents", patent_id, NOT_FOUND if not_found else TRANSIENT)
+                return self._empty_result(patent_id)
+            
+            # Parse response
+            result = {
+                "publication_number": patent_id,
+                "title": data.get("title", ""),
+                "abstract": data.get("abstract", ""),
+                "claims": self._extract_claims(data),
+                "assignee": data.get("assignee", ""),
+                "inventors": data.get("inventors", []),
+                "priority_date": data.get("priority_date", ""),
+                "filing_date": data.get("filing_date", ""),
+                "publication_date": data.get("publication_date", ""),
+                "grant_date": data.get("grant_date", ""),
+                "legal_status": data.get("legal_status", ""),
+                "family_id": data.get("family_id", ""),
+                "family_size": data.get("family_size", 0),
+                "cpc_classifications": data.get("cpc_classifications", []),
+                "ipc_classifications": data.get("ipc_classifications", []),
+                "url": data.get("url", f"https://patents.google.com/patent/{patent_id}"),
+                "pdf_url": data.get("pdf_url", ""),
+                "source": "google_patents"
+            }
+            
+            logger.info(f"  ✅ Got details for {patent_id}")
+            return result
         
         except Exception as e:
             logger.error(f"  ❌ Error fetching {patent_id}: {str(e)}")
@@ -6,11 +6,108 @@ Fixed: Patent family extraction with CORRECT selectors from actual HTML structur
 
 import logging
 import asyncio
+from contextlib import AsyncExitStack
 from typing import Dict, Any, List, Optional
 from playwright.async_api import Page, async_playwright, TimeoutError as PlaywrightTimeoutError
+from .page_pool import PagePool
+from .route_policy import route_policies
+from .stage_timings import stage_timings
+from ..rate_limiter import rate_limiter
+from .. import config
 
 logger = logging.getLogger(__name__)
 
+# Ready once title/abstract and the family table are in the DOM, or once the
+# page finished loading (patents without a family table)
+READY_JS = """() => {
+    const content = document.querySelector('[itemprop="title"], [itemprop="abstract"]');
+    const family = document.querySelector('tr[itemprop="docdbFamily"], section#family');
+    return (content !== null && family !== null) || document.readyState === 'complete';
+}"""
+
+
+# Basic fields in one round trip; per-field failures are reported in "errors"
+BASIC_INFO_JS = """() => {
+    const errors = {};
+    const text = (el) => (el ? (el.innerText || '').trim() : '');
+    const first = (sel) => text(document.querySelector(sel));
+    const all = (sel, limit) => Array.from(document.querySelectorAll(sel)).slice(0, limit).map(text).filter(Boolean);
+    const field = (name, fn, fallback) => {
+        try { return fn(); } catch (e) { errors[name] = String(e); return fallback; }
+    };
+    
+    const dates = field('dates', () => {
+        const found = {filing: '', publication: '', priority: '', grant: ''};
+        for (const el of document.querySelectorAll('time[itemprop]')) {
+            const itemprop = el.getAttribute('itemprop').toLowerCase();
+            const value = el.getAttribute('datetime') || text(el);
+            if (itemprop.includes('filing')) found.filing = value;
+            else if (itemprop.includes('publication')) found.publication = value;
+            else if (itemprop.includes('priority')) found.priority = found.priority || value;
+            else if (itemprop.includes('grant')) found.grant = value;
+        }
+        // Without a grantDate the grant is an entry of the events timeline
+        if (!found.grant) {
+            for (const event of document.querySelectorAll('[itemprop="events"]')) {
+                const time = event.querySelector('time[itemprop="date"]');
+                if (time && text(event.querySelector('[itemprop="type"]')).toLowerCase() === 'granted') {
+                    found.grant = time.getAttribute('datetime') || text(time);
+                    break;
+                }
+            }
+        }
+        return found;
+    }, {filing: '', publication: '', priority: '', grant: ''});
+    
+    return {
+        title: field('title', () => first('h1, title, [itemprop="title"]'), ''),
+        abstract: field('abstract', () => first('[itemprop="abstract"], .abstract, #abstract'), ''),
+        inventors: field('inventors', () => all('[itemprop="inventor"]'), []),
+        assignee: field('assignee', () => first('[itemprop="assignee"], .assignee'), ''),
+        filing_date: dates.filing,
+        publication_date: dates.publication,
+        priority_date: dates.priority,
+        grant_date: dates.grant,
+        family_id: field('family_id', () => first('[itemprop="familyId"]'), ''),
+        claims: field('claims', () => {
+            for (const sel of ['section[itemprop="claims"] div.claims', 'section[itemprop="claims"] [itemprop="content"]', 'section[itemprop="claims"]']) {
+                const value = first(sel);
+                if (value) return value;
+            }
+            return '';
+        }, ''),
+        classifications: field('classifications', () => ({
+            cpc: all('span.cpc, [itemprop="cpc"]', 10),
+            ipc: all('span.ipc, [itemprop="ipc"]', 10)
+        }), {cpc: [], ipc: []}),
+        pdf_url: field('pdf_url', () => {
+            const link = document.querySelector('a[href*=".pdf"]');
+            return link ? link.getAttribute('href') || '' : '';
+        }, ''),
+        legal_status: field('legal_status', () => first('[itemprop="status"], .legal-status'), ''),
+        errors: errors
+    };
+}"""
+
+# Raw family table rows (publication_number is null when the span is missing)
+FAMILY_ROWS_JS = """() => Array.from(document.querySelectorAll('tr[itemprop="docdbFamily"]')).map((row) => {
+    const text = (sel) => {
+        const el = row.querySelector(sel);
+        return el ? (el.innerText || '').trim() : null;
+    };
+    const link = row.querySelector('a[href*="/patent/"]');
+    return {
+        publication_number: text('span[itemprop="publicationNumber"]'),
+        publication_date: text('td[itemprop="publicationDate"]') || '',
+        primary_language: text('span[itemprop="primaryLanguage"]') || '',
+        href: link ? link.getAttribute('href') || '' : ''
+    };
+})"""
+
+
+class PatentNotFoundError(Exception):
+    """Google Patents has no page for the publication number"""
+
 
 class GooglePatentsPlaywrightCrawler:
     """Playwright-based crawler for Google Patents with stealth capabilities"""
@@ -22,6 +119,7 @@ class GooglePatentsPlaywrightCrawler:
         self.playwright = None
         self.browser = None
         self.context = None
+        self.pages: Optional[PagePool] = None
         
     async def __aenter__(self):
         """Async context manager entry"""
@@ -62,6 +160,10 @@ class GooglePatentsPlaywrightCrawler:
                 });
             """)
             
+            # Skip images, fonts, drawings and analytics
+            await route_policies["google_patents"].install(self.context)
+            self.pages = PagePool(self.context, max_pages=config.CRAWLER_PAGES_PER_BROWSER, max_uses=config.CRAWLER_PAGE_MAX_USES)
+            
             logger.info("✅ Browser started successfully")
         except Exception as e:
             logger.error(f"❌ Failed to start browser: {e}")
@@ -70,6 +172,8 @@ class GooglePatentsPlaywrightCrawler:
     async def close(self):
         """Close browser and Playwright"""
         try:
+            if self.pages:
+                await self.pages.close()
             if self.context:
                 await self.context.close()
             if self.browser:
@@ -120,6 +224,10 @@ class GooglePatentsPlaywrightCrawler:
                 });
             """)
             
+            # Skip images, fonts, drawings and analytics
+            await route_policies["google_patents"].install(self.context)
+            self.pages = PagePool(self.context, max_pages=config.CRAWLER_PAGES_PER_BROWSER, max_uses=config.CRAWLER_PAGE_MAX_USES)
+            
             logger.info("✅ Browser initialized (pool mode)")
         else:
             # Standalone mode - use start()
@@ -143,11 +251,12 @@ class GooglePatentsPlaywrightCrawler:
             'success': result.get('success', False),
             'family_members': result.get('family_members', []),
             'data': result.get('data', {}),
-            'error': result.get('error')
+            'error': result.get('error'),
+            'not_found': result.get('not_found', False)
         }
     
     async def _extract_basic_info(self, page: Page) -> Dict[str, Any]:
-        """Extract basic patent information"""
+        """Extract basic patent information (one in-page script, one round trip)"""
         data = {
             'title': '',
             'abstract': '',
@@ -155,96 +264,29 @@ class GooglePatentsPlaywrightCrawler:
             'assignee': '',
             'filing_date': '',
             'publication_date': '',
+            'priority_date': '',
+            'grant_date': '',
+            'family_id': '',
+            'claims': '',
             'classifications': {'cpc': [], 'ipc': []},
             'pdf_url': '',
             'legal_status': ''
         }
         
-        # Title
-        try:
-            title_elem = await page.query_selector('h1, title, [itemprop="title"]')
-            if title_elem:
-                data['title'] = (await title_elem.inner_text()).strip()
-        except Exception as e:
-            logger.warning(f"    ⚠️  Could not extract title: {e}")
-        
-        # Abstract
         try:
-            abstract_elem = await page.query_selector('[itemprop="abstract"], .abstract, #abstract')
-            if abstract_elem:
-                data['abstract'] = (await abstract_elem.inner_text()).strip()
+            extracted = await page.evaluate(BASIC_INFO_JS)
         except Exception as e:
-            logger.warning(f"    ⚠️  Could not extract abstract: {e}")
+            logger.warning(f"    ⚠️  Could not extract basic info: {e}")
+            return data
         
-        # Inventors
-        try:
-            inventor_elems = await page.query_selector_all('[itemprop="inventor"]')
-            for elem in inventor_elems:
-                inventor = (await elem.inner_text()).strip()
-                if inventor:
-                    data['inventors'].append(inventor)
-        except Exception as e:
-            logger.warning(f"    ⚠️  Could not extract inventors: {e}")
+        for field, error in extracted.pop('errors', {}).items():
+            logger.warning(f"    ⚠️  Could not extract {field}: {error}")
         
-        # Assignee
-        try:
-            assignee_elem = await page.query_selector('[itemprop="assignee"], .assignee')
-            if assignee_elem:
-                data['assignee'] = (await assignee_elem.inner_text()).strip()
-        except Exception as e:
-            logger.warning(f"    ⚠️  Could not extract assignee: {e}")
-        
-        # Dates
-        try:
-            date_elems = await page.query_selector_all('time[itemprop]')
-            for elem in date_elems:
-                itemprop = await elem.get_attribute('itemprop')
-                date_text = await elem.get_attribute('datetime')
-                if not date_text:
-                    date_text = (await elem.inner_text()).strip()
-                
-                if 'filing' in itemprop.lower():
-                    data['filing_date'] = date_text
-                elif 'publication' in itemprop.lower():
-                    data['publication_date'] = date_text
-        except Exception as e:
-            logger.warning(f"    ⚠️  Could not extract dates: {e}")
-        
-        # Classifications
-        try:
-            # CPC
-            cpc_elems = await page.query_selector_all('span.cpc, [itemprop="cpc"]')
-            for elem in cpc_elems[:10]:
-                cpc = (await elem.inner_text()).strip()
-                if cpc:
-                    data['classifications']['cpc'].append(cpc)
-            
-            # IPC
-            ipc_elems = await page.query_selector_all('span.ipc, [itemprop="ipc"]')
-            for elem in ipc_elems[:10]:
-                ipc = (await elem.inner_text()).strip()
-                if cpc:
-                    data['classifications']['ipc'].append(ipc)
-        except Exception as e:
-            logger.warning(f"    ⚠️  Could not extract classifications: {e}")
+        data.update({field: value for field, value in extracted.items() if value})
         
         # PDF URL
-        try:
-            pdf_elem = await page.query_selector('a[href*=".pdf"]')
-            if pdf_elem:
-                data['pdf_url'] = await pdf_elem.get_attribute('href')
-                if data['pdf_url'] and not data['pdf_url'].startswith('http'):
-                    data['pdf_url'] = 'https://patents.google.com' + data['pdf_url']
-        except Exception as e:
-            logger.warning(f"    ⚠️  Could not extract PDF URL: {e}")
-        
-        # Legal Status
-        try:
-            status_elem = await page.query_selector('[itemprop="status"], .legal-status')
-            if status_elem:
-                data['legal_status'] = (await status_elem.inner_text()).strip()
-        except Exception as e:
-            logger.warning(f"    ⚠️  Could not extract legal status: {e}")
+        if data['pdf_url'] and not data['pdf_url'].startswith('http'):
+            data['pdf_url'] = 'https://patents.google.com' + data['pdf_url']
         
         return data
     
@@ -262,8 +304,8 @@ class GooglePatentsPlaywrightCrawler:
         try:
             logger.info("    🔍 Extracting patent family using CORRECT selectors...")
             
-            # CORRECT SELECTOR: tr[itemprop="docdbFamily"]
-            family_rows = await page.query_selector_all('tr[itemprop="docdbFamily"]')
+            # CORRECT SELECTOR: tr[itemprop="docdbFamily"], all rows read in one round trip
+            family_rows = await page.evaluate(FAMILY_ROWS_JS)
             
             logger.info(f"    📊 Found {len(family_rows)} family members using tr[itemprop='docdbFamily']")
             
@@ -307,76 +349,41 @@ class GooglePatentsPlaywrightCrawler:
                     logger.error(f"    ❌ Debug save failed: {debug_err}")
                 
                 return []
-    
-    def get_last_debug_html(self) -> dict:
-        """
-        Get last saved debug HTML and screenshot paths
-        
-        Returns:
-            Dictionary with paths to debug files
-        """
-        return {
-            'html_path': getattr(self, '_last_debug_html_path', None),
-            'screenshot_path': getattr(self, '_last_debug_screenshot_path', None)
-        }
             
             for idx, row in enumerate(family_rows):
-                try:
-                    # Extract publication number from span[itemprop="publicationNumber"]
-                    pub_num_elem = await row.query_selector('span[itemprop="publicationNumber"]')
-                    if not pub_num_elem:
-                        logger.debug(f"    ⏭️  Row {idx}: No publicationNumber span found")
-                        continue
-                    
-                    publication_number = (await pub_num_elem.inner_text()).strip()
-                    
-                    if not publication_number or len(publication_number) < 3:
-                        logger.debug(f"    ⏭️  Row {idx}: Invalid publication number: '{publication_number}'")
-                        continue
-                    
-                    # Extract country code (first 2 characters)
-                    country_code = publication_number[:2].upper()
-                    
-                    # Validate country code
-                    if not country_code.isalpha() or len(country_code) != 2:
-                        logger.debug(f"    ⚠️  Row {idx}: Invalid country code: '{country_code}' from '{publication_number}'")
-                        country_code = 'XX'
-                    
-                    # Extract publication date from td[itemprop="publicationDate"]
-                    pub_date_elem = await row.query_selector('td[itemprop="publicationDate"]')
-                    publication_date = ''
-                    if pub_date_elem:
-                        publication_date = (await pub_date_elem.inner_text()).strip()
-                    
-                    # Extract link
-                    link_elem = await row.query_selector('a[href*="/patent/"]')
-                    link = ''
-                    if link_elem:
-                        href = await link_elem.get_attribute('href')
-                        if href:
-                            link = f"https://patents.google.com{href}" if not href.startswith('http') else href
-                    
-                    # Extract primary language (optional)
-                    lang_elem = await row.query_selector('span[itemprop="primaryLanguage"]')
-                    primary_language = ''
-                    if lang_elem:
-                        primary_language = (await lang_elem.inner_text()).strip()
-                    
-                    member = {
-                        'publication_number': publication_number,
-                        'country_code': country_code,
-                        'publication_date': publication_date,
-                        'primary_language': primary_language,
-                        'link': link,
-                        'title': ''  # Not typically in family table
-                    }
-                    
-                    family_members.append(member)
-                    logger.debug(f"    ✅ Row {idx}: {publication_number} ({country_code}) - {publication_date}")
+                publication_number = row['publication_number']
+                if publication_number is None:
+                    logger.debug(f"    ⏭️  Row {idx}: No publicationNumber span found")
+                    continue
                 
-                except Exception as e:
-                    logger.warning(f"    ⚠️  Error parsing family row {idx}: {e}")
+                if not publication_number or len(publication_number) < 3:
+                    logger.debug(f"    ⏭️  Row {idx}: Invalid publication number: '{publication_number}'")
                     continue
+                
+                # Extract country code (first 2 characters)
+                country_code = publication_number[:2].upper()
+                
+                # Validate country code
+                if not country_code.isalpha() or len(country_code) != 2:
+                    logger.debug(f"    ⚠️  Row {idx}: Invalid country code: '{country_code}' from '{publication_number}'")
+                    country_code = 'XX'
+                
+                href = row['href']
+                link = ''
+                if href:
+                    link = f"https://patents.google.com{href}" if not href.startswith('http') else href
+                
+                member = {
+                    'publication_number': publication_number,
+                    'country_code': country_code,
+                    'publication_date': row['publication_date'],
+                    'primary_language': row['primary_language'],
+                    'link': link,
+                    'title': ''  # Not typically in family table
+                }
+                
+                family_members.append(member)
+                logger.debug(f"    ✅ Row {idx}: {publication_number} ({country_code}) - {row['publication_date']}")
             
             logger.info(f"    ✅ Successfully extracted {len(family_members)} family members")
             
@@ -396,6 +403,18 @@ class GooglePatentsPlaywrightCrawler:
         
         return family_members
     
+    def get_last_debug_html(self) -> dict:
+        """
+        Get last saved debug HTML and screenshot paths
+        
+        Returns:
+            Dictionary with paths to debug files
+        """
+        return {
+            'html_path': getattr(self, '_last_debug_html_path', None),
+            'screenshot_path': getattr(self, '_last_debug_screenshot_path', None)
+        }
+    
     async def get_patent_details(self, patent_id: str) -> Dict[str, Any]:
         """
         Get complete patent details including family members
@@ -411,7 +430,8 @@ class GooglePatentsPlaywrightCrawler:
             'success': False,
             'data': {},
             'family_members': [],
-            'error': None
+            'error': None,
+            'not_found': False
         }
         
         try:
@@ -421,40 +441,52 @@ class GooglePatentsPlaywrightCrawler:
             url = f"https://patents.google.com/patent/{patent_id}/en"
             logger.info(f"    📍 URL: {url}")
             
-            # Create new page
-            page = await self.context.new_page()
+            timer = stage_timings["google_patents"]
             
-            try:
-                # Navigate to patent page
-                logger.info(f"    🌐 Navigating to patent page...")
-                await page.goto(url, wait_until='domcontentloaded', timeout=self.timeout)
-                
-                # Wait for content to load
-                logger.info(f"    ⏳ Waiting for page content...")
-                await page.wait_for_timeout(3000)  # Initial 3 seconds
+            async with AsyncExitStack() as stack:
+                # Only the navigation counts against the patents.google.com
+                # limit; a page of this browser is taken once the slot is granted
+                async with rate_limiter.limit("google_patents"):
+                    page = await stack.enter_async_context(self.pages.page())
+                    
+                    # Navigate to patent page
+                    logger.info(f"    🌐 Navigating to patent page...")
+                    with timer.measure("navigate"):
+                        response = await page.goto(url, wait_until='domcontentloaded', timeout=self.timeout)
                 
-                # Try to wait for patent family section (may not exist on all pages)
-                try:
-                    await page.wait_for_selector('tr[itemprop="docdbFamily"], section#family', timeout=10000)
-                    logger.info("    ✅ Patent family section detected")
-                except:
-                    logger.warning("    ⚠️  Patent family section not found after 10s wait")
+                # Unknown numbers get a 404: skip the waits below
+                if response and response.status == 404:
+                    raise PatentNotFoundError("HTTP 404")
                 
-                # Additional wait for JavaScript to complete
-                await page.wait_for_timeout(2000)
+                # Wait for content + family table, bounded by the fallback timeout
+                logger.info(f"    ⏳ Waiting for page content...")
+                with timer.measure("ready"):
+                    try:
+                        await page.wait_for_function(READY_JS, timeout=config.GOOGLE_PATENTS_READY_TIMEOUT_MS)
+                    except PlaywrightTimeoutError:
+                        timer.fallback("ready")
+                        logger.warning(f"    ⚠️  Page not ready after {config.GOOGLE_PATENTS_READY_TIMEOUT_MS}ms, extracting anyway")
                 
-                # Try clicking "Family" tab if it exists (some pages have tabs)
+                # Click "Family" tab only if the family rows are not already in the page
                 try:
-                    family_tab = await page.query_selector('a:has-text("Family"), button:has-text("Family")')
+                    family_tab = None
+                    if not await page.query_selector('tr[itemprop="docdbFamily"]'):
+                        family_tab = await page.query_selector('a:has-text("Family"), button:has-text("Family")')
                     if family_tab:
                         logger.info("    🖱️  Clicking Family tab...")
-                        await family_tab.click()
-                        await page.wait_for_timeout(2000)
+                        with timer.measure("family_tab"):
+                            await family_tab.click()
+                            try:
+                                await page.wait_for_selector('tr[itemprop="docdbFamily"]', timeout=config.GOOGLE_PATENTS_TAB_TIMEOUT_MS)
+                            except PlaywrightTimeoutError:
+                                timer.fallback("family_tab")
                         logger.info("    ✅ Family tab clicked")
                 except Exception as tab_err:
                     logger.debug(f"    ℹ️  No Family tab to click (expected): {tab_err}")
                 
-                # Check if page loaded successfully
+                # Check if page loaded successfully. Only the 404 above is final:
+                # an error or interstitial page (or a patent about error
+                # correction) is an ordinary failure, so SerpAPI still runs
                 title = await page.title()
                 if 'error' in title.lower() or '404' in title:
                     raise Exception(f"Patent page not found: {title}")
@@ -463,20 +495,24 @@ class GooglePatentsPlaywrightCrawler:
                 
                 # Extract basic info
                 logger.info(f"    📄 Extracting basic patent info...")
-                basic_info = await self._extract_basic_info(page)
+                with timer.measure("extract_basic"):
+                    basic_info = await self._extract_basic_info(page)
                 
                 # Extract patent family
                 logger.info(f"    👨‍👩‍👧‍👦 Extracting patent family...")
-                family_members = await self._extract_patent_family(page)
+                with timer.measure("extract_family"):
+                    family_members = await self._extract_patent_family(page)
                 
                 result['data'] = basic_info
                 result['family_members'] = family_members
                 result['success'] = True
                 
                 logger.info(f"    ✅ SUCCESS: Extracted {len(family_members)} family members")
-                
-            finally:
-                await page.close()
+        
+        except PatentNotFoundError as e:
+            logger.warning(f"    ⚠️  Patent {patent_id} not found: {e}")
+            result['error'] = str(e)
+            result['not_found'] = True
         
         except Exception as e:
             logger.error(f"    ❌ Error fetching patent {patent_id}: {e}")
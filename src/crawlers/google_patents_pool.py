@@ -1,20 +1,41 @@
 """Google Patents Crawler Pool Manager"""
 import logging
-from typing import List, Optional
+from typing import Any, Dict, List, Optional
 from playwright.async_api import async_playwright
+from .google_patents import google_patents_client
 from .google_patents_playwright import GooglePatentsCrawler
+from .lease_pool import LeasePool, PoolBusyError
+from .page_pool import combine_stats
+from .route_policy import route_policies
+from .stage_timings import stage_timings
+from ..singleflight import SingleFlight
+from ..negative_cache import negative_cache, NOT_FOUND
+from .. import config, serpapi
 
 logger = logging.getLogger(__name__)
 
+# Scraped fields the search summary depends on (family counts, timelines)
+REQUIRED_FIELDS = ("family_id", "priority_date")
+
 class GooglePatentsCrawlerPool:
     """Manages a pool of Google Patents Playwright crawlers"""
     
     def __init__(self, size: int = 2):
         self.size = size
-        self.crawlers: List[GooglePatentsCrawler] = []
+        self.leases: LeasePool[GooglePatentsCrawler] = LeasePool(
+            "google_patents",
+            capacity=config.CRAWLER_PAGES_PER_BROWSER,
+            max_waiters=config.CRAWLER_LEASE_MAX_WAITERS,
+            acquire_timeout=config.CRAWLER_LEASE_WAIT_TIMEOUT,
+            lease_timeout=config.CRAWLER_LEASE_TIMEOUT
+        )
         self.playwright = None
-        self.current = 0
         self.initialized = False
+        self.flights = SingleFlight("google_patents_playwright")
+    
+    @property
+    def crawlers(self) -> List[GooglePatentsCrawler]:
+        return self.leases.resources
     
     async def initialize(self):
         """Initialize crawler pool with Playwright"""
@@ -30,7 +51,7 @@ class GooglePatentsCrawlerPool:
             for i in range(self.size):
                 crawler = GooglePatentsCrawler(max_retries=3, timeout=60000)
                 await crawler.initialize(self.playwright)
-                self.crawlers.append(crawler)
+                self.leases.add(crawler)
                 logger.info(f"  ✅ Google Patents crawler {i+1}/{self.size} ready")
             
             self.initialized = True
@@ -44,14 +65,15 @@ class GooglePatentsCrawlerPool:
         """Cleanup all crawlers and Playwright"""
         logger.info("🔧 Closing Google Patents crawler pool...")
         
-        for crawler in self.crawlers:
+        crawlers = list(self.crawlers)
+        self.leases.clear()
+        
+        for crawler in crawlers:
             try:
                 await crawler.close()
             except Exception as e:
                 logger.warning(f"Error closing crawler: {e}")
         
-        self.crawlers = []
-        
         if self.playwright:
             try:
                 await self.playwright.stop()
@@ -62,26 +84,132 @@ class GooglePatentsCrawlerPool:
         self.initialized = False
         logger.info("✅ Google Patents crawler pool closed")
     
-    def get_crawler(self) -> Optional[GooglePatentsCrawler]:
-        """Get next available crawler from pool (round-robin)"""
-        if not self.initialized or not self.crawlers:
-            logger.error("Cannot get crawler: pool not initialized")
-            return None
-        
-        crawler = self.crawlers[self.current]
-        self.current = (self.current + 1) % len(self.crawlers)
-        return crawler
-    
     async def fetch_patent(self, patent_id: str) -> dict:
-        """Fetch patent details using an available crawler"""
-        crawler = self.get_crawler()
-        if not crawler:
+        """
+        Fetch patent details using an available crawler
+        
+        Concurrent requests for the same patent share one page load, and
+        patents Google Patents recently reported as missing are not loaded.
+        """
+        if negative_cache.get("google_patents", patent_id) == NOT_FOUND:
+            return {
+                'error': 'Patent not found (cached)',
+                'publication_number': patent_id,
+                'not_found': True
+            }
+        
+        if not self.initialized or not self.crawlers:
+            logger.error("Cannot fetch patent: pool not initialized")
             return {
                 'error': 'Crawler pool not initialized',
                 'publication_number': patent_id
             }
         
-        return await crawler.fetch_patent_details(patent_id)
+        try:
+            result = await self.flights.do(
+                patent_id.strip().upper(),
+                lambda: self._crawl(patent_id)
+            )
+        except PoolBusyError as e:
+            logger.warning(f"⚠️  {e}")
+            return {
+                'error': str(e),
+                'publication_number': patent_id
+            }
+        
+        # Transient failures are not recorded: SerpAPI is the fallback for those
+        if result.get('not_found'):
+            negative_cache.record("google_patents", patent_id, NOT_FOUND)
+        
+        return result
+    
+    async def _crawl(self, patent_id: str) -> dict:
+        async with self.leases.lease() as crawler:
+            return await crawler.fetch_patent_details(patent_id)
+    
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self.leases.get_stats(),
+            "pages": combine_stats([crawler.pages for crawler in self.crawlers if crawler.pages]),
+            "network": route_policies["google_patents"].get_stats(),
+            "stage_timings": stage_timings["google_patents"].get_stats()
+        }
+    
+    async def get_patent_details(self, patent_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Scrape a patent page into the same shape as GooglePatentsClient
+        
+        Returns:
+            Patent details, or None if the pool is not running or the page
+            yielded no usable data (caller may fall back to SerpAPI)
+        """
+        if not self.initialized:
+            return None
+        
+        result = await self.fetch_patent(patent_id)
+        data = result.get('data') or {}
+        family = result.get('family_members') or []
+        
+        if not result.get('success') or not (data.get('title') or data.get('abstract') or family):
+            return None
+        
+        classifications = data.get('classifications') or {}
+        
+        return {
+            "publication_number": patent_id,
+            "title": data.get('title', ''),
+            "abstract": data.get('abstract', ''),
+            "claims": data.get('claims', ''),
+            "assignee": data.get('assignee', ''),
+            "inventors": data.get('inventors', []),
+            "priority_date": data.get('priority_date', ''),
+            "filing_date": data.get('filing_date', ''),
+            "publication_date": data.get('publication_date', ''),
+            "grant_date": data.get('grant_date', ''),
+            "legal_status": data.get('legal_status', ''),
+            "family_id": data.get('family_id', ''),
+            "family_size": len(family),
+            "family_countries": sorted({member['country_code'] for member in family}),
+            "cpc_classifications": classifications.get('cpc', []),
+            "ipc_classifications": classifications.get('ipc', []),
+            "url": f"https://patents.google.com/patent/{patent_id}",
+            "pdf_url": data.get('pdf_url', ''),
+            "source": "google_patents_playwright"
+        }
+    
+    async def get_complete_details(
+        self,
+        patent_id: str,
+        budget: Optional[serpapi.SerpAPIBudget] = None
+    ) -> Dict[str, Any]:
+        """
+        Patent details: Playwright first, SerpAPI for whatever it missed
+        
+        A scraped record lacking one of REQUIRED_FIELDS (a changed page
+        layout, a partial load) is completed from SerpAPI rather than
+        returned with blanks.
+        
+        Args:
+            budget: Per-search SerpAPI allowance to debit
+        """
+        scraped = await self.get_patent_details(patent_id)
+        missing = [field for field in REQUIRED_FIELDS if scraped and not scraped.get(field)]
+        
+        if scraped and not missing:
+            return scraped
+        
+        if scraped:
+            logger.warning(f"    ⚠️  Playwright record of {patent_id} lacks {', '.join(missing)}, completing from SerpAPI")
+        
+        fallback = await google_patents_client.get_patent_details(patent_id, budget=budget)
+        if not scraped:
+            return fallback
+        
+        # Keep the scraped record (and its source); SerpAPI only fills blanks
+        for field, value in fallback.items():
+            if value and not scraped.get(field):
+                scraped[field] = value
+        return scraped
 
 # Global instance
 google_patents_pool = GooglePatentsCrawlerPool(size=2)
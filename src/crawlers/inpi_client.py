@@ -2,6 +2,10 @@
 import logging
 import aiohttp
 from typing import Optional, Dict, Any, List
+from ..rate_limiter import rate_limiter
+from ..http_client import http_client
+from ..singleflight import SingleFlight
+from ..negative_cache import negative_cache, NOT_FOUND, TRANSIENT
 from .. import config
 
 logger = logging.getLogger(__name__)
@@ -12,18 +16,15 @@ class INPIClient:
     def __init__(self):
         self.base_url = config.INPI_API_URL
         self.session: Optional[aiohttp.ClientSession] = None
+        self.flights = SingleFlight("inpi")
     
     async def initialize(self):
-        """Initialize aiohttp session"""
-        if not self.session:
-            self.session = aiohttp.ClientSession()
-            logger.info("✅ INPI client initialized")
+        """Attach to the shared HTTP session"""
+        self.session = await http_client.get_session()
     
     async def close(self):
-        """Close aiohttp session"""
-        if self.session:
-            await self.session.close()
-            self.session = None
+        """Detach (the shared session is closed by the app lifespan)"""
+        self.session = None
     
     async def get_patent_details(self, br_number: str) -> Dict[str, Any]:
         """
@@ -46,13 +47,25 @@ class INPIClient:
         else:
             medicine_query = clean_number
         
+        # Numbers INPI did not know (or failed on) a moment ago
+        if negative_cache.get("inpi", medicine_query):
+            return self._empty_result(br_number)
+        
+        # Concurrent lookups of the same number share one request
+        return await self.flights.do(
+            medicine_query,
+            lambda: self._fetch_patent_details(br_number, medicine_query)
+        )
+    
+    async def _fetch_patent_details(self, br_number: str, medicine_query: str) -> Dict[str, Any]:
         try:
             # INPI API: ?medicine={number}
             params = {"medicine": medicine_query}
             
             logger.info(f"🔍 Fetching INPI details for {br_number}")
             
-            async with self.session.get(self.base_url, params=params, timeout=60) as response:
+            async with rate_limiter.limit("inpi"), \
+                    self.session.get(self.base_url, params=params, timeout=http_client.timeout(60)) as response:
                 if response.status == 200:
                     data = await response.json()
                     
@@ -63,15 +76,18 @@ class INPIClient:
                         logger.info(f"  ✅ Got INPI data for {br_number}")
                     else:
                         logger.warning(f"  ⚠️  No INPI data found for {br_number}")
+                        negative_cache.record("inpi", medicine_query, NOT_FOUND)
                     
                     return result
                 
                 else:
                     logger.warning(f"  ⚠️  INPI API returned {response.status} for {br_number}")
+                    negative_cache.record("inpi", medicine_query, NOT_FOUND if response.status == 404 else TRANSIENT)
                     return self._empty_result(br_number)
         
         except Exception as e:
             logger.error(f"  ❌ Error fetching INPI {br_number}: {str(e)}")
+            negative_cache.record("inpi", medicine_query, TRANSIENT)
             return self._empty_result(br_number)
     
     def _parse_inpi_response(self, data: Dict[str, Any], br_number: str) -> Dict[str, Any]:
@@ -0,0 +1,200 @@
+"""Lease-based pool of browser crawlers"""
+import logging
+import asyncio
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Deque, Dict, Generic, List, Optional, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+class PoolBusyError(Exception):
+    """No crawler could be leased"""
+
+class PoolExhaustedError(PoolBusyError):
+    """The wait queue is full"""
+
+class LeaseTimeoutError(PoolBusyError):
+    """No crawler became free within the acquire timeout"""
+
+class LeasePool(Generic[T]):
+    """
+    Pool of crawlers handed out as exclusive leases
+    
+    Each crawler serves up to `capacity` leases at a time; a lease goes to
+    the least busy crawler, so a slow page does not hold up work queued on
+    the same browser while another one is idle. When every crawler is
+    busy, callers wait in a bounded FIFO queue.
+    
+    Usage:
+        async with pool.lease() as crawler:
+            ...  # crawler is ours until the block exits
+    
+    A lease held longer than `lease_timeout` seconds is cancelled
+    (TimeoutError in the block) so a hung page cannot pin a browser.
+    """
+    
+    def __init__(
+        self,
+        name: str,
+        capacity: int = 1,
+        max_waiters: int = 50,
+        acquire_timeout: float = 120,
+        lease_timeout: Optional[float] = 300
+    ):
+        self.name = name
+        self.capacity = max(1, capacity)
+        self.max_waiters = max_waiters
+        self.acquire_timeout = acquire_timeout
+        self.lease_timeout = lease_timeout
+        
+        self.resources: List[T] = []
+        self._in_use: Dict[int, int] = {}
+        self._waiters: Deque[asyncio.Future] = deque()
+        
+        # Stats
+        self.started = time.monotonic()
+        self.leases = 0
+        self.leases_by_resource: Dict[int, int] = {}
+        self.busy_seconds = 0.0
+        self.total_wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+        self.rejected = 0
+        self.acquire_timeouts = 0
+        self.lease_timeouts = 0
+    
+    def add(self, resource: T):
+        self.resources.append(resource)
+        self._in_use[id(resource)] = 0
+        self.leases_by_resource[id(resource)] = 0
+    
+    def clear(self):
+        """Forget all resources and fail pending waiters"""
+        for waiter in self._waiters:
+            if not waiter.done():
+                waiter.set_exception(PoolBusyError(f"{self.name} pool closed"))
+        self._waiters.clear()
+        self.resources = []
+        self._in_use = {}
+        self.leases_by_resource = {}
+    
+    @property
+    def in_use(self) -> int:
+        return sum(self._in_use.values())
+    
+    @property
+    def slots(self) -> int:
+        return len(self.resources) * self.capacity
+    
+    def _pick(self) -> Optional[T]:
+        """Least busy resource with a free slot"""
+        free = [r for r in self.resources if self._in_use.get(id(r), 0) < self.capacity]
+        if not free:
+            return None
+        return min(free, key=lambda r: self._in_use[id(r)])
+    
+    def _take(self, resource: T):
+        self._in_use[id(resource)] += 1
+    
+    async def acquire(self) -> T:
+        """
+        Take one lease (prefer lease(), which always releases)
+        
+        Raises:
+            PoolExhaustedError: if max_waiters callers are already queued
+            LeaseTimeoutError: if nothing frees up within acquire_timeout
+        """
+        if not self.resources:
+            raise PoolBusyError(f"{self.name} pool has no crawlers")
+        
+        # Queued callers go first
+        resource = None if self._waiters else self._pick()
+        if resource is not None:
+            self._take(resource)
+            return resource
+        
+        if len(self._waiters) >= self.max_waiters:
+            self.rejected += 1
+            raise PoolExhaustedError(f"{self.name} pool: {len(self._waiters)} requests already waiting")
+        
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            return await asyncio.wait_for(asyncio.shield(waiter), self.acquire_timeout)
+        except BaseException as e:
+            if waiter.done() and not waiter.cancelled() and waiter.exception() is None:
+                # A crawler was handed over just as we gave up: pass it on
+                self.release(waiter.result())
+            else:
+                waiter.cancel()
+                if waiter in self._waiters:
+                    self._waiters.remove(waiter)
+            
+            if isinstance(e, asyncio.TimeoutError):
+                self.acquire_timeouts += 1
+                raise LeaseTimeoutError(f"{self.name} pool: no crawler free after {self.acquire_timeout:.0f}s") from None
+            raise
+    
+    def release(self, resource: T):
+        """Return a lease; the slot goes straight to the longest waiter"""
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(resource)
+                return
+        
+        self._in_use[id(resource)] = max(0, self._in_use.get(id(resource), 0) - 1)
+    
+    @asynccontextmanager
+    async def lease(self) -> AsyncIterator[T]:
+        """Hold one crawler for the duration of the block"""
+        start = time.monotonic()
+        resource = await self.acquire()
+        
+        waited = time.monotonic() - start
+        self.total_wait_seconds += waited
+        self.max_wait_seconds = max(self.max_wait_seconds, waited)
+        self.leases += 1
+        self.leases_by_resource[id(resource)] = self.leases_by_resource.get(id(resource), 0) + 1
+        
+        if waited > 1:
+            logger.info(f"    ⏳ {self.name}: waited {waited:.1f}s for a crawler")
+        
+        leased_at = time.monotonic()
+        try:
+            if self.lease_timeout:
+                timeout = asyncio.timeout(self.lease_timeout)
+                try:
+                    async with timeout:
+                        yield resource
+                except TimeoutError:
+                    # Timeouts raised inside the block are the caller's own
+                    if timeout.expired():
+                        self.lease_timeouts += 1
+                        logger.warning(f"⚠️  {self.name}: lease exceeded {self.lease_timeout:.0f}s, cancelled")
+                    raise
+            else:
+                yield resource
+        finally:
+            self.busy_seconds += time.monotonic() - leased_at
+            self.release(resource)
+    
+    def get_stats(self) -> Dict[str, Any]:
+        elapsed = time.monotonic() - self.started
+        return {
+            "crawlers": len(self.resources),
+            "capacity_per_crawler": self.capacity,
+            "in_use": self.in_use,
+            "waiting": sum(1 for waiter in self._waiters if not waiter.done()),
+            "utilization": round(self.in_use / self.slots, 3) if self.slots else 0.0,
+            "avg_utilization": round(self.busy_seconds / (elapsed * self.slots), 3) if self.slots and elapsed else 0.0,
+            "leases": self.leases,
+            "leases_per_crawler": [self.leases_by_resource.get(id(r), 0) for r in self.resources],
+            "avg_wait_seconds": round(self.total_wait_seconds / self.leases, 3) if self.leases else 0.0,
+            "max_wait_seconds": round(self.max_wait_seconds, 3),
+            "rejected": self.rejected,
+            "acquire_timeouts": self.acquire_timeouts,
+            "lease_timeouts": self.lease_timeouts
+        }
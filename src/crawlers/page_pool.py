@@ -0,0 +1,99 @@
+"""Reusable Playwright pages of one browser context"""
+import logging
+import asyncio
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, List
+from playwright.async_api import BrowserContext, Page
+
+logger = logging.getLogger(__name__)
+
+class PagePool:
+    """
+    Up to `max_pages` concurrent pages in one browser context
+    
+    Each crawler serves several lookups at once from its single Chromium
+    process instead of scaling by launching more browsers. Pages are kept
+    open and reused between lookups; one that errored or served `max_uses`
+    lookups is closed so leaks in long-lived pages stay bounded.
+    
+    Usage:
+        async with crawler.pages.page() as page:
+            await page.goto(url)
+    """
+    
+    def __init__(self, context: BrowserContext, max_pages: int = 3, max_uses: int = 50):
+        self.context = context
+        self.max_pages = max(1, max_pages)
+        self.max_uses = max(1, max_uses)
+        
+        self._semaphore = asyncio.Semaphore(self.max_pages)
+        self._idle: List[Page] = []
+        self._uses: Dict[Page, int] = {}
+        
+        # Stats
+        self.created = 0
+        self.reused = 0
+        self.recycled = 0
+        self.in_use = 0
+    
+    @asynccontextmanager
+    async def page(self) -> AsyncIterator[Page]:
+        """Hold one page for the duration of the block"""
+        async with self._semaphore:
+            page = None
+            while self._idle and page is None:
+                candidate = self._idle.pop()
+                if not candidate.is_closed():
+                    page = candidate
+                    self.reused += 1
+            
+            if page is None:
+                page = await self.context.new_page()
+                self._uses[page] = 0
+                self.created += 1
+            
+            self.in_use += 1
+            healthy = False
+            try:
+                yield page
+                healthy = True
+            finally:
+                self.in_use -= 1
+                self._uses[page] += 1
+                
+                if healthy and self._uses[page] < self.max_uses and not page.is_closed():
+                    self._idle.append(page)
+                else:
+                    self.recycled += 1
+                    await self._close_page(page)
+    
+    async def _close_page(self, page: Page):
+        self._uses.pop(page, None)
+        try:
+            await page.close()
+        except Exception as e:
+            logger.debug(f"Error closing page: {e}")
+    
+    async def close(self):
+        """Close idle pages (busy ones close with the context)"""
+        pages, self._idle = self._idle, []
+        for page in pages:
+            await self._close_page(page)
+    
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "max_pages": self.max_pages,
+            "in_use": self.in_use,
+            "idle": len(self._idle),
+            "created": self.created,
+            "reused": self.reused,
+            "recycled": self.recycled
+        }
+
+def combine_stats(pools: List[PagePool]) -> Dict[str, Any]:
+    """Page stats summed over the crawlers of a pool"""
+    totals: Dict[str, Any] = {"max_pages": 0, "in_use": 0, "idle": 0, "created": 0, "reused": 0, "recycled": 0}
+    for pool in pools:
+        for name, value in pool.get_stats().items():
+            totals[name] += value
+    return totals
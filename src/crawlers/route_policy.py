@@ -0,0 +1,99 @@
+"""Request interception for crawler pages - abort what the extractors never read"""
+import logging
+from collections import defaultdict
+from typing import Any, Dict, Iterable
+from urllib.parse import urlsplit
+from playwright.async_api import BrowserContext, Request, Response, Route
+
+from .. import config
+
+logger = logging.getLogger(__name__)
+
+class RoutePolicy:
+    """
+    Blocks resource types and third-party domains on a browser context
+    
+    Images, fonts, media, patent drawings and analytics are never read by
+    the DOM extractors, so they are aborted before leaving the browser.
+    Main documents are always allowed. Installed per context, so it covers
+    every (reused) page of a crawler.
+    
+    Aborted requests are never downloaded and their size is unknown; the
+    policy counts them by resource type and domain, and counts the bytes
+    that did load (declared Content-Length) so bandwidth per page is visible.
+    """
+    
+    def __init__(self, name: str, resource_types: Iterable[str], domains: Iterable[str], enabled: bool = True):
+        self.name = name
+        self.resource_types = set(resource_types)
+        self.domains = tuple(domains)
+        self.enabled = enabled
+        
+        # Stats
+        self.allowed = 0
+        self.blocked = 0
+        self.blocked_by_type: Dict[str, int] = defaultdict(int)
+        self.blocked_by_domain: Dict[str, int] = defaultdict(int)
+        self.bytes_loaded = 0
+    
+    def _blocked_domain(self, host: str) -> bool:
+        return any(host == domain or host.endswith("." + domain) for domain in self.domains)
+    
+    def should_block(self, request: Request) -> bool:
+        if request.resource_type == "document":
+            return False
+        if request.resource_type in self.resource_types:
+            return True
+        return self._blocked_domain(urlsplit(request.url).hostname or "")
+    
+    async def install(self, context: BrowserContext):
+        """Route every request of `context` through the policy"""
+        if not self.enabled:
+            return
+        
+        await context.route("**/*", self._handle)
+        context.on("response", self._count_response)
+    
+    async def _handle(self, route: Route):
+        request = route.request
+        
+        if self.should_block(request):
+            self.blocked += 1
+            self.blocked_by_type[request.resource_type] += 1
+            self.blocked_by_domain[urlsplit(request.url).hostname or ""] += 1
+            await route.abort("blockedbyclient")
+            return
+        
+        self.allowed += 1
+        await route.continue_()
+    
+    def _count_response(self, response: Response):
+        length = response.headers.get("content-length")
+        if length and length.isdigit():
+            self.bytes_loaded += int(length)
+    
+    def get_stats(self) -> Dict[str, Any]:
+        top_domains = sorted(self.blocked_by_domain.items(), key=lambda item: item[1], reverse=True)[:10]
+        return {
+            "enabled": self.enabled,
+            "requests_allowed": self.allowed,
+            "requests_blocked": self.blocked,
+            "blocked_by_type": dict(self.blocked_by_type),
+            "blocked_top_domains": dict(top_domains),
+            "bytes_loaded": self.bytes_loaded
+        }
+
+def route_policy(name: str) -> RoutePolicy:
+    """Policy of one crawler type, from config"""
+    return RoutePolicy(
+        name,
+        resource_types=config.BLOCK_RESOURCE_TYPES.get(name, []),
+        domains=config.BLOCK_DOMAINS.get(name, []),
+        enabled=config.BLOCK_RESOURCES_ENABLED
+    )
+
+# Global instances (shared by every crawler of a pool)
+route_policies: Dict[str, RoutePolicy] = {
+    "wipo": route_policy("wipo"),
+    "google_patents": route_policy("google_patents")
+}
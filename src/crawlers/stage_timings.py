@@ -0,0 +1,58 @@
+"""Per-stage timings of crawler page loads"""
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator
+
+class StageTimings:
+    """
+    Duration of each step of a page load (navigate, ready, tab, extract)
+    
+    Readiness waits end on a DOM condition; when the bounded fallback
+    timeout fires instead, it is counted as a fallback for that stage.
+    
+    Usage:
+        with stage_timings["wipo"].measure("ready"):
+            await page.wait_for_function(...)
+    """
+    
+    def __init__(self, name: str):
+        self.name = name
+        self.counts: Dict[str, int] = defaultdict(int)
+        self.total_seconds: Dict[str, float] = defaultdict(float)
+        self.max_seconds: Dict[str, float] = defaultdict(float)
+        self.fallbacks: Dict[str, int] = defaultdict(int)
+    
+    @contextmanager
+    def measure(self, stage: str) -> Iterator[None]:
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            self.record(stage, time.monotonic() - start)
+    
+    def record(self, stage: str, seconds: float):
+        self.counts[stage] += 1
+        self.total_seconds[stage] += seconds
+        self.max_seconds[stage] = max(self.max_seconds[stage], seconds)
+    
+    def fallback(self, stage: str):
+        """A readiness wait ran into its timeout"""
+        self.fallbacks[stage] += 1
+    
+    def get_stats(self) -> Dict[str, Dict[str, Any]]:
+        return {
+            stage: {
+                "count": count,
+                "avg_seconds": round(self.total_seconds[stage] / count, 3),
+                "max_seconds": round(self.max_seconds[stage], 3),
+                "fallbacks": self.fallbacks[stage]
+            }
+            for stage, count in self.counts.items()
+        }
+
+# Global instances
+stage_timings: Dict[str, StageTimings] = {
+    "wipo": StageTimings("wipo"),
+    "google_patents": StageTimings("google_patents")
+}
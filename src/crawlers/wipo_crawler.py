@@ -2,12 +2,115 @@
 import asyncio
 import random
 import logging
+from contextlib import AsyncExitStack
 from typing import Dict, Any, List, Optional, Tuple
-from playwright.async_api import async_playwright, Page, Browser, BrowserContext
+from playwright.async_api import async_playwright, Page, Browser, BrowserContext, TimeoutError as PlaywrightTimeoutError
+from .page_pool import PagePool
+from .route_policy import route_policies
+from .stage_timings import stage_timings
+from ..rate_limiter import rate_limiter
+from .. import config
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Title or abstract of a document page
+CONTENT_SELECTORS = 'h3.tab_title, div.title, h1.patent-title, div.abstract, div#abstract'
+
+# Ready once the content is in the DOM, or once the page finished loading without it
+READY_JS = f"""() => document.querySelector('{CONTENT_SELECTORS}') !== null || document.readyState === 'complete'"""
+
+# Patentscope's own message for an unknown docId. A loaded page without
+# content and without this message (error page, captcha, new layout) is
+# not proof that the WO does not exist.
+NO_DOCUMENT_MARKERS = ['no document found', 'document not found', 'no results found', 'does not exist']
+NO_DOCUMENT_JS = f"""() => {{
+    const body = ((document.body && document.body.innerText) || '').toLowerCase();
+    return {NO_DOCUMENT_MARKERS}.some((marker) => body.includes(marker));
+}}"""
+
+# Title, abstract, applicant and dates in one round trip. Mirrors the
+# selector fallbacks of the earlier per-element version; ":has-text" is
+# Playwright-only, so the applicant cell is found by scanning <td>s.
+BASIC_JS = """() => {
+    const selectors = [];
+    const text = (el) => (el ? (el.innerText || '').trim() : '');
+    const firstText = (label, sels) => {
+        for (const sel of sels) {
+            const value = text(document.querySelector(sel));
+            if (value) {
+                selectors.push(`${label}:${sel}`);
+                return value;
+            }
+        }
+        return null;
+    };
+    
+    const titulo = firstText('title', ['h3.tab_title', 'div.title', 'h1.patent-title']);
+    const resumo = firstText('abstract', ['div.abstract', 'div#abstract', 'p.abstract-text']);
+    
+    let titular = null;
+    const cells = Array.from(document.querySelectorAll('td'));
+    const label = cells.find((td) => {
+        const next = td.nextElementSibling;
+        return next && next.tagName === 'TD' && text(td).toLowerCase().includes('applicant') && text(next);
+    });
+    if (label) {
+        titular = text(label.nextElementSibling);
+        selectors.push('applicant:td:has-text("Applicant") + td');
+    } else {
+        titular = firstText('applicant', ['.applicantData']);
+    }
+    
+    const dateLabels = {
+        deposito: ['Filing Date', 'Application Date'],
+        publicacao: ['Publication Date', 'International Publication Date'],
+        prioridade: ['Priority Date']
+    };
+    const rows = Array.from(document.querySelectorAll('tr'));
+    const datas = {};
+    for (const [dateType, labels] of Object.entries(dateLabels)) {
+        datas[dateType] = null;
+        for (const dateLabel of labels) {
+            for (const row of rows) {
+                if (!text(row).includes(dateLabel)) continue;
+                const rowCells = row.querySelectorAll('td');
+                const value = rowCells.length >= 2 ? text(rowCells[1]) : '';
+                if (value) {
+                    datas[dateType] = value;
+                    selectors.push(`date_${dateType}`);
+                    break;
+                }
+            }
+            if (datas[dateType]) break;
+        }
+    }
+    
+    return {titulo, resumo, titular, datas, selectors};
+}"""
+
+# First data row of the National Phase table, once the tab content is patched in
+NATIONAL_PHASE_ROW = 'table.national-phase-table tr:nth-child(2), div.national-phase tr:nth-child(2)'
+
+# National phase rows as [filing date, country, application number, status]:
+# first table layout with a data row wins, header row skipped
+WORLDWIDE_JS = """() => {
+    const text = (el) => (el ? (el.innerText || '').trim() : '');
+    for (const sel of ['table.national-phase-table tr', 'div.national-phase tr', 'table tr']) {
+        const rows = Array.from(document.querySelectorAll(sel));
+        if (rows.length > 1) {
+            return rows.slice(1)
+                .map((row) => Array.from(row.querySelectorAll('td')))
+                .filter((cells) => cells.length >= 3)
+                .map((cells) => [text(cells[0]), text(cells[1]), text(cells[2]), cells.length > 3 ? text(cells[3]) : '']);
+        }
+    }
+    return [];
+}"""
+
+class WONotFoundError(Exception):
+    """Patentscope answered, but has no document for the WO"""
+
 class WIPOCrawler:
     def __init__(self, max_retries: int = 5, timeout: int = 60000, headless: bool = True):
         self.max_retries = max_retries
@@ -16,6 +119,7 @@ class WIPOCrawler:
         self.playwright = None
         self.browser: Optional[Browser] = None
         self.context: Optional[BrowserContext] = None
+        self.pages: Optional[PagePool] = None
     
     async def __aenter__(self):
         await self.initialize()
@@ -34,9 +138,13 @@ class WIPOCrawler:
             viewport={'width': 1920, 'height': 1080},
             user_agent='Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
         )
+        await route_policies["wipo"].install(self.context)
+        self.pages = PagePool(self.context, max_pages=config.CRAWLER_PAGES_PER_BROWSER, max_uses=config.CRAWLER_PAGE_MAX_USES)
         logger.info("✅ WIPO Crawler initialized")
     
     async def close(self):
+        if self.pages:
+            await self.pages.close()
         if self.context:
             await self.context.close()
         if self.browser:
@@ -48,67 +156,41 @@ class WIPOCrawler:
         wo = wo.upper().replace(' ', '').replace('-', '').replace('/', '')
         return wo if wo.startswith('WO') else 'WO' + wo
     
+    async def _wait_ready(self, page: Page) -> bool:
+        """
+        Wait until the document can be extracted (bounded by WIPO_READY_TIMEOUT_MS)
+        
+        Returns:
+            False if the fallback timeout fired first
+        """
+        try:
+            await page.wait_for_function(READY_JS, timeout=config.WIPO_READY_TIMEOUT_MS)
+            return True
+        except PlaywrightTimeoutError:
+            stage_timings["wipo"].fallback("ready")
+            logger.warning(f"  ⚠️  Page not ready after {config.WIPO_READY_TIMEOUT_MS}ms, extracting anyway")
+            return False
+    
     async def _extract_basic(self, page: Page) -> Tuple[Dict, List[str]]:
         data = {
             'titulo': None, 'resumo': None, 'titular': None,
             'datas': {'deposito': None, 'publicacao': None, 'prioridade': None},
             'inventores': [], 'cpc_ipc': [], 'pdf_link': None
         }
-        selectors = []
-        
-        # Título
-        for sel in ['h3.tab_title', 'div.title', 'h1.patent-title']:
-            try:
-                elem = await page.query_selector(sel)
-                if elem and (text := (await elem.inner_text()).strip()):
-                    data['titulo'] = text
-                    selectors.append(f"title:{sel}")
-                    break
-            except: pass
         
-        # Resumo
-        for sel in ['div.abstract', 'div#abstract', 'p.abstract-text']:
-            try:
-                elem = await page.query_selector(sel)
-                if elem and (text := (await elem.inner_text()).strip()):
-                    data['resumo'] = text[:500]
-                    selectors.append(f"abstract:{sel}")
-                    break
-            except: pass
-        
-        # Titular
-        for sel in ['td:has-text("Applicant") + td', 'td:has-text("Applicants") + td', '.applicantData']:
-            try:
-                elem = await page.query_selector(sel)
-                if elem and (text := (await elem.inner_text()).strip()):
-                    data['titular'] = text
-                    selectors.append(f"applicant:{sel}")
-                    break
-            except: pass
-        
-        # Datas
-        date_labels = {
-            'deposito': ['Filing Date', 'Application Date'],
-            'publicacao': ['Publication Date', 'International Publication Date'],
-            'prioridade': ['Priority Date']
-        }
+        # Every field in one round trip
+        try:
+            extracted = await page.evaluate(BASIC_JS)
+        except Exception as e:
+            logger.error(f"  Error extracting basic info: {e}")
+            return data, []
         
-        for date_type, labels in date_labels.items():
-            for label in labels:
-                try:
-                    rows = await page.query_selector_all('tr')
-                    for row in rows:
-                        if label in await row.inner_text():
-                            cells = await row.query_selector_all('td')
-                            if len(cells) >= 2 and (date_val := (await cells[1].inner_text()).strip()):
-                                data['datas'][date_type] = date_val[:10]
-                                selectors.append(f"date_{date_type}")
-                                break
-                    if data['datas'][date_type]:
-                        break
-                except: pass
+        data['titulo'] = extracted['titulo']
+        data['resumo'] = extracted['resumo'][:500] if extracted['resumo'] else None
+        data['titular'] = extracted['titular']
+        data['datas'].update({k: v[:10] for k, v in extracted['datas'].items() if v})
         
-        return data, selectors
+        return data, extracted['selectors']
     
     async def _extract_worldwide(self, page: Page) -> Tuple[Dict, int]:
         worldwide = {}
@@ -120,44 +202,35 @@ class WIPOCrawler:
                 elem = await page.query_selector(sel)
                 if elem:
                     await elem.click()
-                    await page.wait_for_timeout(3000)
+                    # The tab content arrives by AJAX: wait for its first data row, not a fixed delay
+                    try:
+                        await page.wait_for_selector(NATIONAL_PHASE_ROW, timeout=config.WIPO_TAB_TIMEOUT_MS)
+                    except PlaywrightTimeoutError:
+                        stage_timings["wipo"].fallback("national_phase")
                     logger.info(f"  ✅ Clicked National Phase: {sel}")
                     break
             except: pass
         
-        # Extract table
+        # Extract table (all rows in one round trip)
         try:
-            for table_sel in ['table.national-phase-table tr', 'div.national-phase tr', 'table tr']:
-                rows = await page.query_selector_all(table_sel)
-                if len(rows) > 1:
-                    for row in rows[1:]:
-                        try:
-                            cells = await row.query_selector_all('td')
-                            if len(cells) < 3:
-                                continue
-                            
-                            filing_date = (await cells[0].inner_text()).strip()
-                            country = (await cells[1].inner_text()).strip()
-                            app_num = (await cells[2].inner_text()).strip() if len(cells) > 2 else ''
-                            status = (await cells[3].inner_text()).strip() if len(cells) > 3 else ''
-                            
-                            if not country or len(country) > 3:
-                                continue
-                            
-                            year = filing_date[:4] if len(filing_date) >= 4 else 'unknown'
-                            
-                            if year not in worldwide:
-                                worldwide[year] = []
-                            
-                            worldwide[year].append({
-                                'filing_date': filing_date,
-                                'country_code': country,
-                                'application_number': app_num,
-                                'legal_status': status
-                            })
-                            total += 1
-                        except: pass
-                    break
+            for row in await page.evaluate(WORLDWIDE_JS):
+                filing_date, country, app_num, status = row
+                
+                if not country or len(country) > 3:
+                    continue
+                
+                year = filing_date[:4] if len(filing_date) >= 4 else 'unknown'
+                
+                if year not in worldwide:
+                    worldwide[year] = []
+                
+                worldwide[year].append({
+                    'filing_date': filing_date,
+                    'country_code': country,
+                    'application_number': app_num,
+                    'legal_status': status
+                })
+                total += 1
         except Exception as e:
             logger.error(f"  Error extracting worldwide: {e}")
         
@@ -176,24 +249,38 @@ class WIPOCrawler:
             try:
                 logger.info(f"🔍 Fetching {wo} (attempt {retry + 1})")
                 
-                page = await self.context.new_page()
-                await page.goto(url, timeout=self.timeout, wait_until='networkidle')
-                await page.wait_for_timeout(2000)
-                
-                basic, selectors = await self._extract_basic(page)
-                worldwide, total_apps = await self._extract_worldwide(page)
-                
-                countries = sorted(list(set(
-                    app['country_code']
-                    for apps in worldwide.values()
-                    for app in apps
-                    if app.get('country_code')
-                )))
+                timer = stage_timings["wipo"]
                 
-                await page.close()
-                
-                if not any([basic['titulo'], basic['resumo'], basic['titular'], worldwide]):
-                    raise ValueError("No data extracted")
+                async with AsyncExitStack() as stack:
+                    # Only the navigation counts against the Patentscope limit;
+                    # the page is taken once the slot is granted
+                    async with rate_limiter.limit("wipo"):
+                        page = await stack.enter_async_context(self.pages.page())
+                        with timer.measure("navigate"):
+                            response = await page.goto(url, timeout=self.timeout, wait_until='domcontentloaded')
+                    if response and response.status == 404:
+                        raise WONotFoundError("HTTP 404")
+                    
+                    with timer.measure("ready"):
+                        ready = await self._wait_ready(page)
+                    
+                    with timer.measure("extract_basic"):
+                        basic, selectors = await self._extract_basic(page)
+                    with timer.measure("national_phase"):
+                        worldwide, total_apps = await self._extract_worldwide(page)
+                    
+                    countries = sorted(list(set(
+                        app['country_code']
+                        for apps in worldwide.values()
+                        for app in apps
+                        if app.get('country_code')
+                    )))
+                    
+                    if not any([basic['titulo'], basic['resumo'], basic['titular'], worldwide]):
+                        # Only Patentscope saying so makes it final; anything else is retried
+                        if await page.evaluate(NO_DOCUMENT_JS):
+                            raise WONotFoundError("No document on Patentscope")
+                        raise ValueError("No data extracted" if ready else "No data extracted (page not ready)")
                 
                 result = {
                     'fonte': 'WIPO',
@@ -218,6 +305,10 @@ class WIPOCrawler:
                 logger.info(f"✅ {wo}: {total_apps} apps, {len(countries)} countries")
                 return result
             
+            except WONotFoundError as e:
+                logger.warning(f"⚠️  {wo} not found on Patentscope: {e}")
+                return self.error_result(wo, str(e), not_found=True)
+            
             except Exception as e:
                 logger.error(f"❌ Attempt {retry + 1} failed: {e}")
                 
@@ -225,14 +316,20 @@ class WIPOCrawler:
                     wait = (2 ** retry) + random.uniform(0, 1)
                     await asyncio.sleep(wait)
                 else:
-                    return {
-                        'fonte': 'WIPO',
-                        'publicacao': wo,
-                        'titulo': None,
-                        'titular': None,
-                        'datas': {'deposito': None, 'publicacao': None, 'prioridade': None},
-                        'worldwide_applications': {},
-                        'paises_familia': [],
-                        'erro': str(e),
-                        'debug': {'final_error': str(e)}
-                    }
+                    return self.error_result(wo, str(e))
+    
+    @staticmethod
+    def error_result(wo: str, error: str, not_found: bool = False) -> Dict[str, Any]:
+        """Result of a failed fetch ('not_found' only when the WO does not exist)"""
+        return {
+            'fonte': 'WIPO',
+            'publicacao': wo,
+            'titulo': None,
+            'titular': None,
+            'datas': {'deposito': None, 'publicacao': None, 'prioridade': None},
+            'worldwide_applications': {},
+            'paises_familia': [],
+            'erro': error,
+            'not_found': not_found,
+            'debug': {'final_error': error}
+        }
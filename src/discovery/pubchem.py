@@ -1,89 +1,259 @@
 """PubChem integration for molecule data"""
 import logging
+import asyncio
+import time
 import aiohttp
-from typing import Dict, Any, List
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional, Tuple
+from urllib.parse import quote
 from ..models import PubChemData
+from ..rate_limiter import rate_limiter
+from ..http_client import http_client
+from ..singleflight import SingleFlight
+from .. import config
 
 logger = logging.getLogger(__name__)
 
+# Fetched with one PUG REST property call (the response always includes CID)
+PROPERTIES = "MolecularFormula,CanonicalSMILES"
+
+# CIDs per batch POST (PUG REST accepts comma-separated CID lists)
+CIDS_PER_REQUEST = 100
+
 class PubChemClient:
     """Client for PubChem REST API"""
     
     def __init__(self):
         self.base_url = "https://pubchem.ncbi.nlm.nih.gov/rest/pug"
         self.session: aiohttp.ClientSession = None
+        
+        # Per-molecule cache: lowercased name -> (expires_at, PubChemData)
+        self._cache: "OrderedDict[str, Tuple[float, PubChemData]]" = OrderedDict()
+        self.cache_size = config.PUBCHEM_CACHE_SIZE
+        self.cache_ttl = config.PUBCHEM_CACHE_TTL_HOURS * 3600
+        self.flights = SingleFlight("pubchem")
     
     async def initialize(self):
-        """Initialize session"""
-        if not self.session:
-            self.session = aiohttp.ClientSession()
-            logger.info("✅ PubChem client initialized")
+        """Attach to the shared HTTP session"""
+        self.session = await http_client.get_session()
     
     async def close(self):
-        """Close session"""
-        if self.session:
-            await self.session.close()
-            self.session = None
+        """Detach (the shared session is closed by the app lifespan)"""
+        self.session = None
     
     async def get_molecule_data(self, molecule_name: str) -> PubChemData:
         """
         Get molecule data from PubChem
         
+        Synonyms and properties are two independent PUG REST calls, so they
+        run concurrently: Phase 1 costs one round trip instead of three.
+        
         Returns:
+            - cid: PubChem compound ID
             - dev_codes: Development codes (e.g., ODM-201, ARN-509)
             - cas_number: CAS registry number
             - synonyms: List of synonyms
             - molecular_formula: Chemical formula
+            - smiles: SMILES notation
         """
+        cached = self._cache_get(molecule_name)
+        if cached:
+            logger.info(f"🔍 PubChem data for {molecule_name} (cached)")
+            return cached
+        
+        # Concurrent searches for the same molecule share one lookup
+        data = await self.flights.do(
+            molecule_name.strip().lower(),
+            lambda: self._fetch_molecule_data(molecule_name)
+        )
+        return data.model_copy(update={"molecule_name": molecule_name})
+    
+    async def _fetch_molecule_data(self, molecule_name: str) -> PubChemData:
         await self.initialize()
         
         logger.info(f"🔍 Fetching PubChem data for {molecule_name}")
         
+        name = quote(molecule_name, safe="")
+        
         try:
-            # Get synonyms
-            url = f"{self.base_url}/compound/name/{molecule_name}/synonyms/JSON"
+            synonyms, properties = await asyncio.gather(
+                self._get_synonyms(name),
+                self._get_properties(name)
+            )
+        except Exception as e:
+            logger.error(f"  ❌ PubChem error: {str(e)}")
+            return self._empty_result(molecule_name)
+        
+        if not synonyms:
+            return self._empty_result(molecule_name)
+        
+        data = self._build_result(molecule_name, synonyms, properties)
+        logger.info(f"  ✅ Found {len(data.dev_codes)} dev codes, CAS: {data.cas_number or 'N/A'}")
+        
+        self._cache_put(molecule_name, data)
+        return data
+    
+    async def get_molecules_data(self, molecule_names: List[str]) -> Dict[str, PubChemData]:
+        """
+        Get molecule data for a whole portfolio
+        
+        PUG REST only takes one name per request, so names are resolved to
+        CIDs concurrently (paced by the rate limiter); synonyms and
+        properties for all CIDs are then fetched with a few batch POSTs.
+        Cached molecules are not requested again.
+        
+        Returns:
+            {molecule_name: PubChemData} for every requested name (empty
+            data for names PubChem does not know)
+        """
+        results: Dict[str, PubChemData] = {}
+        missing: List[str] = []
+        
+        for molecule_name in dict.fromkeys(molecule_names):
+            cached = self._cache_get(molecule_name)
+            if cached:
+                results[molecule_name] = cached
+            else:
+                missing.append(molecule_name)
+        
+        if missing:
+            await self.initialize()
             
-            async with self.session.get(url, timeout=30) as response:
-                if response.status != 200:
-                    logger.warning(f"  ⚠️  PubChem returned {response.status}")
-                    return self._empty_result(molecule_name)
-                
-                data = await response.json()
-                
-                # Parse response
-                info = data.get("InformationList", {}).get("Information", [])
-                if not info:
-                    return self._empty_result(molecule_name)
-                
-                synonyms = info[0].get("Synonym", [])
-                
-                # Extract dev codes
-                dev_codes = self._extract_dev_codes(synonyms)
-                
-                # Extract CAS number
-                cas_number = self._extract_cas_number(synonyms)
-                
-                # Filter synonyms (remove duplicates, too long, etc)
-                filtered_synonyms = self._filter_synonyms(synonyms)
-                
-                logger.info(f"  ✅ Found {len(dev_codes)} dev codes, CAS: {cas_number or 'N/A'}")
+            logger.info(f"🔍 Fetching PubChem data for {len(missing)} molecules ({len(results)} cached)")
+            
+            cids = await asyncio.gather(*(self._resolve_cid(quote(name, safe="")) for name in missing))
+            resolved = {name: cid for name, cid in zip(missing, cids) if cid}
+            unique_cids = list(dict.fromkeys(resolved.values()))
+            
+            synonyms_by_cid, properties_by_cid = await asyncio.gather(
+                self._post_synonyms(unique_cids),
+                self._post_properties(unique_cids)
+            )
+            
+            for molecule_name in missing:
+                cid = resolved.get(molecule_name)
+                synonyms = synonyms_by_cid.get(cid)
                 
-                # Get additional properties
-                molecular_formula = await self._get_molecular_formula(molecule_name)
-                smiles = await self._get_smiles(molecule_name)
+                if not synonyms:
+                    results[molecule_name] = self._empty_result(molecule_name)
+                    continue
                 
-                return PubChemData(
-                    molecule_name=molecule_name,
-                    dev_codes=dev_codes,
-                    cas_number=cas_number,
-                    synonyms=filtered_synonyms,
-                    molecular_formula=molecular_formula,
-                    smiles=smiles
-                )
+                data = self._build_result(molecule_name, synonyms, properties_by_cid.get(cid, {"CID": cid}))
+                self._cache_put(molecule_name, data)
+                results[molecule_name] = data
+            
+            logger.info(f"  ✅ Resolved {len(resolved)}/{len(missing)} molecules")
+        
+        return {name: results[name] for name in molecule_names}
+    
+    def _build_result(self, molecule_name: str, synonyms: List[str], properties: Dict[str, Any]) -> PubChemData:
+        """Build PubChemData from raw synonyms + property record"""
+        # Extract dev codes
+        dev_codes = self._extract_dev_codes(synonyms)
+        
+        # Extract CAS number
+        cas_number = self._extract_cas_number(synonyms)
+        
+        # Filter synonyms (remove duplicates, too long, etc)
+        filtered_synonyms = self._filter_synonyms(synonyms)
+        
+        return PubChemData(
+            molecule_name=molecule_name,
+            cid=properties.get("CID"),
+            dev_codes=dev_codes,
+            cas_number=cas_number,
+            synonyms=filtered_synonyms,
+            molecular_formula=properties.get("MolecularFormula", ""),
+            # PubChem now reports canonical SMILES as ConnectivitySMILES
+            smiles=properties.get("CanonicalSMILES") or properties.get("ConnectivitySMILES", "")
+        )
+    
+    async def _get_synonyms(self, name: str) -> List[str]:
+        """Get all synonyms (empty list if the compound is unknown)"""
+        url = f"{self.base_url}/compound/name/{name}/synonyms/JSON"
+        
+        async with rate_limiter.limit("pubchem"), self.session.get(url, timeout=http_client.timeout(30)) as response:
+            if response.status != 200:
+                logger.warning(f"  ⚠️  PubChem returned {response.status}")
+                return []
+            
+            data = await response.json()
+        
+        info = data.get("InformationList", {}).get("Information", [])
+        if not info:
+            return []
         
+        return info[0].get("Synonym", [])
+    
+    async def _get_properties(self, name: str) -> Dict[str, Any]:
+        """Get CID, molecular formula and SMILES in a single property call"""
+        try:
+            url = f"{self.base_url}/compound/name/{name}/property/{PROPERTIES}/JSON"
+            
+            async with rate_limiter.limit("pubchem"), self.session.get(url, timeout=http_client.timeout(30)) as response:
+                if response.status == 200:
+                    data = await response.json()
+                    props = data.get("PropertyTable", {}).get("Properties", [])
+                    if props:
+                        return props[0]
         except Exception as e:
-            logger.error(f"  ❌ PubChem error: {str(e)}")
-            return self._empty_result(molecule_name)
+            logger.warning(f"  ⚠️  PubChem properties error: {str(e)}")
+        
+        return {}
+    
+    async def _resolve_cid(self, name: str) -> Optional[int]:
+        """Resolve one (URL-encoded) name to its first CID"""
+        try:
+            url = f"{self.base_url}/compound/name/{name}/cids/JSON"
+            
+            async with rate_limiter.limit("pubchem"), self.session.get(url, timeout=http_client.timeout(30)) as response:
+                if response.status == 200:
+                    data = await response.json()
+                    cids = data.get("IdentifierList", {}).get("CID", [])
+                    if cids and cids[0]:
+                        return cids[0]
+        except Exception as e:
+            logger.warning(f"  ⚠️  PubChem CID lookup error: {str(e)}")
+        
+        return None
+    
+    async def _post_cids(self, operation: str, cids: List[int]) -> List[Dict[str, Any]]:
+        """POST `operation` for all CIDs in chunks; returns the JSON bodies"""
+        async def post(chunk: List[int]) -> Optional[Dict[str, Any]]:
+            url = f"{self.base_url}/compound/cid/{operation}/JSON"
+            try:
+                async with rate_limiter.limit("pubchem"), self.session.post(
+                    url, data={"cid": ",".join(str(cid) for cid in chunk)}, timeout=http_client.timeout(60)
+                ) as response:
+                    if response.status != 200:
+                        logger.warning(f"  ⚠️  PubChem batch {operation} returned {response.status}")
+                        return None
+                    return await response.json()
+            except Exception as e:
+                logger.warning(f"  ⚠️  PubChem batch {operation} error: {str(e)}")
+                return None
+        
+        chunks = [cids[i:i + CIDS_PER_REQUEST] for i in range(0, len(cids), CIDS_PER_REQUEST)]
+        bodies = await asyncio.gather(*(post(chunk) for chunk in chunks))
+        return [body for body in bodies if body]
+    
+    async def _post_synonyms(self, cids: List[int]) -> Dict[int, List[str]]:
+        """Synonyms for many CIDs"""
+        result: Dict[int, List[str]] = {}
+        for body in await self._post_cids("synonyms", cids):
+            for info in body.get("InformationList", {}).get("Information", []):
+                if info.get("CID"):
+                    result[info["CID"]] = info.get("Synonym", [])
+        return result
+    
+    async def _post_properties(self, cids: List[int]) -> Dict[int, Dict[str, Any]]:
+        """Property records for many CIDs"""
+        result: Dict[int, Dict[str, Any]] = {}
+        for body in await self._post_cids(f"property/{PROPERTIES}", cids):
+            for props in body.get("PropertyTable", {}).get("Properties", []):
+                if props.get("CID"):
+                    result[props["CID"]] = props
+        return result
     
     def _extract_dev_codes(self, synonyms: List[str]) -> List[str]:
         """Extract development codes (e.g., ODM-201, ARN-509)"""
@@ -137,42 +307,32 @@ class PubChemClient:
         
         return filtered
     
-    async def _get_molecular_formula(self, molecule_name: str) -> str:
-        """Get molecular formula"""
-        try:
-            url = f"{self.base_url}/compound/name/{molecule_name}/property/MolecularFormula/JSON"
-            
-            async with self.session.get(url, timeout=30) as response:
-                if response.status == 200:
-                    data = await response.json()
-                    props = data.get("PropertyTable", {}).get("Properties", [])
-                    if props:
-                        return props[0].get("MolecularFormula", "")
-        except:
-            pass
+    def _cache_get(self, molecule_name: str) -> Optional[PubChemData]:
+        key = molecule_name.strip().lower()
+        entry = self._cache.get(key)
+        if not entry:
+            return None
         
-        return ""
-    
-    async def _get_smiles(self, molecule_name: str) -> str:
-        """Get SMILES notation"""
-        try:
-            url = f"{self.base_url}/compound/name/{molecule_name}/property/CanonicalSMILES/JSON"
-            
-            async with self.session.get(url, timeout=30) as response:
-                if response.status == 200:
-                    data = await response.json()
-                    props = data.get("PropertyTable", {}).get("Properties", [])
-                    if props:
-                        return props[0].get("CanonicalSMILES", "")
-        except:
-            pass
+        expires_at, data = entry
+        if expires_at < time.monotonic():
+            del self._cache[key]
+            return None
         
-        return ""
+        self._cache.move_to_end(key)
+        return data.model_copy(update={"molecule_name": molecule_name})
+    
+    def _cache_put(self, molecule_name: str, data: PubChemData):
+        key = molecule_name.strip().lower()
+        self._cache[key] = (time.monotonic() + self.cache_ttl, data)
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
     
     def _empty_result(self, molecule_name: str) -> PubChemData:
         """Return empty result"""
         return PubChemData(
             molecule_name=molecule_name,
+            cid=None,
             dev_codes=[],
             cas_number=None,
             synonyms=[],
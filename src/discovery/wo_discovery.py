@@ -1,13 +1,21 @@
 """WO number discovery from multiple sources"""
 import logging
-import aiohttp
 import asyncio
-from typing import List, Set
+import aiohttp
+from typing import Dict, List, Optional, Set
 from ..models import WODiscoveryResult, PubChemData
-from .. import config, utils
+from ..http_client import http_client
+from .. import config, serpapi, utils
 
 logger = logging.getLogger(__name__)
 
+# Chance that a WO returned by a query of each source is relevant
+QUERY_WEIGHTS = {
+    "google_patents_molecule": 0.9,
+    "google_patents_dev_codes": 0.7,
+    "google_search": 0.5
+}
+
 class WODiscoveryService:
     """Service to discover WO numbers from multiple sources"""
     
@@ -15,22 +23,19 @@ class WODiscoveryService:
         self.session: aiohttp.ClientSession = None
     
     async def initialize(self):
-        """Initialize session"""
-        if not self.session:
-            self.session = aiohttp.ClientSession()
-            logger.info("✅ WO Discovery service initialized")
+        """Attach to the shared HTTP session"""
+        self.session = await http_client.get_session()
     
     async def close(self):
-        """Close session"""
-        if self.session:
-            await self.session.close()
-            self.session = None
+        """Detach (the shared session is closed by the app lifespan)"""
+        self.session = None
     
     async def discover_wo_numbers(
         self,
         molecule_name: str,
         pubchem_data: PubChemData,
-        max_results: int = 20
+        max_results: int = 20,
+        budget: Optional[serpapi.SerpAPIBudget] = None
     ) -> WODiscoveryResult:
         """
         Discover WO numbers from multiple sources
@@ -39,86 +44,120 @@ class WODiscoveryService:
         1. Google Patents search (molecule name)
         2. Google Patents search (dev codes)
         3. Google search (molecule + patent)
-        4. Deduplicate and rank
+        4. Deduplicate and rank by confidence
+        
+        All queries are issued concurrently in the order above (the SerpAPI
+        rate limiter serves them FIFO). As soon as `max_results` WOs are
+        corroborated (returned by at least two queries) and reach
+        WO_DISCOVERY_MIN_CONFIDENCE the queries not yet answered are
+        cancelled, which saves both latency and SerpAPI credits. A single
+        query never stops discovery on its own.
+        
+        Confidence of a WO is 1 - Π(1 - weight) over the queries that
+        returned it, so it grows with independent corroboration.
+        
+        Queries are debited from `budget` (if given) in priority order; the
+        ones that find it spent return nothing.
         """
         await self.initialize()
         
         logger.info(f"🔍 Discovering WO numbers for {molecule_name}")
         
-        all_wo_numbers: Set[str] = set()
-        sources_used = []
-        
-        # Source 1: Google Patents - molecule name
-        logger.info(f"  📚 Source 1: Google Patents (molecule)")
-        wos = await self._search_google_patents(molecule_name)
-        all_wo_numbers.update(wos)
-        if wos:
-            sources_used.append("google_patents_molecule")
-        
-        # Source 2: Google Patents - dev codes
-        if pubchem_data.dev_codes:
-            logger.info(f"  📚 Source 2: Google Patents ({len(pubchem_data.dev_codes)} dev codes)")
-            for dev_code in pubchem_data.dev_codes[:5]:  # Limit to first 5
-                await asyncio.sleep(config.DELAY_BETWEEN_QUERIES)
-                wos = await self._search_google_patents(dev_code)
-                all_wo_numbers.update(wos)
-            if wos:
-                sources_used.append("google_patents_dev_codes")
-        
-        # Source 3: Google search (molecule + WO)
-        logger.info(f"  📚 Source 3: Google search")
-        wos = await self._search_google(molecule_name)
-        all_wo_numbers.update(wos)
-        if wos:
-            sources_used.append("google_search")
-        
-        # Convert to sorted list
-        wo_list = sorted(list(all_wo_numbers), reverse=True)[:max_results]
-        
-        logger.info(f"  ✅ Found {len(wo_list)} unique WO numbers")
+        # (source, search coroutine) in priority order
+        queries = [("google_patents_molecule", self._search_google_patents(molecule_name, budget))]
+        for dev_code in pubchem_data.dev_codes[:5]:  # Limit to first 5
+            queries.append(("google_patents_dev_codes", self._search_google_patents(dev_code, budget)))
+        queries.append(("google_search", self._search_google(molecule_name, budget)))
+        
+        logger.info(f"  📚 {len(queries)} queries ({len(pubchem_data.dev_codes[:5])} dev codes)")
+        
+        tasks = {asyncio.create_task(coro): source for source, coro in queries}
+        pending: Set[asyncio.Task] = set(tasks)
+        
+        # WO -> probability that every query returning it was wrong
+        miss: Dict[str, float] = {}
+        # WO -> number of queries that returned it
+        hits: Dict[str, int] = {}
+        sources_used: List[str] = []
+        queries_used = 0
+        
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                
+                for task in done:
+                    source = tasks[task]
+                    queries_used += 1
+                    
+                    wos = task.result()
+                    if wos and source not in sources_used:
+                        sources_used.append(source)
+                    
+                    for wo in wos:
+                        miss[wo] = miss.get(wo, 1.0) * (1 - QUERY_WEIGHTS[source])
+                        hits[wo] = hits.get(wo, 0) + 1
+                
+                confident = sum(
+                    1 for wo, p in miss.items()
+                    if hits[wo] >= 2 and 1 - p >= config.WO_DISCOVERY_MIN_CONFIDENCE
+                )
+                if pending and confident >= max_results:
+                    logger.info(f"  ⏭️  {confident} confident WOs, skipping {len(pending)} remaining queries")
+                    break
+        
+        finally:
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+        
+        confidence_scores = {wo: round(1 - p, 3) for wo, p in miss.items()}
+        
+        # Most corroborated first, then newest
+        ranked = sorted(confidence_scores, key=lambda wo: (confidence_scores[wo], wo), reverse=True)
+        wo_list = ranked[:max_results]
+        
+        logger.info(f"  ✅ Found {len(wo_list)} unique WO numbers ({len(miss)} candidates, {queries_used} queries)")
         
         return WODiscoveryResult(
             wo_numbers=wo_list,
-            confidence_scores={wo: 1.0 for wo in wo_list},
-            sources=sources_used
+            confidence_scores={wo: confidence_scores[wo] for wo in wo_list},
+            sources=sources_used,
+            queries_used=queries_used
         )
     
-    async def _search_google_patents(self, query: str) -> Set[str]:
+    async def _search_google_patents(self, query: str, budget: Optional[serpapi.SerpAPIBudget] = None) -> Set[str]:
         """Search Google Patents via SerpAPI"""
         try:
             params = {
                 "engine": "google_patents",
                 "q": query,
-                "api_key": config.get_next_serpapi_key(),
                 "num": 20
             }
             
-            async with self.session.get(config.SERPAPI_BASE_URL, params=params, timeout=30) as response:
-                if response.status == 200:
-                    data = await response.json()
-                    
-                    wo_numbers = set()
-                    results = data.get("organic_results", [])
-                    
-                    for result in results:
-                        # Extract from title, snippet, patent_id
-                        text = (
-                            result.get("title", "") + " " +
-                            result.get("snippet", "") + " " +
-                            result.get("patent_id", "")
-                        )
-                        
-                        wos = utils.extract_wo_numbers(text)
-                        wo_numbers.update(wos)
+            data = await serpapi.search(self.session, params, budget=budget)
+            if data is not None:
+                wo_numbers = set()
+                results = data.get("organic_results", [])
+                
+                for result in results:
+                    # Extract from title, snippet, patent_id
+                    text = (
+                        result.get("title", "") + " " +
+                        result.get("snippet", "") + " " +
+                        result.get("patent_id", "")
+                    )
                     
-                    return wo_numbers
+                    wos = utils.extract_wo_numbers(text)
+                    wo_numbers.update(wos)
+                
+                return wo_numbers
         
         except Exception as e:
             logger.error(f"    ❌ Google Patents error: {str(e)}")
         
         return set()
     
-    async def _search_google(self, query: str) -> Set[str]:
+    async def _search_google(self, query: str, budget: Optional[serpapi.SerpAPIBudget] = None) -> Set[str]:
         """Search Google via SerpAPI"""
         try:
             search_query = f"{query} patent WO"
@@ -126,28 +165,25 @@ class WODiscoveryService:
             params = {
                 "engine": "google",
                 "q": search_query,
-                "api_key": config.get_next_serpapi_key(),
                 "num": 10
             }
             
-            async with self.session.get(config.SERPAPI_BASE_URL, params=params, timeout=30) as response:
-                if response.status == 200:
-                    data = await response.json()
-                    
-                    wo_numbers = set()
-                    results = data.get("organic_results", [])
-                    
-                    for result in results:
-                        text = (
-                            result.get("title", "") + " " +
-                            result.get("snippet", "") + " " +
-                            result.get("link", "")
-                        )
-                        
-                        wos = utils.extract_wo_numbers(text)
-                        wo_numbers.update(wos)
+            data = await serpapi.search(self.session, params, budget=budget)
+            if data is not None:
+                wo_numbers = set()
+                results = data.get("organic_results", [])
+                
+                for result in results:
+                    text = (
+                        result.get("title", "") + " " +
+                        result.get("snippet", "") + " " +
+                        result.get("link", "")
+                    )
                     
-                    return wo_numbers
+                    wos = utils.extract_wo_numbers(text)
+                    wo_numbers.update(wos)
+                
+                return wo_numbers
         
         except Exception as e:
             logger.error(f"    ❌ Google search error: {str(e)}")
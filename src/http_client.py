@@ -0,0 +1,95 @@
+"""Shared HTTP client - one tuned aiohttp connection pool for all API clients"""
+import logging
+import asyncio
+from typing import Optional
+
+import aiohttp
+
+from . import config
+
+logger = logging.getLogger(__name__)
+
+class HTTPClient:
+    """
+    Owner of the aiohttp session shared by PubChem, WO discovery, SerpAPI
+    and INPI clients
+    
+    One TCPConnector means connections (and their TLS sessions) are reused
+    across clients and concurrent searches: per-host limits keep one slow
+    upstream from taking every socket, keep-alive avoids a handshake per
+    request and resolved hosts are cached. Started and closed by the app
+    lifespan; get_session() also starts it lazily for scripts.
+    """
+    
+    def __init__(
+        self,
+        limit: int = 100,
+        limit_per_host: int = 10,
+        dns_cache_seconds: int = 300,
+        keepalive_seconds: float = 30,
+        connect_timeout: float = 10,
+        read_timeout: float = 30
+    ):
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.dns_cache_seconds = dns_cache_seconds
+        self.keepalive_seconds = keepalive_seconds
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        
+        self.session: Optional[aiohttp.ClientSession] = None
+        self._lock = asyncio.Lock()
+    
+    async def start(self):
+        """Create the shared session"""
+        async with self._lock:
+            if self.session and not self.session.closed:
+                return
+            
+            connector = aiohttp.TCPConnector(
+                limit=self.limit,
+                limit_per_host=self.limit_per_host,
+                ttl_dns_cache=self.dns_cache_seconds,
+                keepalive_timeout=self.keepalive_seconds
+            )
+            self.session = aiohttp.ClientSession(connector=connector, timeout=self.timeout())
+            
+            logger.info(
+                f"✅ HTTP client started ({self.limit} connections, {self.limit_per_host} per host)"
+            )
+    
+    async def close(self):
+        """Close the shared session and its connections"""
+        async with self._lock:
+            if self.session:
+                await self.session.close()
+                self.session = None
+    
+    async def get_session(self) -> aiohttp.ClientSession:
+        """The shared session (started on first use)"""
+        if not self.session or self.session.closed:
+            await self.start()
+        return self.session
+    
+    def timeout(self, read: Optional[float] = None) -> aiohttp.ClientTimeout:
+        """
+        Connect and read timeouts for one request
+        
+        Args:
+            read: Seconds allowed between reads (default read_timeout)
+        """
+        return aiohttp.ClientTimeout(
+            total=None,
+            connect=self.connect_timeout,
+            sock_read=read or self.read_timeout
+        )
+
+# Global instance
+http_client = HTTPClient(
+    limit=config.HTTP_POOL_LIMIT,
+    limit_per_host=config.HTTP_POOL_LIMIT_PER_HOST,
+    dns_cache_seconds=config.HTTP_DNS_CACHE_SECONDS,
+    keepalive_seconds=config.HTTP_KEEPALIVE_SECONDS,
+    connect_timeout=config.HTTP_CONNECT_TIMEOUT,
+    read_timeout=config.HTTP_READ_TIMEOUT
+)
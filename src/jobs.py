@@ -0,0 +1,253 @@
+"""Asynchronous search jobs - run /api/v1/search in the background"""
+import logging
+import asyncio
+import time
+import uuid
+from typing import Dict, List, Optional
+
+from .models import SearchRequest, SearchResponse, SearchJobResponse, Patent
+from .orchestrator import search_orchestrator
+from . import config, utils
+
+logger = logging.getLogger(__name__)
+
+# Job status values
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_COMPLETED = "completed"
+JOB_FAILED = "failed"
+JOB_CANCELLED = "cancelled"
+
+FINISHED_STATUSES = {JOB_COMPLETED, JOB_FAILED, JOB_CANCELLED}
+
+class JobQueueFullError(Exception):
+    """Raised when too many jobs are already waiting for a worker"""
+
+class JobActiveError(Exception):
+    """Raised when resuming a search whose job is still queued or running"""
+
+class SearchJob:
+    """
+    A single search submitted in job mode
+    
+    The job_id doubles as the search checkpoint ID, so a failed or
+    interrupted job can be resumed under the same ID.
+    """
+    
+    def __init__(self, request: SearchRequest, job_id: Optional[str] = None, resume: bool = False):
+        self.job_id = job_id or uuid.uuid4().hex
+        self.request = request
+        self.resume = resume
+        self.status = JOB_QUEUED
+        
+        self.created_at = utils.get_timestamp()
+        self.started_at: Optional[str] = None
+        self.finished_at: Optional[str] = None
+        self.finished_monotonic: Optional[float] = None
+        
+        self.patents: List[Patent] = []
+        self.result: Optional[SearchResponse] = None
+        self.error: Optional[str] = None
+        
+        self.task: Optional[asyncio.Task] = None
+    
+    @property
+    def finished(self) -> bool:
+        return self.status in FINISHED_STATUSES
+    
+    def mark_finished(self, status: str, error: Optional[str] = None):
+        """Move the job to a terminal status"""
+        self.status = status
+        self.error = error
+        self.finished_at = utils.get_timestamp()
+        self.finished_monotonic = time.monotonic()
+    
+    def to_response(self) -> SearchJobResponse:
+        """Convert to API response (partial patents only while in progress)"""
+        return SearchJobResponse(
+            job_id=self.job_id,
+            status=self.status,
+            molecule_name=self.request.molecule_name,
+            created_at=self.created_at,
+            started_at=self.started_at,
+            finished_at=self.finished_at,
+            patents_found=len(self.result.patents) if self.result else len(self.patents),
+            partial_patents=[] if self.result else list(self.patents),
+            result=self.result,
+            error=self.error
+        )
+
+class SearchJobManager:
+    """
+    Queue of search jobs executed by a fixed number of workers
+    
+    Throughput is bounded by `workers` (each runs one execute_search at a
+    time), not by how long clients keep their HTTP connection open.
+    """
+    
+    def __init__(
+        self,
+        workers: int = 2,
+        max_queued: int = 50,
+        retention_seconds: int = 3600
+    ):
+        self.workers = workers
+        self.max_queued = max_queued
+        self.retention_seconds = retention_seconds
+        
+        self.jobs: Dict[str, SearchJob] = {}
+        self.queue: Optional[asyncio.Queue] = None
+        self.worker_tasks: List[asyncio.Task] = []
+    
+    async def start(self):
+        """Start job workers"""
+        if self.worker_tasks:
+            return
+        
+        self.queue = asyncio.Queue(maxsize=self.max_queued)
+        self.worker_tasks = [
+            asyncio.create_task(self._worker(i + 1))
+            for i in range(max(1, self.workers))
+        ]
+        logger.info(f"✅ Search job manager started ({len(self.worker_tasks)} workers)")
+    
+    async def stop(self):
+        """Cancel running jobs and stop workers"""
+        for job in self.jobs.values():
+            if job.task and not job.task.done():
+                job.task.cancel()
+        
+        for task in self.worker_tasks:
+            task.cancel()
+        await asyncio.gather(*self.worker_tasks, return_exceptions=True)
+        
+        self.worker_tasks = []
+        self.queue = None
+    
+    def submit(
+        self,
+        request: SearchRequest,
+        job_id: Optional[str] = None,
+        resume: bool = False
+    ) -> SearchJob:
+        """
+        Queue a new search job (or the resumption of a checkpointed one)
+        
+        Raises:
+            JobQueueFullError: if max_queued jobs are already pending
+            JobActiveError: if job_id is already queued or running
+        """
+        if self.queue is None:
+            raise RuntimeError("Search job manager not started")
+        
+        self._prune()
+        
+        existing = self.jobs.get(job_id) if job_id else None
+        if existing and not existing.finished:
+            raise JobActiveError(f"Search {job_id} is already {existing.status}")
+        
+        job = SearchJob(request, job_id=job_id, resume=resume)
+        
+        try:
+            self.queue.put_nowait(job)
+        except asyncio.QueueFull:
+            raise JobQueueFullError(f"Too many queued searches ({self.max_queued})")
+        
+        self.jobs[job.job_id] = job
+        logger.info(f"📥 Job {job.job_id} queued{' (resume)' if resume else ''}: {request.molecule_name}")
+        return job
+    
+    def submit_many(self, requests: List[SearchRequest]) -> List[SearchJob]:
+        """
+        Queue a batch of search jobs, all or nothing
+        
+        Raises:
+            JobQueueFullError: if the queue cannot take the whole batch
+        """
+        if self.queue is None:
+            raise RuntimeError("Search job manager not started")
+        
+        free = self.max_queued - self.queue.qsize()
+        if len(requests) > free:
+            raise JobQueueFullError(f"Batch of {len(requests)} searches exceeds free queue slots ({free})")
+        
+        return [self.submit(request) for request in requests]
+    
+    def get(self, job_id: str) -> Optional[SearchJob]:
+        """Get job by ID"""
+        self._prune()
+        return self.jobs.get(job_id)
+    
+    def cancel(self, job_id: str) -> Optional[SearchJob]:
+        """Cancel a queued or running job (no-op if already finished)"""
+        job = self.jobs.get(job_id)
+        if not job or job.finished:
+            return job
+        
+        if job.task and not job.task.done():
+            # Running: the worker records the cancelled status
+            job.task.cancel()
+        else:
+            # Still queued: the worker skips it when dequeued
+            job.mark_finished(JOB_CANCELLED)
+        
+        logger.info(f"🛑 Job {job_id} cancelled")
+        return job
+    
+    async def _worker(self, worker_id: int):
+        """Run queued jobs one at a time"""
+        while True:
+            job: SearchJob = await self.queue.get()
+            
+            try:
+                if job.finished:
+                    continue
+                
+                job.status = JOB_RUNNING
+                job.started_at = utils.get_timestamp()
+                logger.info(f"▶️  Worker {worker_id} running job {job.job_id}")
+                
+                if job.resume:
+                    search = search_orchestrator.resume_search(job.job_id, on_patent=job.patents.append)
+                else:
+                    search = search_orchestrator.execute_search(
+                        job.request,
+                        on_patent=job.patents.append,
+                        search_id=job.job_id
+                    )
+                job.task = asyncio.create_task(search)
+                
+                # asyncio.wait() so that cancelling the job does not cancel the worker
+                await asyncio.wait({job.task})
+                
+                if job.task.cancelled():
+                    job.mark_finished(JOB_CANCELLED)
+                elif job.task.exception():
+                    job.mark_finished(JOB_FAILED, error=str(job.task.exception()))
+                    logger.error(f"❌ Job {job.job_id} failed: {job.error}")
+                else:
+                    job.result = job.task.result()
+                    job.patents = []
+                    job.mark_finished(JOB_COMPLETED)
+                    logger.info(f"✅ Job {job.job_id} completed")
+            
+            finally:
+                job.task = None
+                self.queue.task_done()
+    
+    def _prune(self):
+        """Forget finished jobs older than retention_seconds"""
+        now = time.monotonic()
+        expired = [
+            job_id for job_id, job in self.jobs.items()
+            if job.finished_monotonic and now - job.finished_monotonic > self.retention_seconds
+        ]
+        for job_id in expired:
+            del self.jobs[job_id]
+
+# Global instance
+search_job_manager = SearchJobManager(
+    workers=config.SEARCH_JOB_WORKERS,
+    max_queued=config.SEARCH_JOB_MAX_QUEUED,
+    retention_seconds=config.SEARCH_JOB_RETENTION_SECONDS
+)
@@ -2,6 +2,7 @@
 from pydantic import BaseModel, Field
 from typing import List, Optional, Dict, Any
 from datetime import datetime
+from . import config
 
 # ============================================================================
 # ENDPOINT 1: WO Details Models
@@ -99,6 +100,18 @@ class SearchRequest(BaseModel):
     max_wos: int = Field(default=10, ge=1, le=50, description="Maximum WO numbers to process")
     include_inpi: bool = Field(default=True, description="Include INPI enrichment for BR patents")
     include_epo: bool = Field(default=False, description="Include EPO family data")
+    time_budget_seconds: float = Field(
+        default=config.SEARCH_TIME_BUDGET_DEFAULT,
+        ge=10,
+        le=3600,
+        description="Wall-clock budget; outstanding work is cancelled and partial results returned when it runs out"
+    )
+    serpapi_budget: int = Field(
+        default=config.SERPAPI_BUDGET_DEFAULT,
+        ge=0,
+        le=1000,
+        description="Max SerpAPI queries this search may spend (cache hits are free)"
+    )
 
 class ExecutiveSummary(BaseModel):
     """Executive summary for search results"""
@@ -162,13 +175,42 @@ class Patent(BaseModel):
 
 class SearchMetadata(BaseModel):
     """Metadata about the search execution"""
+    search_id: Optional[str] = Field(default=None, description="ID to resume this search from its checkpoint")
     query_timestamp: str = Field(default_factory=lambda: datetime.utcnow().isoformat())
     sources_used: List[str] = Field(default_factory=list)
     wo_numbers_found: int = 0
     wo_numbers_processed: int = 0
     serpapi_queries_used: int = 0
+    serpapi_budget: int = 0
+    serpapi_cache_hits: int = 0
+    patents_without_details: int = Field(
+        default=0,
+        description="Patents returned with WIPO data only (Playwright failed and SerpAPI budget spent)"
+    )
+    duplicate_applications_merged: int = Field(
+        default=0,
+        description="Worldwide applications shared by several WOs of the same family, merged before enrichment"
+    )
+    fetches_saved_by_dedup: int = Field(
+        default=0,
+        description="Google Patents / INPI lookups avoided thanks to deduplication"
+    )
     errors_count: int = 0
     warnings: List[str] = Field(default_factory=list)
+    
+    # Deadline
+    time_budget_seconds: float = 0.0
+    partial: bool = Field(default=False, description="True if the time budget ran out before all work finished")
+    applications_found: int = 0
+    applications_not_enriched: int = Field(
+        default=0,
+        description="Unique applications without details: skipped or cancelled because of the time budget, or failed"
+    )
+    applications_failed: int = Field(default=0, description="Unique applications whose enrichment failed")
+    
+    # Checkpoint / resume
+    resumed: bool = False
+    items_restored: int = Field(default=0, description="WOs and patents restored from checkpoint instead of fetched")
 
 class SearchResponse(BaseModel):
     """Response for POST /api/v1/search (target-buscas.json format)"""
@@ -176,6 +218,35 @@ class SearchResponse(BaseModel):
     patents: List[Patent] = Field(default_factory=list)
     search_metadata: SearchMetadata
 
+# ============================================================================
+# ENDPOINT 3b: Search Jobs Models
+# ============================================================================
+
+class SearchJobResponse(BaseModel):
+    """Response for POST /api/v1/search/jobs and GET/DELETE /api/v1/search/{job_id}"""
+    job_id: str
+    status: str = Field(..., description="queued | running | completed | failed | cancelled")
+    molecule_name: str
+    
+    created_at: str
+    started_at: Optional[str] = None
+    finished_at: Optional[str] = None
+    
+    patents_found: int = 0
+    partial_patents: List[Patent] = Field(
+        default_factory=list,
+        description="Patents enriched so far (while the job is queued or running)"
+    )
+    result: Optional[SearchResponse] = Field(
+        default=None,
+        description="Full search response once the job is completed"
+    )
+    error: Optional[str] = None
+
+class SearchBatchRequest(BaseModel):
+    """Request for POST /api/v1/search/jobs/batch (molecule portfolio)"""
+    searches: List[SearchRequest] = Field(..., min_length=1, description="One search per molecule")
+
 # ============================================================================
 # Helper Models
 # ============================================================================
@@ -183,6 +254,7 @@ class SearchResponse(BaseModel):
 class PubChemData(BaseModel):
     """PubChem molecule data"""
     molecule_name: str
+    cid: Optional[int] = None
     dev_codes: List[str] = Field(default_factory=list)
     cas_number: Optional[str] = None
     synonyms: List[str] = Field(default_factory=list)
@@ -194,3 +266,4 @@ class WODiscoveryResult(BaseModel):
     wo_numbers: List[str] = Field(default_factory=list)
     confidence_scores: Dict[str, float] = Field(default_factory=dict)
     sources: List[str] = Field(default_factory=list)
+    queries_used: int = 0
@@ -0,0 +1,101 @@
+"""Negative cache - remember failed lookups for a short while"""
+import logging
+import time
+from collections import OrderedDict, defaultdict
+from typing import Any, Dict, Optional, Tuple
+
+from . import config
+
+logger = logging.getLogger(__name__)
+
+# Outcomes
+NOT_FOUND = "not_found"    # Upstream answered: the identifier does not exist
+TRANSIENT = "transient"    # Timeout, 5xx, blocked page... may work later
+
+class NegativeCache:
+    """
+    Short-lived memory of identifiers whose lookup failed
+    
+    Failed lookups are the most expensive ones (retries with backoff,
+    selector waits that never succeed, long upstream timeouts), so a
+    repeated request for a bad identifier is answered from here instead.
+    A definitive "not found" is remembered longer than a transient failure,
+    which only shields the upstream for a couple of minutes.
+    
+    Usage:
+        if negative_cache.get("wipo", wo) == NOT_FOUND:
+            ...  # answer immediately
+        negative_cache.record("wipo", wo, TRANSIENT)
+    """
+    
+    def __init__(
+        self,
+        not_found_ttl_seconds: float = 3600,
+        transient_ttl_seconds: float = 120,
+        max_entries: int = 10000,
+        enabled: bool = True
+    ):
+        self.ttls = {NOT_FOUND: not_found_ttl_seconds, TRANSIENT: transient_ttl_seconds}
+        self.max_entries = max_entries
+        self.enabled = enabled
+        
+        # (source, key) -> (outcome, expires_at)
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[str, float]]" = OrderedDict()
+        
+        # Stats: source -> outcome -> lookups answered
+        self.hits: Dict[str, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+    
+    @staticmethod
+    def _key(source: str, key: str) -> Tuple[str, str]:
+        return source, key.replace(" ", "").upper()
+    
+    def get(self, source: str, key: str) -> Optional[str]:
+        """Outcome of a recent failed lookup of `key`, or None"""
+        if not self.enabled:
+            return None
+        
+        entry_key = self._key(source, key)
+        entry = self._entries.get(entry_key)
+        if not entry:
+            return None
+        
+        outcome, expires_at = entry
+        if time.monotonic() >= expires_at:
+            del self._entries[entry_key]
+            return None
+        
+        self.hits[source][outcome] += 1
+        logger.info(f"🚫 {source}: {key} failed recently ({outcome}), skipping lookup")
+        return outcome
+    
+    def record(self, source: str, key: str, outcome: str):
+        """Remember a failed lookup of `key`"""
+        if not self.enabled:
+            return
+        
+        entry_key = self._key(source, key)
+        self._entries[entry_key] = (outcome, time.monotonic() + self.ttls[outcome])
+        self._entries.move_to_end(entry_key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+    
+    def get_stats(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        active: Dict[str, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+        for (source, _), (outcome, expires_at) in self._entries.items():
+            if expires_at > now:
+                active[source][outcome] += 1
+        
+        return {
+            "enabled": self.enabled,
+            "entries": {source: dict(counts) for source, counts in active.items()},
+            "lookups_skipped": {source: dict(counts) for source, counts in self.hits.items()}
+        }
+
+# Global instance
+negative_cache = NegativeCache(
+    not_found_ttl_seconds=config.NEGATIVE_CACHE_NOT_FOUND_TTL_SECONDS,
+    transient_ttl_seconds=config.NEGATIVE_CACHE_TRANSIENT_TTL_SECONDS,
+    max_entries=config.NEGATIVE_CACHE_MAX_ENTRIES,
+    enabled=config.NEGATIVE_CACHE_ENABLED
+)
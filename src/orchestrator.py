@@ -2,26 +2,185 @@
 import logging
 import asyncio
 import time
-from typing import List, Dict, Any
+import uuid
+from typing import List, Dict, Any, Tuple, Callable, Awaitable, Optional, Set, AsyncIterator
 from collections import defaultdict
+from pydantic import BaseModel
 
 from .models import (
     SearchRequest,
     SearchResponse,
     ExecutiveSummary,
     Patent,
-    SearchMetadata
+    SearchMetadata,
+    PubChemData,
+    WODiscoveryResult
 )
 from .discovery import pubchem_client, wo_discovery_service
-from .crawlers import crawler_pool, google_patents_client, inpi_client
+from .crawlers import crawler_pool, google_patents_pool, inpi_client
+from .serpapi import SerpAPIBudget
+from .patent_cache import patent_cache
+from .checkpoints import (
+    checkpoint_store,
+    STAGE_PUBCHEM,
+    STAGE_DISCOVERY,
+    STAGE_WO,
+    STAGE_PATENT,
+    STATUS_COMPLETED,
+    STATUS_PARTIAL,
+    STATUS_FAILED
+)
 from . import config, utils
 
 logger = logging.getLogger(__name__)
 
+# Weight of the latest sample in each stage's moving average duration
+STAGE_DURATION_ALPHA = 0.3
+
+class SearchState:
+    """Mutable state shared by the pipeline stages of a single search"""
+    
+    def __init__(
+        self,
+        request: SearchRequest,
+        on_patent: Optional[Callable[[Patent], Optional[Awaitable[None]]]] = None,
+        keep_patents: bool = True,
+        search_id: Optional[str] = None,
+        checkpoint: Optional[Dict[str, Dict[str, Any]]] = None
+    ):
+        self.request = request
+        self.search_id = search_id or uuid.uuid4().hex
+        self.on_patent = on_patent
+        self.keep_patents = keep_patents
+        self.start_time = time.time()
+        
+        # Deadline: work is scheduled against it and cut off when it passes
+        self.deadline = time.monotonic() + request.time_budget_seconds
+        self.partial = False
+        self.stage_durations: Dict[str, float] = {}
+        
+        # (wo_index, application_index) -> Patent, sorted at the end so the
+        # output order does not depend on which stage finished first
+        self.patents: Dict[Tuple[int, int], Patent] = {}
+        
+        # Running totals for the executive summary (kept even when the
+        # patents themselves are streamed out and not retained)
+        self.total_patents = 0
+        self.jurisdictions: Dict[str, int] = defaultdict(int)
+        self.families: Set[str] = set()
+        
+        self.sources_used: List[str] = []
+        self.errors_count = 0
+        self.warnings: List[str] = []
+        
+        # Exact SerpAPI accounting: every billed query is debited here
+        self.serpapi_budget = SerpAPIBudget(request.serpapi_budget)
+        self.patents_without_details = 0
+        
+        self.wo_numbers: List[str] = []
+        self.wo_numbers_found = 0
+        self.wos_processed = 0
+        self.applications_found = 0
+        self.applications_done = 0
+        self.applications_failed = 0
+        
+        # Family-aware dedup: canonical (country, number, kind) -> first record seen
+        self.applications_by_key: Dict[Tuple[str, str, str], Dict[str, Any]] = {}
+        self.duplicates_merged = 0
+        self.fetches_saved = 0
+        
+        # Resume: items completed by a previous run of this search_id
+        self.checkpoint = checkpoint or {}
+        self.resumed = bool(self.checkpoint)
+        self.items_restored = 0
+    
+    def restored(self, stage: str, item_key: str) -> Optional[Any]:
+        """Payload saved for `item_key` by a previous run, if any"""
+        return self.checkpoint.get(stage, {}).get(item_key)
+    
+    def dedup_application(self, app: Dict[str, Any]) -> bool:
+        """
+        Register a worldwide application, merging it into an earlier record
+        for the same canonical number if there is one
+        
+        Returns:
+            True if the application is new and should be enriched
+        """
+        key = utils.application_key(app.get("country_code", ""), app.get("application_number", ""))
+        
+        existing = self.applications_by_key.get(key)
+        if existing is None:
+            self.applications_by_key[key] = app
+            return True
+        
+        # Fill gaps in the canonical record (it may still be waiting in the
+        # enrichment queue, in which case the merged fields are used)
+        for field, value in app.items():
+            if value and not existing.get(field):
+                existing[field] = value
+        
+        self.duplicates_merged += 1
+        
+        # One Google Patents lookup saved, plus one INPI lookup for BR
+        self.fetches_saved += 1
+        if key[0] == "BR" and self.request.include_inpi:
+            self.fetches_saved += 1
+        
+        return False
+    
+    def remaining(self) -> float:
+        """Seconds left before the deadline"""
+        return self.deadline - time.monotonic()
+    
+    def has_time_for(self, stage: str) -> bool:
+        """True if one more item of `stage` is expected to finish before the deadline"""
+        return self.remaining() > self.stage_durations.get(stage, 0.0)
+    
+    def record_duration(self, stage: str, seconds: float):
+        """Update the moving average duration of one `stage` item"""
+        previous = self.stage_durations.get(stage)
+        if previous is None:
+            self.stage_durations[stage] = seconds
+        else:
+            self.stage_durations[stage] = (
+                STAGE_DURATION_ALPHA * seconds + (1 - STAGE_DURATION_ALPHA) * previous
+            )
+    
+    async def add_patent(self, key: Tuple[int, int], patent: Patent):
+        """
+        Register a fully enriched patent
+        
+        An on_patent callback that returns an awaitable (e.g. the put of a
+        bounded queue) is awaited, so a slow consumer holds back the stage
+        instead of patents piling up in memory.
+        """
+        self.applications_done += 1
+        self.total_patents += 1
+        self.jurisdictions[patent.country_code] += 1
+        if patent.family_id:
+            self.families.add(patent.family_id)
+        
+        if self.keep_patents:
+            self.patents[key] = patent
+        
+        if self.on_patent:
+            delivered = self.on_patent(patent)
+            if delivered is not None:
+                await delivered
+    
+    def sorted_patents(self) -> List[Patent]:
+        """Patents in WO / worldwide application order"""
+        return [self.patents[key] for key in sorted(self.patents)]
+
 class SearchOrchestrator:
     """Orchestrate complete patent search pipeline"""
     
-    async def execute_search(self, request: SearchRequest) -> SearchResponse:
+    async def execute_search(
+        self,
+        request: SearchRequest,
+        on_patent: Optional[Callable[[Patent], None]] = None,
+        search_id: Optional[str] = None
+    ) -> SearchResponse:
         """
         Execute complete search pipeline
         
@@ -29,195 +188,200 @@ class SearchOrchestrator:
         1. PubChem → dev codes, CAS, synonyms
         2. WO Discovery → find WO numbers
         3. For each WO → WIPO Crawler → worldwide applications
-        4. For each application → Google Patents → full details
-        5. For each BR → INPI → enrichment
+        4. For each application → Google Patents (Playwright, SerpAPI fallback) → full details
+        5. For each BR → INPI → enrichment (concurrently with step 4)
         6. Consolidation → final JSON
+        
+        Phases 2-5 run as a streaming pipeline of bounded queues: each
+        stage starts as soon as its upstream produces an item, so the
+        first WO's applications are enriched while the others are still
+        being crawled.
+        
+        Progress is checkpointed per item under `search_id` (returned in
+        search_metadata), see resume_search().
+        
+        Args:
+            request: Search parameters
+            on_patent: Optional callback invoked with each Patent as soon as
+                       it is fully enriched (used for partial results)
+            search_id: Checkpoint ID (generated if omitted)
+        """
+        state = SearchState(request, on_patent=on_patent, search_id=search_id)
+        
+        executive_summary, metadata = await self._execute(state)
+        
+        return SearchResponse(
+            executive_summary=executive_summary,
+            patents=state.sorted_patents(),
+            search_metadata=metadata
+        )
+    
+    async def resume_search(
+        self,
+        search_id: str,
+        on_patent: Optional[Callable[[Patent], None]] = None
+    ) -> SearchResponse:
+        """
+        Continue a checkpointed search from its last completed items
+        
+        PubChem data, discovered WOs, crawled WOs and enriched patents saved
+        by the previous run are reused; only the missing work is fetched.
+        
+        Raises:
+            KeyError: if no checkpoint exists for search_id
+        """
+        stored = await checkpoint_store.get_search(search_id)
+        if not stored:
+            raise KeyError(f"No checkpoint for search {search_id}")
+        
+        request = SearchRequest(**stored["request"])
+        checkpoint = await checkpoint_store.load(search_id)
+        
+        logger.info(f"♻️  Resuming search {search_id} ({sum(len(items) for items in checkpoint.values())} items checkpointed)")
+        
+        state = SearchState(request, on_patent=on_patent, search_id=search_id, checkpoint=checkpoint)
+        
+        executive_summary, metadata = await self._execute(state)
+        
+        return SearchResponse(
+            executive_summary=executive_summary,
+            patents=state.sorted_patents(),
+            search_metadata=metadata
+        )
+    
+    async def stream_search(
+        self,
+        request: SearchRequest
+    ) -> AsyncIterator[Tuple[str, BaseModel]]:
+        """
+        Execute the search pipeline, yielding results as they are produced
+        
+        Yields:
+            ("patent", Patent) for each patent as soon as it is enriched,
+            then ("executive_summary", ExecutiveSummary) and
+            ("search_metadata", SearchMetadata) once the pipeline is done.
+        
+        Patents are not retained server-side: at most PIPELINE_QUEUE_SIZE
+        wait for the consumer, after which enrichment waits for it too.
+        If the consumer stops iterating (e.g. client disconnect) the
+        pipeline is cancelled.
         """
-        start_time = time.time()
+        patent_queue: asyncio.Queue = asyncio.Queue(maxsize=config.PIPELINE_QUEUE_SIZE)
+        state = SearchState(request, on_patent=patent_queue.put, keep_patents=False)
+        
+        task = asyncio.create_task(self._execute(state))
+        
+        try:
+            while True:
+                # Wait for either the next patent or the end of the pipeline
+                getter = asyncio.create_task(patent_queue.get())
+                await asyncio.wait({getter, task}, return_when=asyncio.FIRST_COMPLETED)
+                
+                if getter.done():
+                    yield "patent", getter.result()
+                    continue
+                
+                getter.cancel()
+                break
+            
+            # Pipeline finished: flush remaining patents, then the summary
+            while not patent_queue.empty():
+                yield "patent", patent_queue.get_nowait()
+            
+            executive_summary, metadata = task.result()
+            yield "executive_summary", executive_summary
+            yield "search_metadata", metadata
+        
+        finally:
+            if not task.done():
+                task.cancel()
+                await asyncio.gather(task, return_exceptions=True)
+    
+    async def _execute(self, state: SearchState) -> Tuple[ExecutiveSummary, SearchMetadata]:
+        """Run phases 1-6 for `state`, patents are delivered via state.add_patent()"""
+        request = state.request
         
         logger.info("=" * 80)
         logger.info(f"🚀 STARTING SEARCH PIPELINE: {request.molecule_name}")
         logger.info("=" * 80)
         
+        logger.info(f"  Search ID: {state.search_id}")
+        logger.info(f"  Time budget: {request.time_budget_seconds:.0f}s")
+        
         # Initialize services
         await pubchem_client.initialize()
         await wo_discovery_service.initialize()
         
-        patents: List[Patent] = []
-        sources_used = []
-        errors_count = 0
-        warnings = []
-        serpapi_queries = 0
+        pubchem_data = PubChemData(molecule_name=request.molecule_name)
         
         try:
-            # ================================================================
-            # PHASE 1: PubChem - Get molecule data
-            # ================================================================
-            logger.info("\n📊 PHASE 1: PubChem")
-            logger.info("-" * 80)
-            
-            pubchem_data = await pubchem_client.get_molecule_data(request.molecule_name)
-            sources_used.append("PubChem")
-            
-            logger.info(f"  Dev codes: {len(pubchem_data.dev_codes)}")
-            logger.info(f"  CAS: {pubchem_data.cas_number or 'N/A'}")
-            logger.info(f"  Synonyms: {len(pubchem_data.synonyms)}")
-            
-            # ================================================================
-            # PHASE 2: WO Discovery - Find WO numbers
-            # ================================================================
-            logger.info("\n🔍 PHASE 2: WO Discovery")
-            logger.info("-" * 80)
-            
-            wo_result = await wo_discovery_service.discover_wo_numbers(
-                request.molecule_name,
-                pubchem_data,
-                max_results=request.max_wos
-            )
-            
-            sources_used.extend(wo_result.sources)
-            serpapi_queries += len(wo_result.sources) * 2  # Estimate
-            
-            wo_numbers = wo_result.wo_numbers[:request.max_wos]
-            
-            logger.info(f"  Found {len(wo_numbers)} WO numbers")
-            for i, wo in enumerate(wo_numbers[:5], 1):
-                logger.info(f"    {i}. {wo}")
-            if len(wo_numbers) > 5:
-                logger.info(f"    ... and {len(wo_numbers) - 5} more")
-            
-            if not wo_numbers:
-                warnings.append("No WO numbers found")
-                logger.warning("  ⚠️  No WO numbers found!")
-            
-            # ================================================================
-            # PHASE 3: Process each WO
-            # ================================================================
-            logger.info("\n🌍 PHASE 3: Processing WO patents")
-            logger.info("-" * 80)
-            
-            all_applications = []
-            
-            for idx, wo_number in enumerate(wo_numbers, 1):
-                logger.info(f"\n  [{idx}/{len(wo_numbers)}] Processing {wo_number}")
-                
-                try:
-                    # Get crawler
-                    crawler = crawler_pool.get_crawler()
-                    
-                    # Fetch WO details
-                    wo_data = await crawler.get_wo_details(wo_number)
-                    
-                    if not wo_data:
-                        logger.warning(f"    ⚠️  No data for {wo_number}")
-                        errors_count += 1
-                        continue
+            await checkpoint_store.start_search(state.search_id, request.model_dump())
+        except Exception as e:
+            logger.warning(f"  ⚠️  Checkpointing unavailable: {str(e)}")
+        
+        try:
+            try:
+                # Hard cutoff: whatever is still running at the deadline is cancelled
+                deadline = asyncio.timeout(state.remaining())
+                async with deadline:
+                    # ========================================================
+                    # PHASE 1: PubChem - Get molecule data
+                    # ========================================================
+                    logger.info("\n📊 PHASE 1: PubChem")
+                    logger.info("-" * 80)
                     
-                    # Extract worldwide applications
-                    worldwide_apps = wo_data.get("worldwide_applications", {})
+                    restored = state.restored(STAGE_PUBCHEM, "data")
+                    if restored:
+                        pubchem_data = PubChemData(**restored)
+                        logger.info("  ♻️  Restored from checkpoint")
+                    else:
+                        pubchem_data = await pubchem_client.get_molecule_data(request.molecule_name)
+                        if pubchem_data.synonyms:
+                            await self._save_checkpoint(state, STAGE_PUBCHEM, "data", pubchem_data.model_dump())
+                    state.sources_used.append("PubChem")
                     
-                    for year, apps in worldwide_apps.items():
-                        all_applications.extend(apps)
+                    logger.info(f"  Dev codes: {len(pubchem_data.dev_codes)}")
+                    logger.info(f"  CAS: {pubchem_data.cas_number or 'N/A'}")
+                    logger.info(f"  Synonyms: {len(pubchem_data.synonyms)}")
                     
-                    logger.info(f"    ✅ Found {len(all_applications)} applications")
+                    # ========================================================
+                    # PHASES 2-5: Discovery → WIPO → Google Patents → INPI
+                    # ========================================================
+                    logger.info("\n🔀 PHASES 2-5: Streaming pipeline")
+                    logger.info("-" * 80)
+                    logger.info(f"  WIPO workers: {config.MAX_CONCURRENT_WOS}")
+                    logger.info(f"  Enrichment workers: {config.MAX_CONCURRENT_ENRICHMENTS}")
                     
-                    # Rate limiting
-                    if idx < len(wo_numbers):
-                        await asyncio.sleep(config.DELAY_BETWEEN_WOS)
-                
-                except Exception as e:
-                    logger.error(f"    ❌ Error: {str(e)}")
-                    errors_count += 1
+                    await self._run_pipeline(state, pubchem_data)
             
-            sources_used.append("WIPO")
+            except TimeoutError:
+                # A timeout of some lookup that escaped its handler is an error, not the deadline
+                if not deadline.expired():
+                    raise
+                state.partial = True
+                logger.warning(f"  ⏰ Time budget of {request.time_budget_seconds:.0f}s exhausted, outstanding work cancelled")
             
-            logger.info(f"\n  Total applications collected: {len(all_applications)}")
+            if state.wos_processed:
+                state.sources_used.append("WIPO")
+            if state.applications_done:
+                state.sources_used.append("Google Patents")
+                if request.include_inpi:
+                    state.sources_used.append("INPI")
             
-            # ================================================================
-            # PHASE 4: Enrich each application with Google Patents
-            # ================================================================
-            logger.info("\n📚 PHASE 4: Enriching with Google Patents")
-            logger.info("-" * 80)
+            budget = state.serpapi_budget
+            if budget.denied:
+                state.warnings.append(
+                    f"SerpAPI budget of {budget.limit} queries spent: {budget.denied} queries skipped, "
+                    f"{state.patents_without_details} patents without Google Patents details"
+                )
             
-            # Limit to prevent timeout
-            max_patents = min(len(all_applications), 50)
-            applications_to_process = all_applications[:max_patents]
-            
-            if len(all_applications) > max_patents:
-                warnings.append(f"Limited to {max_patents} patents (found {len(all_applications)})")
-                logger.warning(f"  ⚠️  Limiting to {max_patents} patents")
-            
-            for idx, app in enumerate(applications_to_process, 1):
-                patent_number = app.get("application_number", "")
-                country_code = app.get("country_code", "")
-                
-                if not patent_number:
-                    continue
-                
-                logger.info(f"  [{idx}/{len(applications_to_process)}] {patent_number}")
-                
-                try:
-                    # Get Google Patents details
-                    gp_data = await google_patents_client.get_patent_details(patent_number)
-                    serpapi_queries += 1
-                    
-                    # Create Patent object
-                    patent = Patent(
-                        publication_number=patent_number,
-                        country_code=country_code,
-                        priority_date=gp_data.get("priority_date", ""),
-                        filing_date=gp_data.get("filing_date", "") or app.get("filing_date", ""),
-                        publication_date=gp_data.get("publication_date", ""),
-                        grant_date=gp_data.get("grant_date", ""),
-                        title=gp_data.get("title", ""),
-                        abstract=gp_data.get("abstract", ""),
-                        claims=gp_data.get("claims", ""),
-                        assignee=gp_data.get("assignee", ""),
-                        inventors=gp_data.get("inventors", []),
-                        jurisdiction=country_code,
-                        jurisdiction_name=utils.get_country_name(country_code),
-                        legal_status=gp_data.get("legal_status", ""),
-                        family_id=gp_data.get("family_id", ""),
-                        family_size=gp_data.get("family_size", 0),
-                        cpc_classifications=gp_data.get("cpc_classifications", []),
-                        ipc_classifications=gp_data.get("ipc_classifications", []),
-                        source="google_patents",
-                        source_url=gp_data.get("url", ""),
-                        pdf_url=gp_data.get("pdf_url", ""),
-                        inpi_enriched=False
-                    )
-                    
-                    # PHASE 5: INPI enrichment for BR patents
-                    if country_code == "BR" and request.include_inpi:
-                        try:
-                            inpi_data = await inpi_client.get_patent_details(patent_number)
-                            
-                            if inpi_data.get("found"):
-                                patent.inpi_enriched = True
-                                patent.inpi_status = inpi_data.get("status", "")
-                                patent.inpi_process_number = inpi_data.get("process_number", "")
-                                
-                                # Enrich with INPI data
-                                if not patent.title and inpi_data.get("title"):
-                                    patent.title = inpi_data["title"]
-                                if not patent.assignee and inpi_data.get("applicant"):
-                                    patent.assignee = inpi_data["applicant"]
-                        
-                        except Exception as e:
-                            logger.error(f"    ⚠️  INPI error: {str(e)}")
-                    
-                    patents.append(patent)
-                    
-                    # Rate limiting
-                    await asyncio.sleep(config.DELAY_BETWEEN_QUERIES)
-                
-                except Exception as e:
-                    logger.error(f"    ❌ Error: {str(e)}")
-                    errors_count += 1
-            
-            sources_used.append("Google Patents")
-            if request.include_inpi:
-                sources_used.append("INPI")
+            applications_not_enriched = state.applications_found - state.applications_done
+            if state.partial:
+                state.warnings.append(
+                    f"Time budget of {request.time_budget_seconds:.0f}s exhausted: partial results "
+                    f"({state.wos_processed}/{len(state.wo_numbers)} WOs, "
+                    f"{applications_not_enriched} applications not enriched)"
+                )
             
             # ================================================================
             # PHASE 6: Generate Executive Summary
@@ -225,23 +389,15 @@ class SearchOrchestrator:
             logger.info("\n📊 PHASE 6: Generating Summary")
             logger.info("-" * 80)
             
-            # Count jurisdictions
-            jurisdictions = defaultdict(int)
-            for patent in patents:
-                jurisdictions[patent.country_code] += 1
-            
-            # Count families
-            families = set(p.family_id for p in patents if p.family_id)
-            
-            duration = time.time() - start_time
+            duration = time.time() - state.start_time
             
             executive_summary = ExecutiveSummary(
                 molecule_name=request.molecule_name,
                 generic_name=pubchem_data.molecule_name,
                 commercial_name=request.molecule_name,
-                total_patents=len(patents),
-                total_families=len(families),
-                jurisdictions=dict(jurisdictions),
+                total_patents=state.total_patents,
+                total_families=len(state.families),
+                jurisdictions=dict(state.jurisdictions),
                 patent_types={},  # Future: inference
                 consistency_score=1.0,
                 search_duration_seconds=round(duration, 2)
@@ -249,37 +405,370 @@ class SearchOrchestrator:
             
             # Metadata
             metadata = SearchMetadata(
-                sources_used=list(set(sources_used)),
-                wo_numbers_found=len(wo_result.wo_numbers),
-                wo_numbers_processed=len(wo_numbers),
-                serpapi_queries_used=serpapi_queries,
-                errors_count=errors_count,
-                warnings=warnings
+                sources_used=list(set(state.sources_used)),
+                wo_numbers_found=state.wo_numbers_found,
+                search_id=state.search_id,
+                wo_numbers_processed=state.wos_processed,
+                serpapi_queries_used=state.serpapi_budget.used,
+                serpapi_budget=state.serpapi_budget.limit,
+                serpapi_cache_hits=state.serpapi_budget.cache_hits,
+                patents_without_details=state.patents_without_details,
+                duplicate_applications_merged=state.duplicates_merged,
+                fetches_saved_by_dedup=state.fetches_saved,
+                errors_count=state.errors_count,
+                warnings=state.warnings,
+                time_budget_seconds=request.time_budget_seconds,
+                partial=state.partial,
+                applications_found=state.applications_found,
+                applications_not_enriched=applications_not_enriched,
+                applications_failed=state.applications_failed,
+                resumed=state.resumed,
+                items_restored=state.items_restored
             )
             
             # ================================================================
             # Final Response
             # ================================================================
             logger.info("\n" + "=" * 80)
-            logger.info("✅ SEARCH COMPLETE")
+            logger.info("✅ SEARCH COMPLETE" + (" (PARTIAL)" if state.partial else ""))
             logger.info("=" * 80)
-            logger.info(f"  Total patents: {len(patents)}")
-            logger.info(f"  Jurisdictions: {len(jurisdictions)}")
-            logger.info(f"  Families: {len(families)}")
+            logger.info(f"  Total patents: {state.total_patents}")
+            logger.info(f"  Jurisdictions: {len(state.jurisdictions)}")
+            logger.info(f"  Families: {len(state.families)}")
             logger.info(f"  Duration: {utils.format_duration(duration)}")
-            logger.info(f"  SerpAPI queries: {serpapi_queries}")
-            logger.info(f"  Errors: {errors_count}")
+            logger.info(f"  SerpAPI queries: {state.serpapi_budget.used}/{state.serpapi_budget.limit} ({state.serpapi_budget.cache_hits} cache hits)")
+            logger.info(f"  Duplicates merged: {state.duplicates_merged} ({state.fetches_saved} fetches saved)")
+            logger.info(f"  Errors: {state.errors_count}")
+            if state.resumed:
+                logger.info(f"  Restored from checkpoint: {state.items_restored} items")
             logger.info("=" * 80 + "\n")
             
-            return SearchResponse(
-                executive_summary=executive_summary,
-                patents=patents,
-                search_metadata=metadata
-            )
+            await self._set_checkpoint_status(state, STATUS_PARTIAL if state.partial else STATUS_COMPLETED)
+            
+            return executive_summary, metadata
         
         except Exception as e:
             logger.error(f"❌ PIPELINE ERROR: {str(e)}")
+            await self._set_checkpoint_status(state, STATUS_FAILED)
             raise
+    
+    # ========================================================================
+    # Checkpoints
+    # ========================================================================
+    
+    async def _save_checkpoint(self, state: SearchState, stage: str, item_key: str, payload: Any):
+        """Persist one completed item; a failing store never fails the search"""
+        try:
+            await checkpoint_store.save(state.search_id, stage, item_key, payload)
+        except Exception as e:
+            logger.warning(f"    ⚠️  Checkpoint save failed ({stage}/{item_key}): {str(e)}")
+    
+    async def _set_checkpoint_status(self, state: SearchState, status: str):
+        try:
+            await checkpoint_store.set_status(state.search_id, status)
+        except Exception as e:
+            logger.warning(f"  ⚠️  Checkpoint status update failed: {str(e)}")
+
+    # ========================================================================
+    # Pipeline
+    # ========================================================================
+    
+    async def _run_pipeline(self, state: SearchState, pubchem_data: PubChemData):
+        """
+        Run discovery → WIPO crawl → Google Patents + INPI as concurrent
+        stages connected by bounded queues
+        
+        Each queue is drained by its own pool of workers. Shutdown is driven
+        by queue.join() in stage order: a stage only marks an item done after
+        it has handed its output to the next queue, so once every queue is
+        joined the whole pipeline is idle and the workers can be cancelled.
+        """
+        wo_queue: asyncio.Queue = asyncio.Queue(maxsize=config.PIPELINE_QUEUE_SIZE)
+        app_queue: asyncio.Queue = asyncio.Queue(maxsize=config.PIPELINE_QUEUE_SIZE)
+        
+        workers = [
+            *self._start_workers(
+                state, "wipo", config.MAX_CONCURRENT_WOS, wo_queue,
+                lambda item: self._crawl_wo(state, item, app_queue)
+            ),
+            *self._start_workers(
+                state, "google_patents", config.MAX_CONCURRENT_ENRICHMENTS, app_queue,
+                lambda item: self._enrich_application(state, item)
+            ),
+        ]
+        
+        try:
+            await self._discover_wos(state, pubchem_data, wo_queue)
+            
+            await wo_queue.join()
+            logger.info(f"\n  Total applications collected: {state.applications_found}")
+            logger.info(f"  Duplicates merged: {state.duplicates_merged}")
+            
+            await app_queue.join()
+        
+        finally:
+            for worker in workers:
+                worker.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+    
+    def _start_workers(
+        self,
+        state: SearchState,
+        stage: str,
+        count: int,
+        queue: asyncio.Queue,
+        handler: Callable[[Any], Awaitable[None]]
+    ) -> List[asyncio.Task]:
+        """
+        Start `count` workers that feed every item of `queue` to `handler`
+        
+        Items that are not expected to finish before the search deadline
+        (based on the stage's moving average duration) are dropped instead
+        of started, leaving the remaining time to work already in flight.
+        """
+        async def worker():
+            while True:
+                item = await queue.get()
+                try:
+                    if not state.has_time_for(stage):
+                        if not state.partial:
+                            logger.warning(f"  ⏰ Not enough time left for {stage} items, skipping")
+                        state.partial = True
+                        continue
+                    
+                    started = time.monotonic()
+                    await handler(item)
+                    state.record_duration(stage, time.monotonic() - started)
+                except Exception as e:
+                    # Handlers do their own error accounting; never let one
+                    # item kill the worker and stall queue.join()
+                    logger.error(f"    ❌ Unhandled error in {stage} stage: {str(e)}")
+                finally:
+                    queue.task_done()
+        
+        return [asyncio.create_task(worker()) for _ in range(max(1, count))]
+    
+    async def _discover_wos(
+        self,
+        state: SearchState,
+        pubchem_data: PubChemData,
+        wo_queue: asyncio.Queue
+    ):
+        """Stage 1 (producer): discover WO numbers and feed the WIPO stage"""
+        logger.info("\n🔍 PHASE 2: WO Discovery")
+        
+        request = state.request
+        restored = state.restored(STAGE_DISCOVERY, "result")
+        if restored:
+            wo_result = WODiscoveryResult(**restored)
+            logger.info("  ♻️  Restored from checkpoint")
+        else:
+            wo_result: WODiscoveryResult = await wo_discovery_service.discover_wo_numbers(
+                request.molecule_name,
+                pubchem_data,
+                max_results=request.max_wos,
+                budget=state.serpapi_budget
+            )
+            if wo_result.wo_numbers:
+                await self._save_checkpoint(state, STAGE_DISCOVERY, "result", wo_result.model_dump())
+        
+        state.sources_used.extend(wo_result.sources)
+        state.wo_numbers_found = len(wo_result.wo_numbers)
+        state.wo_numbers = wo_result.wo_numbers[:request.max_wos]
+        
+        logger.info(f"  Found {len(state.wo_numbers)} WO numbers")
+        for i, wo in enumerate(state.wo_numbers[:5], 1):
+            logger.info(f"    {i}. {wo}")
+        if len(state.wo_numbers) > 5:
+            logger.info(f"    ... and {len(state.wo_numbers) - 5} more")
+        
+        if not state.wo_numbers:
+            state.warnings.append("No WO numbers found")
+            logger.warning("  ⚠️  No WO numbers found!")
+        
+        for idx, wo_number in enumerate(state.wo_numbers, 1):
+            await wo_queue.put((idx, wo_number))
+    
+    async def _crawl_wo(
+        self,
+        state: SearchState,
+        item: Tuple[int, str],
+        app_queue: asyncio.Queue
+    ):
+        """Stage 2: WIPO crawl of one WO → worldwide applications"""
+        idx, wo_number = item
+        total = len(state.wo_numbers)
+        
+        logger.info(f"\n  🌍 [{idx}/{total}] Processing {wo_number}")
+        
+        try:
+            applications = state.restored(STAGE_WO, wo_number)
+            
+            if applications is not None:
+                state.wos_processed += 1
+                state.items_restored += 1
+            else:
+                # Fetch WO details
+                wo_data = await crawler_pool.get_wo_details(wo_number)
+                state.wos_processed += 1
+                
+                if not wo_data or wo_data.get("erro"):
+                    logger.warning(f"    ⚠️  No data for {wo_number}")
+                    state.errors_count += 1
+                    return
+                
+                # Extract worldwide applications
+                applications = []
+                for year, apps in wo_data.get("worldwide_applications", {}).items():
+                    applications.extend(apps)
+                
+                await self._save_checkpoint(state, STAGE_WO, wo_number, applications)
+            
+            logger.info(f"    ✅ {wo_number}: found {len(applications)} applications")
+            
+            for app_idx, app in enumerate(applications):
+                if not app.get("application_number"):
+                    continue
+                
+                # Same family → same national applications from several WOs
+                if not state.dedup_application(app):
+                    continue
+                
+                state.applications_found += 1
+                await app_queue.put(((idx, app_idx), app))
+        
+        except Exception as e:
+            logger.error(f"    ❌ Error on {wo_number}: {str(e)}")
+            state.errors_count += 1
+    
+    async def _enrich_application(
+        self,
+        state: SearchState,
+        item: Tuple[Tuple[int, int], Dict[str, Any]]
+    ):
+        """
+        Stage 3: Google Patents details for one worldwide application
+        
+        For BR applications the INPI lookup does not depend on the Google
+        Patents result, so both are launched together and merged when both
+        have returned.
+        """
+        key, app = item
+        patent_number = app.get("application_number", "")
+        country_code = app.get("country_code", "")
+        
+        restored = state.restored(STAGE_PATENT, self._patent_checkpoint_key(country_code, patent_number))
+        if restored:
+            state.items_restored += 1
+            await state.add_patent(key, Patent(**restored))
+            return
+        
+        logger.info(f"  📚 {patent_number}")
+        
+        with_inpi = country_code == "BR" and state.request.include_inpi
+        
+        lookups = [self._fetch_details(state, patent_number)]
+        if with_inpi:
+            lookups.append(inpi_client.get_patent_details(patent_number))
+        
+        results = await asyncio.gather(*lookups, return_exceptions=True)
+        gp_data = results[0]
+        
+        if isinstance(gp_data, BaseException):
+            logger.error(f"    ❌ Error: {str(gp_data)}")
+            state.errors_count += 1
+            state.applications_failed += 1
+            return
+        
+        if not (gp_data.get("title") or gp_data.get("abstract")):
+            state.patents_without_details += 1
+        
+        patent = self._build_patent(app, gp_data)
+        
+        if with_inpi:
+            inpi_data = results[1]
+            if isinstance(inpi_data, BaseException):
+                logger.error(f"    ⚠️  INPI error: {str(inpi_data)}")
+            else:
+                self._merge_inpi(patent, inpi_data)
+        
+        await self._complete_patent(state, key, patent)
+    
+    async def _fetch_details(self, state: SearchState, patent_number: str) -> Dict[str, Any]:
+        """
+        Google Patents details, spending the SerpAPI budget only where needed
+        
+        Records already in the patent cache cost nothing. Otherwise Playwright
+        scraping is free, so it goes first; SerpAPI is the fallback for pages
+        it could not scrape or that lack required fields. Once the budget is
+        spent the lookup returns what was scraped, or empty details (cache
+        hits still succeed) and the patent keeps its WIPO data.
+        """
+        gp_data, _ = await patent_cache.fetch(
+            patent_number,
+            lambda: google_patents_pool.get_complete_details(patent_number, budget=state.serpapi_budget)
+        )
+        return gp_data
+    
+    @staticmethod
+    def _merge_inpi(patent: Patent, inpi_data: Dict[str, Any]):
+        """Fill INPI fields (and gaps left by Google Patents) on a BR patent"""
+        if not inpi_data.get("found"):
+            return
+        
+        patent.inpi_enriched = True
+        patent.inpi_status = inpi_data.get("status", "")
+        patent.inpi_process_number = inpi_data.get("process_number", "")
+        
+        # Enrich with INPI data
+        if not patent.title and inpi_data.get("title"):
+            patent.title = inpi_data["title"]
+        if not patent.assignee and inpi_data.get("applicant"):
+            patent.assignee = inpi_data["applicant"]
+    
+    async def _complete_patent(self, state: SearchState, key: Tuple[int, int], patent: Patent):
+        """Register a fully enriched patent and checkpoint it"""
+        await state.add_patent(key, patent)
+        await self._save_checkpoint(
+            state,
+            STAGE_PATENT,
+            self._patent_checkpoint_key(patent.country_code, patent.publication_number),
+            patent.model_dump()
+        )
+    
+    @staticmethod
+    def _patent_checkpoint_key(country_code: str, application_number: str) -> str:
+        return "|".join(utils.application_key(country_code, application_number))
+    
+    def _build_patent(self, app: Dict[str, Any], gp_data: Dict[str, Any]) -> Patent:
+        """Create Patent object from a WIPO application + Google Patents data"""
+        patent_number = app.get("application_number", "")
+        country_code = app.get("country_code", "")
+        
+        return Patent(
+            publication_number=patent_number,
+            country_code=country_code,
+            priority_date=gp_data.get("priority_date", ""),
+            filing_date=gp_data.get("filing_date", "") or app.get("filing_date", ""),
+            publication_date=gp_data.get("publication_date", ""),
+            grant_date=gp_data.get("grant_date", ""),
+            title=gp_data.get("title", ""),
+            abstract=gp_data.get("abstract", ""),
+            claims=gp_data.get("claims", ""),
+            assignee=gp_data.get("assignee", ""),
+            inventors=gp_data.get("inventors", []),
+            jurisdiction=country_code,
+            jurisdiction_name=utils.get_country_name(country_code),
+            legal_status=gp_data.get("legal_status", ""),
+            family_id=gp_data.get("family_id", ""),
+            family_size=gp_data.get("family_size", 0),
+            cpc_classifications=gp_data.get("cpc_classifications", []),
+            ipc_classifications=gp_data.get("ipc_classifications", []),
+            source=gp_data.get("source", "google_patents"),
+            source_url=gp_data.get("url", ""),
+            pdf_url=gp_data.get("pdf_url", ""),
+            inpi_enriched=False
+        )
 
 # Global instance
 search_orchestrator = SearchOrchestrator()
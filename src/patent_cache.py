@@ -0,0 +1,256 @@
+"""Patent details cache - in-memory LRU in front of a SQLite store"""
+import logging
+import asyncio
+import copy
+import json
+import os
+import re
+import sqlite3
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, Awaitable, Callable, Dict, Iterator, Optional, Tuple
+
+from . import config
+
+logger = logging.getLogger(__name__)
+
+# Fields that change over a patent's life; everything else is bibliographic
+LEGAL_FIELDS = {"legal_status", "grant_date"}
+
+# Expired rows are purged from disk every N writes
+PRUNE_EVERY_WRITES = 500
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS patents (
+    patent_key TEXT PRIMARY KEY,
+    record TEXT NOT NULL,
+    bibliographic_at REAL NOT NULL,
+    legal_at REAL NOT NULL
+);
+"""
+
+class PatentCache:
+    """
+    Two-tier cache of normalized Google Patents records
+    
+    Records have the shape returned by GooglePatentsClient and
+    GooglePatentsCrawlerPool.get_patent_details. A hot LRU in memory
+    sits in front of a SQLite tier that survives restarts.
+    
+    Freshness is tracked per field class: legal fields (legal status,
+    grant date) expire after legal_ttl_hours and trigger a refetch, while
+    bibliographic fields stay valid for bibliographic_ttl_hours. A refetch
+    that comes back with gaps (e.g. Playwright has no claims) keeps the
+    cached bibliographic values, and if it fails outright the stale record
+    is served instead of nothing.
+    """
+    
+    def __init__(
+        self,
+        db_path: str,
+        memory_size: int = 2000,
+        bibliographic_ttl_hours: float = 720,
+        legal_ttl_hours: float = 24,
+        enabled: bool = True
+    ):
+        self.db_path = db_path
+        self.memory_size = memory_size
+        self.bibliographic_ttl = bibliographic_ttl_hours * 3600
+        self.legal_ttl = legal_ttl_hours * 3600
+        self.enabled = enabled
+        
+        self._memory: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._initialized = False
+        self._writes = 0
+        
+        # Stats
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.refreshes = 0
+        self.stale_served = 0
+    
+    @staticmethod
+    def make_key(patent_id: str) -> str:
+        """Publication number without separators (kind code kept)"""
+        return re.sub(r"[^A-Z0-9]", "", patent_id.upper())
+    
+    @staticmethod
+    def is_usable(record: Optional[Dict[str, Any]]) -> bool:
+        """Only records with actual content are cached"""
+        return bool(record) and bool(record.get("title") or record.get("abstract"))
+    
+    # ========================================
+    # Lookup
+    # ========================================
+    
+    async def fetch(
+        self,
+        patent_id: str,
+        fetch_fn: Callable[[], Awaitable[Dict[str, Any]]]
+    ) -> Tuple[Dict[str, Any], bool]:
+        """
+        Cached record for `patent_id`, calling fetch_fn() on a miss or when
+        the legal fields are stale
+        
+        Returns:
+            (record, from_cache)
+        """
+        if not self.enabled:
+            return await fetch_fn(), False
+        
+        entry = await self.get_entry(patent_id)
+        
+        if entry and time.time() - entry["legal_at"] < self.legal_ttl:
+            return copy.deepcopy(entry["record"]), True
+        
+        if entry:
+            self.refreshes += 1
+        
+        fresh = await fetch_fn()
+        
+        if self.is_usable(fresh):
+            bibliographic_at = None
+            if entry:
+                # Keep bibliographic values the new source did not provide
+                for field, value in entry["record"].items():
+                    if field not in LEGAL_FIELDS and value and not fresh.get(field):
+                        fresh[field] = value
+                        bibliographic_at = entry["bibliographic_at"]
+            
+            await self.put(patent_id, fresh, bibliographic_at=bibliographic_at)
+            return fresh, False
+        
+        if entry:
+            self.stale_served += 1
+            logger.info(f"    💾 Refresh of {patent_id} failed, serving cached record")
+            return copy.deepcopy(entry["record"]), True
+        
+        return fresh, False
+    
+    async def get_entry(self, patent_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Entry {"record", "bibliographic_at", "legal_at"} whose bibliographic
+        fields are still valid, or None
+        """
+        key = self.make_key(patent_id)
+        now = time.time()
+        
+        entry = self._memory.get(key)
+        if entry and now - entry["bibliographic_at"] < self.bibliographic_ttl:
+            self._memory.move_to_end(key)
+            self.memory_hits += 1
+            return entry
+        
+        try:
+            entry = await asyncio.to_thread(self._load, key)
+        except Exception as e:
+            logger.warning(f"⚠️  Patent cache read failed: {str(e)}")
+            entry = None
+        
+        if entry and now - entry["bibliographic_at"] < self.bibliographic_ttl:
+            self._remember(key, entry)
+            self.disk_hits += 1
+            return entry
+        
+        self._memory.pop(key, None)
+        self.misses += 1
+        return None
+    
+    async def put(
+        self,
+        patent_id: str,
+        record: Dict[str, Any],
+        bibliographic_at: Optional[float] = None
+    ):
+        """Store a freshly fetched record in both tiers"""
+        now = time.time()
+        key = self.make_key(patent_id)
+        entry = {
+            "record": copy.deepcopy(record),
+            "bibliographic_at": bibliographic_at or now,
+            "legal_at": now
+        }
+        self._remember(key, entry)
+        
+        try:
+            await asyncio.to_thread(self._save, key, entry)
+        except Exception as e:
+            logger.warning(f"⚠️  Patent cache write failed: {str(e)}")
+    
+    def _remember(self, key: str, entry: Dict[str, Any]):
+        self._memory[key] = entry
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_size:
+            self._memory.popitem(last=False)
+    
+    # ========================================
+    # Disk tier
+    # ========================================
+    
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        """Open a connection, commit on success and always close it"""
+        if not self._initialized:
+            os.makedirs(os.path.dirname(self.db_path) or ".", exist_ok=True)
+        
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        try:
+            if not self._initialized:
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.executescript(_SCHEMA)
+                self._initialized = True
+            
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+    
+    def _load(self, key: str) -> Optional[Dict[str, Any]]:
+        if not os.path.exists(self.db_path):
+            return None
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT record, bibliographic_at, legal_at FROM patents WHERE patent_key = ?",
+                (key,)
+            ).fetchone()
+        if not row:
+            return None
+        return {"record": json.loads(row[0]), "bibliographic_at": row[1], "legal_at": row[2]}
+    
+    def _save(self, key: str, entry: Dict[str, Any]):
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO patents (patent_key, record, bibliographic_at, legal_at) VALUES (?, ?, ?, ?)",
+                (key, json.dumps(entry["record"]), entry["bibliographic_at"], entry["legal_at"])
+            )
+            
+            self._writes += 1
+            if self._writes % PRUNE_EVERY_WRITES == 0:
+                conn.execute(
+                    "DELETE FROM patents WHERE bibliographic_at < ?",
+                    (time.time() - self.bibliographic_ttl,)
+                )
+    
+    def get_stats(self) -> Dict[str, Any]:
+        lookups = self.memory_hits + self.disk_hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "memory_entries": len(self._memory),
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": round((self.memory_hits + self.disk_hits) / lookups, 3) if lookups else 0.0,
+            "legal_refreshes": self.refreshes,
+            "stale_served": self.stale_served
+        }
+
+# Global instance
+patent_cache = PatentCache(
+    config.PATENT_CACHE_DB_PATH,
+    memory_size=config.PATENT_CACHE_MEMORY_SIZE,
+    bibliographic_ttl_hours=config.PATENT_CACHE_TTL_HOURS_BIBLIOGRAPHIC,
+    legal_ttl_hours=config.PATENT_CACHE_TTL_HOURS_LEGAL,
+    enabled=config.PATENT_CACHE_ENABLED
+)
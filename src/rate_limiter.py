@@ -0,0 +1,125 @@
+"""Per-source rate limiting (token bucket + concurrency cap)"""
+import logging
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from typing import Dict, Any, Tuple
+
+from . import config
+
+logger = logging.getLogger(__name__)
+
+class TokenBucket:
+    """
+    Classic token bucket
+    
+    Refills at `rate` tokens per second up to `capacity`, so a source can
+    burst `capacity` requests and then sustain `rate` requests/second.
+    Waiters are served in FIFO order.
+    """
+    
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = max(1, capacity)
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+    
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+    
+    async def acquire(self) -> float:
+        """
+        Take one token, waiting for a refill if needed
+        
+        Returns:
+            Seconds spent waiting
+        """
+        start = time.monotonic()
+        
+        # The lock keeps waiters in arrival order
+        async with self._lock:
+            while True:
+                self._refill()
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return time.monotonic() - start
+                
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+class SourceLimiter:
+    """Rate + concurrency limit for one upstream host"""
+    
+    def __init__(self, name: str, rate: float, burst: int, max_concurrency: int):
+        self.name = name
+        self.rate = rate
+        self.burst = burst
+        self.max_concurrency = max(1, max_concurrency)
+        
+        self.bucket = TokenBucket(rate, burst)
+        self.semaphore = asyncio.Semaphore(self.max_concurrency)
+        
+        # Stats
+        self.requests = 0
+        self.in_flight = 0
+        self.total_wait_seconds = 0.0
+    
+    @asynccontextmanager
+    async def slot(self):
+        """Hold one concurrent slot and one token for the duration of a request"""
+        start = time.monotonic()
+        
+        async with self.semaphore:
+            await self.bucket.acquire()
+            
+            waited = time.monotonic() - start
+            self.total_wait_seconds += waited
+            self.requests += 1
+            self.in_flight += 1
+            
+            if waited > 1:
+                logger.debug(f"    ⏳ {self.name}: waited {waited:.1f}s for rate limit")
+            
+            try:
+                yield
+            finally:
+                self.in_flight -= 1
+    
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "rate_per_second": self.rate,
+            "burst": self.burst,
+            "max_concurrency": self.max_concurrency,
+            "in_flight": self.in_flight,
+            "requests": self.requests,
+            "avg_wait_seconds": round(self.total_wait_seconds / self.requests, 3) if self.requests else 0.0
+        }
+
+class RateLimiter:
+    """
+    Shared registry of per-source limiters
+    
+    Usage:
+        async with rate_limiter.limit("serpapi"):
+            ...  # one request to SerpAPI
+    """
+    
+    def __init__(self, limits: Dict[str, Tuple[float, int, int]]):
+        self.sources: Dict[str, SourceLimiter] = {
+            name: SourceLimiter(name, rate, burst, concurrency)
+            for name, (rate, burst, concurrency) in limits.items()
+        }
+    
+    def limit(self, source: str):
+        """Async context manager that paces one request to `source`"""
+        if source not in self.sources:
+            raise KeyError(f"Unknown rate limit source: {source}")
+        return self.sources[source].slot()
+    
+    def get_stats(self) -> Dict[str, Dict[str, Any]]:
+        return {name: limiter.get_stats() for name, limiter in self.sources.items()}
+
+# Global instance
+rate_limiter = RateLimiter(config.RATE_LIMITS)
@@ -0,0 +1,529 @@
+"""SerpAPI access - persistent response cache and key manager in front of every query"""
+import logging
+import asyncio
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import time
+from contextlib import contextmanager, asynccontextmanager
+from typing import Dict, Any, List, Optional, Iterator, AsyncIterator, Tuple
+
+import aiohttp
+
+from .rate_limiter import rate_limiter
+from .http_client import http_client
+from .singleflight import SingleFlight
+from . import config
+
+logger = logging.getLogger(__name__)
+
+# TTL for engines without an entry in config.SERPAPI_CACHE_TTL_HOURS
+DEFAULT_TTL_HOURS = 24
+
+# SerpAPI keys are 64 hex characters; anything else is a placeholder
+_KEY_PATTERN = re.compile(r"^[0-9a-f]{64}$")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    cache_key TEXT PRIMARY KEY,
+    engine TEXT NOT NULL,
+    response TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    expires_at REAL NOT NULL,
+    accessed_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS responses_accessed_at ON responses (accessed_at);
+"""
+
+class SerpAPICache:
+    """
+    Disk-backed cache of SerpAPI responses
+    
+    Keyed on the normalized query parameters without api_key, so the same
+    query made with any key is a hit. Entries expire after a per-engine
+    TTL; once the database grows past max_mb the least recently used
+    entries are evicted. Blocking sqlite3 calls run in a worker thread.
+    """
+    
+    def __init__(
+        self,
+        db_path: str,
+        ttl_hours: Dict[str, float],
+        max_mb: float = 200,
+        enabled: bool = True
+    ):
+        self.db_path = db_path
+        self.ttl_hours = ttl_hours
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self.enabled = enabled
+        self._initialized = False
+        
+        # Stats
+        self.hits: Dict[str, int] = {}
+        self.misses: Dict[str, int] = {}
+        self.evictions = 0
+    
+    @staticmethod
+    def make_key(params: Dict[str, Any]) -> str:
+        """Stable key for a query: sorted params, api_key excluded"""
+        normalized = {
+            k: str(v).strip() for k, v in params.items()
+            if k != "api_key" and v is not None
+        }
+        return hashlib.sha256(json.dumps(normalized, sort_keys=True).encode()).hexdigest()
+    
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        """Open a connection, commit on success and always close it"""
+        if not self._initialized:
+            os.makedirs(os.path.dirname(self.db_path) or ".", exist_ok=True)
+        
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        try:
+            if not self._initialized:
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.executescript(_SCHEMA)
+                self._initialized = True
+            
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+    
+    async def get(self, params: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Cached response for `params`, or None on a miss"""
+        if not self.enabled:
+            return None
+        
+        engine = params.get("engine", "")
+        
+        try:
+            data = await asyncio.to_thread(self._get, self.make_key(params))
+        except Exception as e:
+            logger.warning(f"⚠️  SerpAPI cache read failed: {str(e)}")
+            data = None
+        
+        counter = self.hits if data is not None else self.misses
+        counter[engine] = counter.get(engine, 0) + 1
+        return data
+    
+    def _get(self, cache_key: str) -> Optional[Dict[str, Any]]:
+        now = time.time()
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT response FROM responses WHERE cache_key = ? AND expires_at > ?",
+                (cache_key, now)
+            ).fetchone()
+            if not row:
+                return None
+            conn.execute(
+                "UPDATE responses SET accessed_at = ? WHERE cache_key = ?",
+                (now, cache_key)
+            )
+        return json.loads(row[0])
+    
+    async def set(self, params: Dict[str, Any], data: Dict[str, Any]):
+        """Store a successful response"""
+        if not self.enabled:
+            return
+        
+        engine = params.get("engine", "")
+        ttl = self.ttl_hours.get(engine, DEFAULT_TTL_HOURS) * 3600
+        
+        try:
+            await asyncio.to_thread(self._set, self.make_key(params), engine, json.dumps(data), ttl)
+        except Exception as e:
+            logger.warning(f"⚠️  SerpAPI cache write failed: {str(e)}")
+    
+    def _set(self, cache_key: str, engine: str, response_json: str, ttl: float):
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                """
+                INSERT OR REPLACE INTO responses (cache_key, engine, response, size, expires_at, accessed_at)
+                VALUES (?, ?, ?, ?, ?, ?)
+                """,
+                (cache_key, engine, response_json, len(response_json), now + ttl, now)
+            )
+            self._evict(conn, now)
+    
+    def _evict(self, conn: sqlite3.Connection, now: float):
+        """Drop expired entries, then least recently used ones until under max_bytes"""
+        expired = conn.execute("DELETE FROM responses WHERE expires_at <= ?", (now,)).rowcount
+        
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        evicted = 0
+        
+        if total > self.max_bytes:
+            for cache_key, size in conn.execute(
+                "SELECT cache_key, size FROM responses ORDER BY accessed_at"
+            ).fetchall():
+                if total <= self.max_bytes:
+                    break
+                conn.execute("DELETE FROM responses WHERE cache_key = ?", (cache_key,))
+                total -= size
+                evicted += 1
+        
+        self.evictions += expired + evicted
+        if evicted:
+            logger.info(f"🧹 SerpAPI cache: evicted {evicted} least recently used entries")
+    
+    def get_stats(self) -> Dict[str, Any]:
+        hits = sum(self.hits.values())
+        misses = sum(self.misses.values())
+        return {
+            "enabled": self.enabled,
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": round(hits / (hits + misses), 3) if hits + misses else 0.0,
+            "hits_by_engine": dict(self.hits),
+            "misses_by_engine": dict(self.misses),
+            "evictions": self.evictions
+        }
+
+class SerpAPIQuotaError(Exception):
+    """Raised when no SerpAPI key is usable (all exhausted, invalid or cooling down)"""
+
+class SerpAPIKey:
+    """Usage state of one API key"""
+    
+    def __init__(self, key: str):
+        self.key = key
+        self.key_id = hashlib.sha256(key.encode()).hexdigest()[:16]  # Never persist the key itself
+        self.used = 0
+        self.in_flight = 0
+        self.invalid = False
+        self.disabled_until = 0.0
+    
+    @property
+    def label(self) -> str:
+        return f"{self.key[:6]}…"
+
+class SerpAPIKeyManager:
+    """
+    Leases SerpAPI keys to concurrent callers
+    
+    Each lease goes to the key with the most quota left after the requests
+    already in flight on it, so concurrent searches spread over the keys
+    and never over-commit one. Monthly usage is persisted in SQLite and
+    survives restarts. A 401 retires a key, a 429 benches it for
+    cooldown_seconds; placeholder keys are never used.
+    """
+    
+    def __init__(
+        self,
+        keys: List[str],
+        quota_per_key: int = 250,
+        cooldown_seconds: int = 3600,
+        db_path: Optional[str] = None
+    ):
+        valid = [key for key in dict.fromkeys(keys) if _KEY_PATTERN.match(key)]
+        self.keys_skipped = len(keys) - len(valid)
+        self.keys = [SerpAPIKey(key) for key in valid]
+        self.quota_per_key = quota_per_key
+        self.cooldown_seconds = cooldown_seconds
+        self.db_path = db_path
+        self._month: Optional[str] = None
+    
+    @staticmethod
+    def _current_month() -> str:
+        return time.strftime("%Y-%m", time.gmtime())
+    
+    def remaining(self, key: SerpAPIKey) -> int:
+        """Quota left this month"""
+        return max(0, self.quota_per_key - key.used)
+    
+    def _usable(self, key: SerpAPIKey, now: float) -> bool:
+        return (
+            not key.invalid
+            and key.disabled_until <= now
+            and self.remaining(key) - key.in_flight > 0
+        )
+    
+    @asynccontextmanager
+    async def lease(self) -> AsyncIterator[SerpAPIKey]:
+        """
+        Hold the best key for one request
+        
+        Raises:
+            SerpAPIQuotaError: if no key is usable
+        """
+        await self._ensure_loaded()
+        
+        now = time.time()
+        candidates = [key for key in self.keys if self._usable(key, now)]
+        if not candidates:
+            raise SerpAPIQuotaError("No SerpAPI key with remaining quota")
+        
+        key = max(candidates, key=lambda k: self.remaining(k) - k.in_flight)
+        key.in_flight += 1
+        try:
+            yield key
+        finally:
+            key.in_flight -= 1
+    
+    async def record(self, key: SerpAPIKey, status: int):
+        """Account for the HTTP status of a request made with `key`"""
+        if status == 200:
+            key.used += 1
+        elif status == 401:
+            key.invalid = True
+            logger.error(f"❌ SerpAPI key {key.label} rejected (401), disabled")
+        elif status == 429:
+            key.disabled_until = time.time() + self.cooldown_seconds
+            logger.warning(f"⚠️  SerpAPI key {key.label} out of searches (429), benched for {self.cooldown_seconds}s")
+        else:
+            return
+        
+        try:
+            await asyncio.to_thread(self._save, key)
+        except Exception as e:
+            logger.warning(f"⚠️  SerpAPI key usage not persisted: {str(e)}")
+    
+    async def _ensure_loaded(self):
+        """Load persisted usage on first use and reset counters each month"""
+        month = self._current_month()
+        if self._month == month:
+            return
+        
+        self._month = month
+        for key in self.keys:
+            key.used = 0
+        
+        if self.keys_skipped:
+            logger.warning(f"⚠️  Skipped {self.keys_skipped} placeholder/malformed SerpAPI keys")
+        
+        try:
+            await asyncio.to_thread(self._load, month)
+        except Exception as e:
+            logger.warning(f"⚠️  SerpAPI key usage not loaded: {str(e)}")
+    
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        os.makedirs(os.path.dirname(self.db_path) or ".", exist_ok=True)
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        try:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS key_usage (
+                    key_id TEXT PRIMARY KEY,
+                    month TEXT NOT NULL,
+                    used INTEGER NOT NULL,
+                    invalid INTEGER NOT NULL,
+                    disabled_until REAL NOT NULL
+                )
+                """
+            )
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+    
+    def _load(self, month: str):
+        if not self.db_path:
+            return
+        by_id = {key.key_id: key for key in self.keys}
+        with self._connect() as conn:
+            for key_id, row_month, used, invalid, disabled_until in conn.execute(
+                "SELECT key_id, month, used, invalid, disabled_until FROM key_usage"
+            ):
+                key = by_id.get(key_id)
+                if not key:
+                    continue
+                key.invalid = bool(invalid)
+                key.disabled_until = disabled_until
+                if row_month == month:
+                    key.used = used
+    
+    def _save(self, key: SerpAPIKey):
+        if not self.db_path:
+            return
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO key_usage (key_id, month, used, invalid, disabled_until) VALUES (?, ?, ?, ?, ?)",
+                (key.key_id, self._month, key.used, int(key.invalid), key.disabled_until)
+            )
+    
+    def quota_remaining(self) -> int:
+        """Searches left this month over all usable keys"""
+        now = time.time()
+        return sum(
+            self.remaining(key) for key in self.keys
+            if not key.invalid and key.disabled_until <= now
+        )
+    
+    def get_stats(self) -> Dict[str, Any]:
+        now = time.time()
+        
+        def status(key: SerpAPIKey) -> str:
+            if key.invalid:
+                return "invalid"
+            if key.disabled_until > now:
+                return "cooling_down"
+            if not self.remaining(key):
+                return "exhausted"
+            return "ok"
+        
+        return {
+            "keys_usable": sum(1 for key in self.keys if self._usable(key, now)),
+            "keys_skipped": self.keys_skipped,
+            "quota_remaining": self.quota_remaining(),
+            "keys": [
+                {
+                    "key": key.label,
+                    "status": status(key),
+                    "used": key.used,
+                    "remaining": self.remaining(key),
+                    "in_flight": key.in_flight
+                }
+                for key in self.keys
+            ]
+        }
+
+class SerpAPIBudget:
+    """
+    SerpAPI allowance of one search
+    
+    Every billed query (an upstream 200) is debited exactly once; cache hits
+    and failed requests are free. A query only starts if it can reserve one
+    unit, so concurrent stages can never overspend.
+    """
+    
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.used = 0
+        self.reserved = 0
+        self.cache_hits = 0
+        self.denied = 0
+    
+    @property
+    def remaining(self) -> int:
+        return self.limit - self.used - self.reserved
+    
+    def reserve(self) -> bool:
+        if self.remaining <= 0:
+            self.denied += 1
+            return False
+        self.reserved += 1
+        return True
+    
+    def settle(self, billed: bool):
+        """Release a reservation, debiting it if SerpAPI billed the query"""
+        self.reserved -= 1
+        if billed:
+            self.used += 1
+
+async def search(
+    session: aiohttp.ClientSession,
+    params: Dict[str, Any],
+    budget: Optional[SerpAPIBudget] = None,
+    timeout: float = 30
+) -> Optional[Dict[str, Any]]:
+    """
+    Run one SerpAPI query, served from the cache when possible
+    
+    A key is leased from the key manager only on a cache miss; on a 401
+    or 429 the query is retried once per remaining key.
+    
+    Args:
+        session: aiohttp session of the calling client
+        params: Query parameters without api_key
+        budget: Per-search allowance to debit (unlimited if None)
+    
+    Returns:
+        Response JSON, or None if SerpAPI did not answer 200, no key is
+        left or the budget is spent
+    """
+    cached = await serpapi_cache.get(params)
+    if cached is not None:
+        logger.debug(f"    💾 SerpAPI cache hit ({params.get('engine')})")
+        if budget:
+            budget.cache_hits += 1
+        return cached
+    
+    if budget and not budget.reserve():
+        logger.debug(f"    💸 SerpAPI budget spent, skipping {params.get('engine')} query")
+        return None
+    
+    # Identical queries in flight (e.g. overlapping searches) share one call;
+    # only the caller that made it is billed. Its reservation settles when
+    # the upstream call finishes, even if this caller was cancelled while
+    # others kept the call alive.
+    started = False
+    
+    def start() -> asyncio.Task:
+        nonlocal started
+        started = True
+        task = asyncio.ensure_future(_request(session, params, timeout))
+        if budget:
+            task.add_done_callback(lambda done: budget.settle(billed=_billed(done)))
+        return task
+    
+    status, data, shared = 0, None, False
+    try:
+        (status, data), shared = await _flights.run(serpapi_cache.make_key(params), start)
+    finally:
+        # Joined another caller's call (or never got to start one): free
+        if budget and not started:
+            budget.settle(billed=False)
+            if shared:
+                budget.cache_hits += 1
+    
+    if status != 200:
+        return None
+    return data
+
+def _billed(task: asyncio.Task) -> bool:
+    """Whether a finished upstream call was billed (SerpAPI answered 200)"""
+    return not task.cancelled() and task.exception() is None and task.result()[0] == 200
+
+async def _request(
+    session: aiohttp.ClientSession,
+    params: Dict[str, Any],
+    timeout: float
+) -> Tuple[int, Optional[Dict[str, Any]]]:
+    """One upstream query (with key failover); caches successful responses"""
+    status, data = 0, None
+    
+    for _ in range(max(1, len(serpapi_keys.keys))):
+        try:
+            async with rate_limiter.limit("serpapi"), serpapi_keys.lease() as key:
+                request_params = {**params, "api_key": key.key}
+                async with session.get(config.SERPAPI_BASE_URL, params=request_params, timeout=http_client.timeout(timeout)) as response:
+                    status = response.status
+                    data = await response.json() if status == 200 else None
+                await serpapi_keys.record(key, status)
+        except SerpAPIQuotaError as e:
+            logger.warning(f"    ⚠️  {str(e)}")
+            return 0, None
+        
+        if status not in (401, 429):
+            break
+    
+    if status != 200:
+        logger.warning(f"    ⚠️  SerpAPI returned {status} ({params.get('engine')})")
+        return status, None
+    
+    # SerpAPI reports some failures as 200 + "error"; never cache those
+    if not data.get("error"):
+        await serpapi_cache.set(params, data)
+    return status, data
+
+_flights = SingleFlight("serpapi")
+
+# Global instances
+serpapi_keys = SerpAPIKeyManager(
+    config.SERPAPI_KEYS,
+    quota_per_key=config.SERPAPI_QUOTA_PER_KEY,
+    cooldown_seconds=config.SERPAPI_KEY_COOLDOWN_SECONDS,
+    db_path=config.SERPAPI_KEYS_DB_PATH
+)
+
+serpapi_cache = SerpAPICache(
+    config.SERPAPI_CACHE_DB_PATH,
+    ttl_hours=config.SERPAPI_CACHE_TTL_HOURS,
+    max_mb=config.SERPAPI_CACHE_MAX_MB,
+    enabled=config.SERPAPI_CACHE_ENABLED
+)
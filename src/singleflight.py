@@ -0,0 +1,106 @@
+"""Single-flight request coalescing for identical in-flight lookups"""
+import logging
+import asyncio
+import copy
+from typing import Any, Awaitable, Callable, Dict, Hashable, Tuple, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls for the same key into one upstream call
+    
+    The first caller for a key starts the work as a task; callers arriving
+    while it is in flight await the same task instead of starting their
+    own. Each waiter gets a deep copy of the result, so callers that
+    mutate it cannot affect each other. Waiters are counted per flight: a
+    cancelled caller does not cancel the lookup while others still await
+    it, but once the last waiter is gone the lookup is cancelled too.
+    
+    Usage:
+        result = await patent_flights.do(patent_id, lambda: fetch(patent_id))
+    """
+    
+    def __init__(self, name: str):
+        self.name = name
+        self._in_flight: Dict[Hashable, asyncio.Task] = {}
+        self._waiters: Dict[asyncio.Task, int] = {}
+        
+        # Stats
+        self.calls = 0
+        self.coalesced = 0
+        self.abandoned = 0
+        
+        _registry[name] = self
+    
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        """Run fn() for `key`, or join the call already in flight"""
+        result, _ = await self.run(key, fn)
+        return result
+    
+    async def run(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> Tuple[T, bool]:
+        """
+        Same as do()
+        
+        Returns:
+            (result, shared) where shared is True if the result came from
+            another caller's call
+        """
+        task = self._in_flight.get(key)
+        shared = task is not None
+        
+        if shared:
+            self.coalesced += 1
+            logger.debug(f"    🔗 {self.name}: joined in-flight lookup for {key}")
+        else:
+            self.calls += 1
+            task = asyncio.ensure_future(fn())
+            self._in_flight[key] = task
+            task.add_done_callback(lambda done: self._forget(key, done))
+        
+        self._waiters[task] = self._waiters.get(task, 0) + 1
+        try:
+            # Shielded so one cancelled waiter leaves the lookup to the others
+            result = await asyncio.shield(task)
+        finally:
+            self._leave(key, task)
+        
+        return (copy.deepcopy(result) if shared else result), shared
+    
+    def _leave(self, key: Hashable, task: asyncio.Task):
+        """Drop one waiter; the last one to leave cancels an unfinished lookup"""
+        self._waiters[task] -= 1
+        if self._waiters[task] > 0:
+            return
+        
+        del self._waiters[task]
+        if not task.done():
+            self.abandoned += 1
+            logger.debug(f"    ✂️  {self.name}: no callers left, cancelled lookup for {key}")
+            # Forget it now so a new caller starts afresh instead of joining a cancelled task
+            if self._in_flight.get(key) is task:
+                del self._in_flight[key]
+            task.cancel()
+    
+    def _forget(self, key: Hashable, task: asyncio.Task):
+        if self._in_flight.get(key) is task:
+            del self._in_flight[key]
+        # Retrieve the exception so an abandoned failed task is not reported
+        if not task.cancelled():
+            task.exception()
+    
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "calls": self.calls,
+            "coalesced": self.coalesced,
+            "abandoned": self.abandoned,
+            "in_flight": len(self._in_flight)
+        }
+
+_registry: Dict[str, SingleFlight] = {}
+
+def get_stats() -> Dict[str, Dict[str, Any]]:
+    """Stats of every SingleFlight group"""
+    return {name: group.get_stats() for name, group in _registry.items()}
@@ -1,7 +1,7 @@
 """Utility functions for Pharmyrus v4.0"""
 import re
 import logging
-from typing import List, Optional
+from typing import List, Optional, Tuple
 from datetime import datetime
 
 logger = logging.getLogger(__name__)
@@ -31,6 +31,34 @@ def clean_patent_number(patent_number: str) -> str:
     """
     return patent_number.replace(" ", "").replace(",", "").replace("-", "").upper()
 
+def application_key(country_code: str, application_number: str) -> Tuple[str, str, str]:
+    """
+    Canonical dedup key for a national application: (country, number, kind code)
+    
+    Examples:
+        ("BR", "br 11 2012 008823 b8") -> ("BR", "112012008823", "B8")
+        ("US", "US9376391B2")         -> ("US", "9376391", "B2")
+        ("US", "13/504,155")          -> ("US", "13504155", "")
+    """
+    country = (country_code or "").strip().upper()
+    number = re.sub(r'[^A-Z0-9]', '', (application_number or "").upper())
+    
+    # Drop repeated country prefix (e.g. "BR" + "BR112012008823")
+    if country and number.startswith(country):
+        number = number[len(country):]
+    elif not country:
+        country = extract_country_code(number)
+        if country != "Unknown":
+            number = number[2:]
+    
+    # Split trailing kind code (A1, B2, B8, ...)
+    kind = ""
+    match = re.match(r'^(.*\d)([A-Z]\d?)$', number)
+    if match:
+        number, kind = match.group(1), match.group(2)
+    
+    return country, number, kind
+
 def extract_wo_numbers(text: str) -> List[str]:
     """
     Extract WO numbers from text
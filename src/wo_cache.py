@@ -0,0 +1,221 @@
+"""WO details cache - stale-while-revalidate over an LRU + SQLite store"""
+import logging
+import asyncio
+import copy
+import json
+import os
+import sqlite3
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, Awaitable, Callable, Dict, Iterator, Optional
+
+from . import config, utils
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS wos (
+    wo_number TEXT PRIMARY KEY,
+    record TEXT NOT NULL,
+    fetched_at REAL NOT NULL
+);
+"""
+
+class WOCache:
+    """
+    Cache of WIPO WO records (basic info + worldwide applications)
+    
+    National phase tables change slowly, so a record younger than
+    soft_ttl_hours is served as is. Between the soft and the hard TTL the
+    cached record is still served immediately while one background crawl
+    refreshes it; only past the hard TTL (or on a miss) does the caller
+    wait for WIPO. Failed crawls (records with "erro") are never stored.
+    """
+    
+    def __init__(
+        self,
+        db_path: str,
+        memory_size: int = 500,
+        soft_ttl_hours: float = 24,
+        hard_ttl_hours: float = 720,
+        enabled: bool = True
+    ):
+        self.db_path = db_path
+        self.memory_size = memory_size
+        self.soft_ttl = soft_ttl_hours * 3600
+        self.hard_ttl = hard_ttl_hours * 3600
+        self.enabled = enabled
+        
+        self._memory: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._refreshing: Dict[str, asyncio.Task] = {}
+        self._initialized = False
+        
+        # Stats
+        self.fresh_hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.refreshes = 0
+        self.refresh_failures = 0
+    
+    @staticmethod
+    def is_usable(record: Optional[Dict[str, Any]]) -> bool:
+        return bool(record) and not record.get("erro")
+    
+    async def fetch(
+        self,
+        wo_number: str,
+        fetch_fn: Callable[[], Awaitable[Dict[str, Any]]]
+    ) -> Dict[str, Any]:
+        """Cached record for `wo_number`, crawling with fetch_fn() when needed"""
+        if not self.enabled:
+            return await fetch_fn()
+        
+        key = utils.normalize_wo_number(wo_number)
+        entry = await self._get(key)
+        age = time.time() - entry["fetched_at"] if entry else None
+        
+        if entry and age < self.soft_ttl:
+            self.fresh_hits += 1
+            return copy.deepcopy(entry["record"])
+        
+        if entry and age < self.hard_ttl:
+            self.stale_hits += 1
+            self._schedule_refresh(key, fetch_fn)
+            return copy.deepcopy(entry["record"])
+        
+        self.misses += 1
+        record = await fetch_fn()
+        if self.is_usable(record):
+            await self._put(key, record)
+        return record
+    
+    def _schedule_refresh(self, key: str, fetch_fn: Callable[[], Awaitable[Dict[str, Any]]]):
+        """Start one background crawl per stale WO"""
+        if key in self._refreshing:
+            return
+        
+        task = asyncio.create_task(self._refresh(key, fetch_fn))
+        self._refreshing[key] = task
+        task.add_done_callback(lambda _: self._refreshing.pop(key, None))
+    
+    async def _refresh(self, key: str, fetch_fn: Callable[[], Awaitable[Dict[str, Any]]]):
+        logger.info(f"🔄 Refreshing stale WO record {key} in background")
+        self.refreshes += 1
+        try:
+            record = await fetch_fn()
+        except Exception as e:
+            record = {"erro": str(e)}
+        
+        if self.is_usable(record):
+            await self._put(key, record)
+        else:
+            # Keep serving the old record until the hard TTL
+            self.refresh_failures += 1
+            logger.warning(f"⚠️  Background refresh of {key} failed: {record.get('erro') if record else 'no data'}")
+    
+    async def close(self):
+        """Cancel pending background refreshes"""
+        tasks = list(self._refreshing.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+    
+    # ========================================
+    # Storage
+    # ========================================
+    
+    async def _get(self, key: str) -> Optional[Dict[str, Any]]:
+        entry = self._memory.get(key)
+        if entry:
+            self._memory.move_to_end(key)
+            return entry
+        
+        try:
+            entry = await asyncio.to_thread(self._load, key)
+        except Exception as e:
+            logger.warning(f"⚠️  WO cache read failed: {str(e)}")
+            return None
+        
+        if entry:
+            self._remember(key, entry)
+        return entry
+    
+    async def _put(self, key: str, record: Dict[str, Any]):
+        entry = {"record": copy.deepcopy(record), "fetched_at": time.time()}
+        self._remember(key, entry)
+        
+        try:
+            await asyncio.to_thread(self._save, key, entry)
+        except Exception as e:
+            logger.warning(f"⚠️  WO cache write failed: {str(e)}")
+    
+    def _remember(self, key: str, entry: Dict[str, Any]):
+        self._memory[key] = entry
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_size:
+            self._memory.popitem(last=False)
+    
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        """Open a connection, commit on success and always close it"""
+        if not self._initialized:
+            os.makedirs(os.path.dirname(self.db_path) or ".", exist_ok=True)
+        
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        try:
+            if not self._initialized:
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.executescript(_SCHEMA)
+                self._initialized = True
+            
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+    
+    def _load(self, key: str) -> Optional[Dict[str, Any]]:
+        if not os.path.exists(self.db_path):
+            return None
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT record, fetched_at FROM wos WHERE wo_number = ?",
+                (key,)
+            ).fetchone()
+        if not row:
+            return None
+        return {"record": json.loads(row[0]), "fetched_at": row[1]}
+    
+    def _save(self, key: str, entry: Dict[str, Any]):
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO wos (wo_number, record, fetched_at) VALUES (?, ?, ?)",
+                (key, json.dumps(entry["record"]), entry["fetched_at"])
+            )
+            conn.execute(
+                "DELETE FROM wos WHERE fetched_at < ?",
+                (time.time() - self.hard_ttl,)
+            )
+    
+    def get_stats(self) -> Dict[str, Any]:
+        lookups = self.fresh_hits + self.stale_hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "memory_entries": len(self._memory),
+            "fresh_hits": self.fresh_hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "hit_rate": round((self.fresh_hits + self.stale_hits) / lookups, 3) if lookups else 0.0,
+            "refreshes_in_flight": len(self._refreshing),
+            "refreshes": self.refreshes,
+            "refresh_failures": self.refresh_failures
+        }
+
+# Global instance
+wo_cache = WOCache(
+    config.WO_CACHE_DB_PATH,
+    memory_size=config.WO_CACHE_MEMORY_SIZE,
+    soft_ttl_hours=config.WO_CACHE_SOFT_TTL_HOURS,
+    hard_ttl_hours=config.WO_CACHE_HARD_TTL_HOURS,
+    enabled=config.WO_CACHE_ENABLED
+)